@@ -10,6 +10,8 @@ from rag_architectures.rerank_RAG import RerankRAG
 from rag_architectures.agentic_RAG import AgenticRAG
 from rag_architectures.online_RAG import OnlineRAG
 from rag_architectures.graph_RAG import GraphRAG
+from model_registry import get_model_registry
+from client_pool import get_client_pool
 
 # Load environment variables
 load_dotenv()
@@ -19,6 +21,12 @@ rag_instances = {}
 rag_files = {}  # keep track of last file per architecture
 
 
+def close_rag_instance(rag):
+    """Release the shared models and vector DB clients held by a RAG instance, if it holds any."""
+    if rag is not None and hasattr(rag, "close"):
+        rag.close()
+
+
 def get_rag_instance(arch: str, file_path: str = None):
     """
     Return the RAG instance based on architecture selection.
@@ -28,6 +36,9 @@ def get_rag_instance(arch: str, file_path: str = None):
 
     # If no instance yet OR a new file has been uploaded → reinitialize
     if arch not in rag_instances or (file_path and file_path != last_file):
+        # Release the shared models of the instance being replaced
+        close_rag_instance(rag_instances.pop(arch, None))
+
         if arch == "Standard RAG":
             rag_instances[arch] = StandardRAG(file_path=file_path)
         elif arch == "Standard RAG + Memory":
@@ -93,4 +104,11 @@ with gr.Blocks(theme=gr.themes.Soft()) as demo:
 
     msg.submit(respond, [msg, chatbot, arch_selector, file_upload], [msg, chatbot])
 
-demo.launch()
+try:
+    demo.launch()
+finally:
+    # Shutdown: release every instance, unload the shared models and close pooled clients
+    for rag in rag_instances.values():
+        close_rag_instance(rag)
+    get_model_registry().clear()
+    get_client_pool().close_all()
@@ -0,0 +1,83 @@
+import os
+import time
+import csv
+from dotenv import load_dotenv
+
+import numpy as np
+
+from splitters import split_documents
+from data_loader import load_file
+from embeddings import load_embeddings_model
+
+load_dotenv()
+
+EXPERIMENTS_DIR = os.path.dirname(__file__)
+OUTPUT_CSV = os.path.join(EXPERIMENTS_DIR, "embedding_throughput.csv")
+print(f"Logging embedding throughput to: {OUTPUT_CSV}")
+
+# Experiment settings
+FILE_PATH = "./data/eu.pdf"
+MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+RUNS = 3                # measured runs per backend
+MAX_CHUNKS = 2000       # cap on chunks embedded per run
+MIN_COSINE = 0.99       # parity threshold vs the PyTorch reference
+
+# Backends to compare: the current HuggingFaceEmbeddings path (reference) vs
+# length-bucketed batching and ONNX Runtime, fp32 and int8-quantized
+BACKENDS = {
+    "huggingface": dict(provider="huggingface"),
+    "huggingface_bucketed": dict(provider="huggingface", local_batching={"max_batch_tokens": 8192}),
+    "onnx": dict(provider="onnx", onnx={"quantize": False}),
+    "onnx_int8": dict(provider="onnx", onnx={"quantize": True}),
+}
+
+# Load and split once; the recursive splitter gives the mixed chunk lengths we care about
+docs = load_file(FILE_PATH)
+if not docs:
+    raise ValueError("No documents found!")
+chunks = split_documents(docs, splitter_name="recursive", chunk_size=500, chunk_overlap=50)
+texts = [c.page_content for c in chunks][:MAX_CHUNKS]
+
+
+def measure_backend(model):
+    start = time.time()
+    vectors = model.embed_documents(texts)
+    end = time.time()
+    return end - start, np.asarray(vectors, dtype=np.float32)
+
+
+def main():
+    with open(OUTPUT_CSV, mode="w", newline="") as csvfile:
+        fieldnames = ["backend", "run", "chunks", "embed_time", "chunks_per_sec", "min_cosine_vs_reference"]
+        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+        writer.writeheader()
+
+        reference = None
+        for backend, kwargs in BACKENDS.items():
+            model = load_embeddings_model(model_name=MODEL_NAME, **kwargs)
+            # Warm-up run (model load, thread pools) and parity check against the first backend
+            _, vectors = measure_backend(model)
+            if reference is None:
+                reference = vectors
+            normed = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+            ref_normed = reference / np.linalg.norm(reference, axis=1, keepdims=True)
+            min_cosine = round(float((normed * ref_normed).sum(axis=1).min()), 6)
+            if min_cosine < MIN_COSINE:
+                print(f"WARNING: {backend} parity below {MIN_COSINE}: min cosine {min_cosine}")
+
+            for run in range(1, RUNS + 1):
+                embed_time, _ = measure_backend(model)
+                chunks_per_sec = round(len(texts) / embed_time, 1)
+                print(f"{backend}, Run {run}, {len(texts)} chunks, {embed_time:.4f}s, {chunks_per_sec} chunks/s")
+                writer.writerow({
+                    "backend": backend,
+                    "run": run,
+                    "chunks": len(texts),
+                    "embed_time": round(embed_time, 4),
+                    "chunks_per_sec": chunks_per_sec,
+                    "min_cosine_vs_reference": min_cosine,
+                })
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+import os
+import csv
+from dotenv import load_dotenv
+
+import numpy as np
+
+from splitters import split_documents
+from data_loader import load_file
+from embeddings import load_embeddings_model
+from vectorstores import make_faiss_index, measure_faiss_recall, train_faiss_index
+
+load_dotenv()
+
+EXPERIMENTS_DIR = os.path.dirname(__file__)
+OUTPUT_CSV = os.path.join(EXPERIMENTS_DIR, "faiss_index_recall.csv")
+print(f"Logging FAISS recall vs latency to: {OUTPUT_CSV}")
+
+# Experiment settings
+FILE_PATH = "./data/eu.pdf"
+MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+NUM_QUERIES = 200       # held-out chunks used as queries
+SYNTHETIC_SCALE = 0     # extra noisy copies of every chunk vector, to approach a large corpus
+RUNS = 3                # measured runs per (index, search parameter)
+
+# k values to sweep
+K_VALUES = [1, 3, 5, 10, 200]
+
+# Index configurations (vectorstore.faiss_index in config.yaml) and the
+# query-time parameter swept for each one to trace the recall/latency curve
+INDEXES = {
+    "ivf_flat": ({"type": "ivf_flat", "nlist": 64}, "nprobe", [1, 4, 16, 64]),
+    "ivf_pq": ({"type": "ivf_pq", "nlist": 64, "pq_m": 48, "pq_nbits": 8}, "nprobe", [1, 4, 16, 64]),
+    "hnsw": ({"type": "hnsw", "hnsw_m": 32, "ef_construction": 200}, "ef_search", [16, 32, 64, 256]),
+}
+
+# Load, split and embed once
+docs = load_file(FILE_PATH)
+if not docs:
+    raise ValueError("No documents found!")
+chunks = split_documents(docs, splitter_name="recursive", chunk_size=500, chunk_overlap=50)
+emb_model = load_embeddings_model(provider="huggingface", model_name=MODEL_NAME)
+vectors = np.asarray(emb_model.embed_documents([c.page_content for c in chunks]), dtype=np.float32)
+
+rng = np.random.default_rng(0)
+if SYNTHETIC_SCALE:
+    noise = rng.normal(scale=0.05, size=(SYNTHETIC_SCALE,) + vectors.shape).astype(np.float32)
+    vectors = np.concatenate([vectors, (vectors[None] + noise).reshape(-1, vectors.shape[1])])
+
+# Queries are held out of the index so no query finds itself
+order = rng.permutation(len(vectors))
+queries, corpus = vectors[order[:NUM_QUERIES]], vectors[order[NUM_QUERIES:]]
+
+exact_index = make_faiss_index(corpus.shape[1])
+exact_index.add(corpus)
+
+
+def build_index(index_cfg):
+    index = make_faiss_index(corpus.shape[1], index_cfg, num_vectors=len(corpus))
+    train_faiss_index(index, corpus, index_cfg)
+    index.add(corpus)
+    return index
+
+
+def main():
+    with open(OUTPUT_CSV, mode="w", newline="") as csvfile:
+        fieldnames = [
+            "index", "param", "value", "k", "run", "vectors", "recall", "latency_ms", "flat_latency_ms",
+        ]
+        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+        writer.writeheader()
+
+        for index_name, (index_cfg, param, values) in INDEXES.items():
+            index = build_index(index_cfg)
+            for value in values:
+                if param == "nprobe":
+                    index.nprobe = value
+                else:
+                    index.hnsw.efSearch = value
+                for k in K_VALUES:
+                    measure_faiss_recall(index, exact_index, queries, k)  # warm-up
+                    for run in range(1, RUNS + 1):
+                        report = measure_faiss_recall(index, exact_index, queries, k)
+                        print(
+                            f"{index_name}, {param}={value}, k={k}, Run {run}, recall {report['recall']:.3f}, "
+                            f"{report['latency_ms']:.3f}ms vs flat {report['exact_latency_ms']:.3f}ms"
+                        )
+                        writer.writerow({
+                            "index": index_name,
+                            "param": param,
+                            "value": value,
+                            "k": k,
+                            "run": run,
+                            "vectors": len(corpus),
+                            "recall": round(report["recall"], 4),
+                            "latency_ms": round(report["latency_ms"], 4),
+                            "flat_latency_ms": round(report["exact_latency_ms"], 4),
+                        })
+
+
+if __name__ == "__main__":
+    main()
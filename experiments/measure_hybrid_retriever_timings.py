@@ -0,0 +1,88 @@
+import os
+import time
+import csv
+from dotenv import load_dotenv
+
+from langchain.retrievers import EnsembleRetriever
+
+from splitters import split_documents
+from data_loader import load_file
+from embeddings import load_embeddings_model
+from vectorstores import build_vectorstore
+from sparse_index import build_sparse_index
+from retrievers import Retriever, SparseRetriever, dense_retriever
+
+load_dotenv()
+
+EXPERIMENTS_DIR = os.path.dirname(__file__)
+OUTPUT_CSV = os.path.join(EXPERIMENTS_DIR, "hybrid_retriever_timings.csv")
+print(f"Logging hybrid retriever timings to: {OUTPUT_CSV}")
+
+# Experiment settings
+QUERIES = [
+    "List the main topics in this document",
+    "Which systems are considered high-risk?",
+    "What obligations apply to providers?",
+]
+FILE_PATH = "./data/eu.pdf"
+RUNS = 3                # measured runs per (retriever, k, query)
+WARMUP = True           # perform one warm-up query per (retriever, k, query); also caches query embeddings
+
+# Same k sweep as measure_retriever_timings.py
+K_VALUES = [1, 3, 5, 10, 200]
+
+docs = load_file(FILE_PATH)
+if not docs:
+    raise ValueError("No documents found!")
+chunks = split_documents(docs, splitter_name="recursive", chunk_size=500, chunk_overlap=50)
+emb_model = load_embeddings_model(provider="huggingface", model_name="sentence-transformers/all-MiniLM-L6-v2")
+vectorstore = build_vectorstore("faiss", chunks, emb_model)
+sparse_index = build_sparse_index(chunks)
+
+
+def retrievers(k):
+    """Sequential EnsembleRetriever baseline vs the concurrent hybrid with each fusion."""
+    ensemble = EnsembleRetriever(
+        retrievers=[dense_retriever(vectorstore, k), SparseRetriever(index=sparse_index, k=k)],
+        weights=[0.6, 0.4],
+    )
+    result = {"ensemble_sequential": (ensemble, None)}
+    for fusion in ("rrf", "score"):
+        hybrid = Retriever("hybrid", vectorstore=vectorstore, sparse_index=sparse_index, k=k, hybrid={"fusion": fusion})
+        result[f"hybrid_{fusion}"] = (hybrid, hybrid.retriever)
+    return result
+
+
+def main():
+    with open(OUTPUT_CSV, mode="w", newline="") as csvfile:
+        fieldnames = ["retriever", "k", "query", "run", "total_ms", "dense_ms", "sparse_ms", "fusion_ms", "docs_retrieved"]
+        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+        writer.writeheader()
+
+        for k in K_VALUES:
+            for name, (retriever, engine) in retrievers(k).items():
+                for query in QUERIES:
+                    if WARMUP:
+                        retriever.invoke(query)
+                    for run in range(1, RUNS + 1):
+                        start = time.perf_counter()
+                        results = retriever.invoke(query)
+                        total_ms = round((time.perf_counter() - start) * 1000, 3)
+                        # Per-leg latencies are only reported by the native hybrid engine
+                        latency = engine.last_latency if engine is not None else {}
+                        print(f"{name}, k={k}, Run {run}, {total_ms}ms {latency}")
+                        writer.writerow({
+                            "retriever": name,
+                            "k": k,
+                            "query": query,
+                            "run": run,
+                            "total_ms": total_ms,
+                            "dense_ms": round(latency.get("dense_ms", 0.0), 3) if latency else "",
+                            "sparse_ms": round(latency.get("sparse_ms", 0.0), 3) if latency else "",
+                            "fusion_ms": round(latency.get("fusion_ms", 0.0), 3) if latency else "",
+                            "docs_retrieved": len(results),
+                        })
+
+
+if __name__ == "__main__":
+    main()
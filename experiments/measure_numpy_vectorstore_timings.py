@@ -0,0 +1,124 @@
+import os
+import time
+import csv
+from dotenv import load_dotenv
+
+import numpy as np
+
+from splitters import split_documents
+from data_loader import load_file
+from embeddings import load_embeddings_model
+from vectorstores import build_vectorstore
+from retrievers import Retriever
+
+load_dotenv()
+
+EXPERIMENTS_DIR = os.path.dirname(__file__)
+OUTPUT_CSV = os.path.join(EXPERIMENTS_DIR, "numpy_vectorstore_timings.csv")
+print(f"Logging NumPy vs FAISS flat timings to: {OUTPUT_CSV}")
+
+# Experiment settings
+QUERY = "List the main topics in this document"
+FILE_PATH = "./data/eu.pdf"
+RUNS = 3                # measured runs per (backend, mode, k)
+WARMUP = True           # perform one warm-up retrieval per (backend, mode, k)
+BATCH_QUERIES = 64      # queries per batched search
+SYNTHETIC_SCALE = 0     # extra noisy copies of every chunk vector for the batched search
+
+# Same k sweep as measure_retriever_timings.py
+K_VALUES = [1, 3, 5, 10, 200]
+
+BACKENDS = {
+    "faiss_flat": dict(name="faiss"),
+    "numpy_float32": dict(name="numpy", numpy_store={"dtype": "float32"}),
+    "numpy_float16": dict(name="numpy", numpy_store={"dtype": "float16"}),
+}
+
+# Load, split and embed once
+docs = load_file(FILE_PATH)
+if not docs:
+    raise ValueError("No documents found!")
+chunks = split_documents(docs, splitter_name="recursive", chunk_size=500, chunk_overlap=50)
+emb_model = load_embeddings_model(provider="huggingface", model_name="sentence-transformers/all-MiniLM-L6-v2")
+
+rng = np.random.default_rng(0)
+vectors = np.asarray(emb_model.embed_documents([c.page_content for c in chunks]), dtype=np.float32)
+if SYNTHETIC_SCALE:
+    noise = rng.normal(scale=0.05, size=(SYNTHETIC_SCALE,) + vectors.shape).astype(np.float32)
+    vectors = np.concatenate([vectors, (vectors[None] + noise).reshape(-1, vectors.shape[1])])
+queries = vectors[rng.choice(len(vectors), BATCH_QUERIES, replace=False)]
+
+
+def measure_retriever(retriever, query):
+    start = time.time()
+    docs = retriever.invoke(query)
+    end = time.time()
+    return round(end - start, 6), len(docs)
+
+
+def batched_search(vs_name, vectorstore):
+    """Return search(queries, k) over the (optionally scaled-up) vectors for one backend."""
+    if vs_name == "faiss_flat":
+        import faiss
+
+        index = faiss.IndexFlatL2(vectors.shape[1])
+        index.add(vectors)
+        return lambda k: index.search(queries, k)
+
+    from numpy_vectorstore import NumpyVectorStore
+
+    store = NumpyVectorStore(emb_model, dtype=vectorstore.dtype.name)
+    store.add_embeddings([""] * len(vectors), vectors)
+    return lambda k: store.search_vectors(queries, k)
+
+
+def main():
+    with open(OUTPUT_CSV, mode="w", newline="") as csvfile:
+        fieldnames = ["vectorstore", "mode", "k", "run", "vectors", "queries", "retrieval_time", "docs_retrieved"]
+        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+        writer.writeheader()
+
+        for vs_name, kwargs in BACKENDS.items():
+            vectorstore = build_vectorstore(chunks=chunks, embeddings_model=emb_model, **kwargs)
+            search = batched_search(vs_name, vectorstore)
+
+            for k in K_VALUES:
+                # Single query through the dense Retriever (query embedding is cached after warm-up)
+                retriever = Retriever(retriever_type="dense", vectorstore=vectorstore, k=k)
+                if WARMUP:
+                    _ = measure_retriever(retriever, QUERY)
+                for run in range(1, RUNS + 1):
+                    retrieval_time, docs_count = measure_retriever(retriever, QUERY)
+                    writer.writerow({
+                        "vectorstore": vs_name,
+                        "mode": "single",
+                        "k": k,
+                        "run": run,
+                        "vectors": len(chunks),
+                        "queries": 1,
+                        "retrieval_time": retrieval_time,
+                        "docs_retrieved": docs_count,
+                    })
+
+                # Batched raw vector search
+                if WARMUP:
+                    search(k)
+                for run in range(1, RUNS + 1):
+                    start = time.time()
+                    rows, _ = search(k)
+                    retrieval_time = round(time.time() - start, 6)
+                    print(f"{vs_name}, k={k}, Run {run}, {BATCH_QUERIES} queries in {retrieval_time}s")
+                    writer.writerow({
+                        "vectorstore": vs_name,
+                        "mode": "batch",
+                        "k": k,
+                        "run": run,
+                        "vectors": len(vectors),
+                        "queries": BATCH_QUERIES,
+                        "retrieval_time": retrieval_time,
+                        "docs_retrieved": int(rows.shape[1]),
+                    })
+
+
+if __name__ == "__main__":
+    main()
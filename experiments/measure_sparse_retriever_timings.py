@@ -0,0 +1,87 @@
+import os
+import time
+import csv
+import tempfile
+from dotenv import load_dotenv
+
+from langchain_community.retrievers import BM25Retriever
+
+from splitters import split_documents
+from data_loader import load_file
+from sparse_index import build_sparse_index, tokenize
+
+load_dotenv()
+
+EXPERIMENTS_DIR = os.path.dirname(__file__)
+OUTPUT_CSV = os.path.join(EXPERIMENTS_DIR, "sparse_retriever_timings.csv")
+print(f"Logging sparse retriever timings to: {OUTPUT_CSV}")
+
+# Experiment settings
+QUERY = "List the main topics in this document"
+FILE_PATH = "./data/eu.pdf"
+RUNS = 3                # measured runs per (retriever, k)
+WARMUP = True           # perform one warm-up query per (retriever, k)
+CORPUS_COPIES = 20      # the chunks repeated (with distinct ids) to get a larger corpus
+
+# Same k sweep as measure_retriever_timings.py
+K_VALUES = [1, 3, 5, 10, 200]
+
+docs = load_file(FILE_PATH)
+if not docs:
+    raise ValueError("No documents found!")
+chunks = split_documents(docs, splitter_name="recursive", chunk_size=500, chunk_overlap=50)
+corpus = [
+    chunk.model_copy(update={"id": f"{copy}:{i}"})
+    for copy in range(CORPUS_COPIES)
+    for i, chunk in enumerate(chunks)
+]
+
+
+def timed(fn):
+    start = time.time()
+    result = fn()
+    return round(time.time() - start, 6), result
+
+
+def main():
+    with tempfile.TemporaryDirectory() as index_dir:
+        # Build times: pure-Python BM25 vs the inverted index (fresh, then reloaded from disk)
+        builds = {
+            "bm25_retriever": lambda: BM25Retriever.from_documents(corpus, preprocess_func=tokenize),
+            "sparse_index": lambda: build_sparse_index(corpus),
+            "sparse_index_saved": lambda: build_sparse_index(corpus, directory=index_dir),
+            "sparse_index_reloaded": lambda: build_sparse_index(corpus, directory=index_dir),
+        }
+        retrievers = {}
+        with open(OUTPUT_CSV, mode="w", newline="") as csvfile:
+            fieldnames = ["retriever", "stage", "k", "run", "chunks", "time", "docs_retrieved"]
+            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+            writer.writeheader()
+
+            for name, build in builds.items():
+                build_time, retrievers[name] = timed(build)
+                print(f"{name}: built over {len(corpus)} chunks in {build_time}s")
+                writer.writerow({
+                    "retriever": name, "stage": "build", "k": "", "run": 1,
+                    "chunks": len(corpus), "time": build_time, "docs_retrieved": "",
+                })
+
+            search = {
+                "bm25_retriever": lambda k: retrievers["bm25_retriever"].model_copy(update={"k": k}).invoke(QUERY),
+                "sparse_index": lambda k: retrievers["sparse_index"].search(QUERY, k=k),
+            }
+            for name, fn in search.items():
+                for k in K_VALUES:
+                    if WARMUP:
+                        fn(k)
+                    for run in range(1, RUNS + 1):
+                        query_time, results = timed(lambda: fn(k))
+                        print(f"{name}, k={k}, Run {run}, {query_time}s")
+                        writer.writerow({
+                            "retriever": name, "stage": "query", "k": k, "run": run,
+                            "chunks": len(corpus), "time": query_time, "docs_retrieved": len(results),
+                        })
+
+
+if __name__ == "__main__":
+    main()
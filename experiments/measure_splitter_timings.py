@@ -0,0 +1,75 @@
+import os
+import time
+import csv
+from dotenv import load_dotenv
+
+from splitters import split_documents
+from data_loader import load_file
+
+load_dotenv()
+
+EXPERIMENTS_DIR = os.path.dirname(__file__)
+OUTPUT_CSV = os.path.join(EXPERIMENTS_DIR, "splitter_timings.csv")
+print(f"Logging splitter timings to: {OUTPUT_CSV}")
+
+# Experiment settings
+FILE_PATH = "./data/eu.pdf"
+REPEAT_CORPUS = 50      # replicate the pages to get a corpus worth timing
+RUNS = 3                # measured runs per splitter
+TOKEN_CHUNK_SIZE = 256
+TOKEN_CHUNK_OVERLAP = 20
+
+# Splitters to compare: LangChain's TokenTextSplitter vs the batched one
+SPLITTERS = ["token", "fast_token"]
+
+# Load documents once
+docs = load_file(FILE_PATH)
+if not docs:
+    raise ValueError("No documents found!")
+corpus = docs * REPEAT_CORPUS
+
+
+def measure_splitter(splitter_name: str):
+    start = time.time()
+    chunks = split_documents(
+        corpus,
+        splitter_name=splitter_name,
+        token_chunk_size=TOKEN_CHUNK_SIZE,
+        token_chunk_overlap=TOKEN_CHUNK_OVERLAP,
+    )
+    end = time.time()
+    return end - start, chunks
+
+
+def main():
+    with open(OUTPUT_CSV, mode="w", newline="") as csvfile:
+        fieldnames = ["splitter", "run", "documents", "chunks", "split_time", "chunks_per_sec"]
+        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+        writer.writeheader()
+
+        reference = None
+        for splitter_name in SPLITTERS:
+            # Warm-up run (loads the tokenizer) and output check against the first splitter
+            _, chunks = measure_splitter(splitter_name)
+            contents = [c.page_content for c in chunks]
+            if reference is None:
+                reference = contents
+            elif contents != reference:
+                print(f"WARNING: {splitter_name} chunks differ from {SPLITTERS[0]}")
+
+            for run in range(1, RUNS + 1):
+                split_time, chunks = measure_splitter(splitter_name)
+                chunks_per_sec = round(len(chunks) / split_time, 1)
+                print(f"{splitter_name}, Run {run}, {len(chunks)} chunks, {split_time:.4f}s, {chunks_per_sec} chunks/s")
+                writer.writerow({
+                    "splitter": splitter_name,
+                    "run": run,
+                    "documents": len(corpus),
+                    "chunks": len(chunks),
+                    "split_time": round(split_time, 4),
+                    "chunks_per_sec": chunks_per_sec,
+                })
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+"""
+bulk_ingest.py
+
+Concurrent bulk ingestion into Chroma, Weaviate and Pinecone.
+
+Chunks are cut into batches. The calling thread embeds one batch at a time
+while a pool of upload workers pushes the previous batches, so embedding of
+batch N+1 overlaps the upload of batch N. At most upload_workers + 1 embedded
+batches are held in memory. A failed upload is retried with exponential
+backoff for that batch only; every write is an upsert by deterministic chunk
+id (see vectorstores.chunk_ids), so a retried batch never duplicates vectors.
+Progress and throughput are reported after every batch.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional
+
+from data_loader import iter_batches
+from vectorstores import _backend_ids, chunk_ids, vectorstore_backend
+
+logger = logging.getLogger(__name__)
+
+BULK_BACKENDS = ("chroma", "weaviate", "pinecone")
+
+
+@dataclass
+class IngestReport:
+    """Progress and throughput of a bulk ingestion."""
+
+    total: Optional[int] = None    # number of chunks, if known upfront
+    chunks: int = 0                # chunks uploaded successfully
+    batches: int = 0               # batches uploaded successfully
+    retries: int = 0               # upload attempts that were retried
+    failed_ids: List[List[str]] = field(default_factory=list)  # chunk ids per batch that gave up
+    embed_seconds: float = 0.0
+    upload_seconds: float = 0.0    # summed over workers
+    elapsed: float = 0.0
+
+    @property
+    def chunks_per_sec(self) -> float:
+        return self.chunks / self.elapsed if self.elapsed else 0.0
+
+    def __str__(self) -> str:
+        done = f"{self.chunks}/{self.total}" if self.total is not None else str(self.chunks)
+        return (
+            f"{done} chunks in {self.batches} batches, {self.chunks_per_sec:.1f} chunks/s "
+            f"(embed {self.embed_seconds:.1f}s, upload {self.upload_seconds:.1f}s), "
+            f"{self.retries} retries, {len(self.failed_ids)} failed batches"
+        )
+
+
+def _log_progress(report: IngestReport):
+    logger.info("Bulk ingest: %s", report)
+
+
+def _make_uploader(vectorstore) -> Callable:
+    """
+    Return upload(ids, texts, metadatas, vectors) writing pre-computed vectors
+    straight through the backend client, bypassing the vectorstore's own embedding.
+    """
+    backend = vectorstore_backend(vectorstore)
+
+    if backend == "chroma":
+        collection = vectorstore._collection
+
+        def upload(ids, texts, metadatas, vectors):
+            # Chroma rejects empty metadata dicts
+            collection.upsert(
+                ids=ids,
+                embeddings=vectors,
+                documents=texts,
+                metadatas=metadatas if any(metadatas) else None,
+            )
+
+    elif backend == "weaviate":
+        client, index_name, text_key = vectorstore._client, vectorstore._index_name, vectorstore._text_key
+
+        def upload(ids, texts, metadatas, vectors):
+            collection = client.collections.get(index_name)
+            with collection.batch.fixed_size(batch_size=len(ids)) as batch:
+                for object_id, text, metadata, vector in zip(ids, texts, metadatas, vectors):
+                    batch.add_object(properties={**metadata, text_key: text}, uuid=object_id, vector=vector)
+            failed = collection.batch.failed_objects
+            if failed:
+                raise RuntimeError(f"{len(failed)} of {len(ids)} objects failed: {failed[0].message}")
+
+    elif backend == "pinecone":
+        index, text_key, namespace = vectorstore._index, vectorstore._text_key, vectorstore._namespace
+
+        def upload(ids, texts, metadatas, vectors):
+            index.upsert(
+                vectors=[
+                    {"id": object_id, "values": vector, "metadata": {**metadata, text_key: text}}
+                    for object_id, text, metadata, vector in zip(ids, texts, metadatas, vectors)
+                ],
+                namespace=namespace,
+            )
+
+    else:
+        raise ValueError(f"Bulk ingestion supports {', '.join(BULK_BACKENDS)}, not {backend}")
+
+    return upload
+
+
+def bulk_ingest(
+    vectorstore,
+    chunks,
+    embeddings_model,
+    batch_size: int = 256,
+    upload_workers: int = 4,
+    max_retries: int = 3,
+    backoff_base: float = 1.0,
+    raise_on_failure: bool = True,
+    progress: Callable[[IngestReport], None] = _log_progress,
+) -> IngestReport:
+    """
+    Embed and upsert chunks into a Chroma, Weaviate or Pinecone vectorstore.
+
+    Args:
+        vectorstore: LangChain Chroma, WeaviateVectorStore or PineconeVectorStore.
+        chunks: List or lazy iterable of chunks (Document.id is used as the chunk id).
+        embeddings_model: Embeddings used for the chunks.
+        batch_size: Chunks per embedding call and per upload request
+            (Pinecone caps requests at 2 MB, roughly 1000 vectors of 384 dims).
+        upload_workers: Batches uploaded in parallel.
+        max_retries: Retries per batch before it is given up.
+        backoff_base: First retry delay in seconds, doubled on every retry.
+        raise_on_failure: Raise RuntimeError at the end if any batch was given up.
+        progress: Called with the running IngestReport after every batch.
+
+    Returns:
+        IngestReport; report.failed_ids lists the chunk ids of batches that were given up.
+    """
+    upload = _make_uploader(vectorstore)
+    backend = vectorstore_backend(vectorstore)
+    report = IngestReport(total=len(chunks) if hasattr(chunks, "__len__") else None)
+    lock = threading.Lock()
+    start = time.perf_counter()
+
+    def upload_batch(ids, texts, metadatas, vectors):
+        for attempt in range(max_retries + 1):
+            upload_start = time.perf_counter()
+            try:
+                upload(_backend_ids(backend, ids), texts, metadatas, vectors)
+            except Exception as e:
+                with lock:
+                    report.upload_seconds += time.perf_counter() - upload_start
+                if attempt == max_retries:
+                    logger.error("Giving up on a batch of %d chunks after %d attempts: %s", len(ids), attempt + 1, e)
+                    with lock:
+                        report.failed_ids.append(ids)
+                    return
+                with lock:
+                    report.retries += 1
+                delay = backoff_base * 2 ** attempt
+                logger.warning("Upload of %d chunks failed (%s); retrying in %.1fs", len(ids), e, delay)
+                time.sleep(delay)
+            else:
+                with lock:
+                    report.upload_seconds += time.perf_counter() - upload_start
+                    report.chunks += len(ids)
+                    report.batches += 1
+                    report.elapsed = time.perf_counter() - start
+                    if progress is not None:
+                        progress(report)
+                return
+
+    with ThreadPoolExecutor(max_workers=upload_workers) as pool:
+        pending = set()
+        for batch in iter_batches(chunks, batch_size):
+            # Repeated ids in one request are rejected by some backends; the last chunk wins
+            latest = dict(zip(chunk_ids(batch), batch))
+            texts = [chunk.page_content for chunk in latest.values()]
+            embed_start = time.perf_counter()
+            vectors = embeddings_model.embed_documents(texts)
+            with lock:
+                report.embed_seconds += time.perf_counter() - embed_start
+
+            while len(pending) >= upload_workers:
+                _, pending = wait(pending, return_when=FIRST_COMPLETED)
+            pending.add(pool.submit(
+                upload_batch, list(latest), texts, [dict(chunk.metadata) for chunk in latest.values()], vectors
+            ))
+        for future in pending:
+            future.result()
+
+    report.elapsed = time.perf_counter() - start
+    logger.info("Bulk ingest finished: %s", report)
+    if raise_on_failure and report.failed_ids:
+        raise RuntimeError(f"Bulk ingest gave up on {len(report.failed_ids)} batches: {report}")
+    return report
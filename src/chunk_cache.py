@@ -0,0 +1,197 @@
+"""
+chunk_cache.py
+
+On-disk cache of split results, shared across runs and RAG architectures.
+
+Entries are keyed by a hash of the document content, the splitter name and all
+splitter parameters, and hold only the chunk texts and their start offsets:
+metadata and chunk ids are rebuilt from the source document on a hit, so the
+same cache serves every loader and every architecture. The cache directory is
+bounded in size; the least recently used entries are evicted first, ordered by
+an access counter kept in an index file (file mtimes are too coarse to order
+rapid accesses).
+"""
+
+import hashlib
+import json
+import logging
+import os
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Evict down to this fraction of max_bytes so eviction does not run on every put
+_EVICT_TARGET = 0.9
+INDEX_FILENAME = "lru_index.json"
+
+
+class ChunkCache:
+    """
+    Size-bounded, content-addressed store of (chunk text, start offset) lists.
+
+    Args:
+        cache_dir: Directory holding the entries (created if missing).
+        max_bytes: Upper bound on the total size of the entries. None disables eviction.
+
+    Attributes:
+        hits, misses: Lookup counters for this instance.
+
+    Access order is saved to the index on eviction and by flush(), which
+    splitters.split_documents calls once per split.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: Optional[int] = 1 << 30):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(cache_dir, exist_ok=True)
+        self._index_path = os.path.join(cache_dir, INDEX_FILENAME)
+        self._clock, self._last_used = self._read_index()
+        self._size = sum(size for _, _, size in self._entries())
+
+    @staticmethod
+    def key(content: str, splitter_kwargs: dict) -> str:
+        """
+        Cache key of a document's content under a splitter configuration.
+        splitter_kwargs must hold every parameter that changes the chunks
+        (parallelism settings such as num_workers should be left out).
+        """
+        payload = json.dumps([content, splitter_kwargs], sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def _entries(self) -> List[Tuple[str, str, int]]:
+        """Return (key, path, size) for every entry on disk."""
+        entries = []
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith(".json") or name == INDEX_FILENAME:
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    size = os.path.getsize(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((name[: -len(".json")], path, size))
+        return entries
+
+    # --- access order -----------------------------------------------------
+
+    def _read_index(self) -> Tuple[int, Dict[str, int]]:
+        """Return (clock, key -> clock value of last access) from the index file."""
+        try:
+            with open(self._index_path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+            return int(index["clock"]), dict(index["last_used"])
+        except (FileNotFoundError, json.JSONDecodeError, KeyError, TypeError, ValueError):
+            return 0, {}
+
+    def _touch(self, key: str):
+        self._clock += 1
+        self._last_used[key] = self._clock
+
+    def flush(self):
+        """Merge this instance's access order into the index file."""
+        clock, last_used = self._read_index()
+        # Other processes may share the directory: keep the latest access of each key
+        for key, used in last_used.items():
+            if used > self._last_used.get(key, 0):
+                self._last_used[key] = used
+        self._clock = max(self._clock, clock)
+        self._write_index()
+
+    def _write_index(self):
+        tmp_path = f"{self._index_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"clock": self._clock, "last_used": self._last_used}, f)
+        os.replace(tmp_path, self._index_path)
+
+    def get(self, key: str) -> Optional[List[Tuple[str, int]]]:
+        """Return the cached [(text, start_index), ...] for key, or None."""
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                chunks = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.misses += 1
+            return None
+        self._touch(key)
+        self.hits += 1
+        return [(text, start) for text, start in chunks]
+
+    def put(self, key: str, chunks: List[Tuple[str, int]]):
+        """Store the chunks of one document and evict old entries if over budget."""
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        payload = json.dumps([[text, start] for text, start in chunks], ensure_ascii=False)
+        previous = os.path.getsize(path) if os.path.exists(path) else 0
+
+        # Write-then-rename so concurrent runs never read a partial entry
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+
+        self._touch(key)
+        self._size += os.path.getsize(path) - previous
+        if self.max_bytes is not None and self._size > self.max_bytes:
+            self._evict()
+
+    def _evict(self):
+        """Delete least recently used entries until the cache is below its target size."""
+        self.flush()
+        # Entries missing from the index (never accessed through it) go first
+        entries = sorted(self._entries(), key=lambda entry: (self._last_used.get(entry[0], 0), entry[0]))
+        # Re-sync with the disk: other processes may share the directory
+        self._size = sum(size for _, _, size in entries)
+        target = self.max_bytes * _EVICT_TARGET
+        for key, path, size in entries:
+            if self._size <= target:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            self._size -= size
+            self.evictions += 1
+        # Drop evicted keys (and keys of entries removed by other processes) from the index
+        kept = {key for key, path, _ in entries if os.path.exists(path)}
+        self._last_used = {key: used for key, used in self._last_used.items() if key in kept}
+        self._write_index()
+        logger.debug("Chunk cache evicted down to %d bytes", self._size)
+
+    def clear(self):
+        """Remove every entry."""
+        for _, path, _ in self._entries():
+            os.remove(path)
+        if os.path.exists(self._index_path):
+            os.remove(self._index_path)
+        self._clock, self._last_used = 0, {}
+        self._size = 0
+
+    def stats(self) -> dict:
+        """Return hit/miss counters and the current size of the cache."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "size_bytes": self._size,
+        }
+
+
+def load_chunk_cache(splitter_cfg: dict) -> Optional[ChunkCache]:
+    """
+    Create the ChunkCache described by the splitter section of config.yaml.
+    Returns None when splitter.cache_dir is not set.
+    """
+    cache_dir = (splitter_cfg or {}).get("cache_dir")
+    if not cache_dir:
+        return None
+    max_mb = splitter_cfg.get("cache_max_mb", 1024)
+    return ChunkCache(cache_dir, max_bytes=int(max_mb * 1024 * 1024) if max_mb else None)
@@ -0,0 +1,265 @@
+"""
+client_pool.py
+
+Process-wide pool of vector database clients (Weaviate, Pinecone).
+
+Every build_vectorstore call used to open its own connection and never close
+it. The pool keeps one client per endpoint and hands it to every vectorstore
+built against that endpoint, reference counted like model_registry.py.
+A pooled client is health-checked when it is acquired (at most once per
+health_check_interval) and replaced by a fresh connection if the check fails.
+Vectorstores already holding the replaced client keep using it; it is closed
+when the last of them releases it. close_all() runs at interpreter exit and
+closes every client.
+"""
+
+import atexit
+import hashlib
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _PooledClient:
+    key: Hashable
+    client: Any
+    connect: Callable[[], Any]
+    health_check: Optional[Callable[[Any], bool]]
+    close: Optional[Callable[[Any], None]]
+    refcount: int = 0
+    last_checked: float = 0.0
+    stale: bool = False  # replaced by a reconnect; closed when its last holder releases it
+
+
+class ClientPool:
+    """
+    Reference-counted, health-checked clients keyed by endpoint.
+
+    Args:
+        health_check_interval: Seconds between health checks of a pooled client
+            (0 checks on every acquire).
+    """
+
+    def __init__(self, health_check_interval: float = 30.0):
+        self.health_check_interval = health_check_interval
+        self._lock = threading.Lock()
+        self._entries: Dict[Hashable, _PooledClient] = {}
+        # Every client not closed yet, current or stale. The entry holds the client,
+        # so its id() cannot be reused by another object while it is mapped here.
+        self._open: Dict[int, _PooledClient] = {}
+        self._connect_locks: Dict[Hashable, threading.Lock] = {}
+        self.connects = 0
+        self.reconnects = 0
+        self.closes = 0
+        self.health_checks = 0
+
+    def acquire(
+        self,
+        key: Hashable,
+        connect: Callable[[], Any],
+        health_check: Callable[[Any], bool] = None,
+        close: Callable[[Any], None] = None,
+    ) -> Any:
+        """
+        Return the client pooled under key, connecting with connect() on first use.
+
+        health_check(client) returns False (or raises) for a dead connection,
+        which is then replaced by connect(). The replaced client is closed with
+        close(client) once every holder has released it.
+        """
+        with self._lock:
+            connect_lock = self._connect_locks.setdefault(key, threading.Lock())
+
+        # Serialize connect/health check per endpoint; other endpoints proceed in parallel
+        with connect_lock:
+            with self._lock:
+                entry = self._entries.get(key)
+            if entry is None:
+                logger.info("Connecting %s", key)
+                entry = _PooledClient(key, connect(), connect, health_check, close, last_checked=time.monotonic())
+                with self._lock:
+                    self._entries[key] = entry
+                    self._open[id(entry.client)] = entry
+                    self.connects += 1
+            elif not self._healthy(entry):
+                entry = self._reconnect(entry)
+            with self._lock:
+                entry.refcount += 1
+                return entry.client
+
+    def _healthy(self, entry: _PooledClient, force: bool = False) -> bool:
+        if entry.health_check is None:
+            return True
+        now = time.monotonic()
+        if not force and now - entry.last_checked < self.health_check_interval:
+            return True
+        entry.last_checked = now
+        self.health_checks += 1
+        try:
+            return bool(entry.health_check(entry.client))
+        except Exception as e:
+            logger.warning("Health check failed: %s", e)
+            return False
+
+    def _reconnect(self, entry: _PooledClient) -> _PooledClient:
+        """Replace entry by a fresh connection; the old client lives on until its holders release it."""
+        logger.warning("Reconnecting %s", entry.key)
+        fresh = _PooledClient(
+            entry.key, entry.connect(), entry.connect, entry.health_check, entry.close, last_checked=time.monotonic()
+        )
+        with self._lock:
+            self._entries[entry.key] = fresh
+            self._open[id(fresh.client)] = fresh
+            entry.stale = True
+            unused = entry.refcount == 0
+            if unused:
+                self._open.pop(id(entry.client), None)
+            self.reconnects += 1
+        if unused:
+            self._close_client(entry)
+        return fresh
+
+    def _close_client(self, entry: _PooledClient):
+        if entry.close is None:
+            return
+        try:
+            entry.close(entry.client)
+        except Exception as e:
+            logger.warning("Error closing client: %s", e)
+        self.closes += 1
+
+    def check_health(self) -> Dict[Hashable, bool]:
+        """Health-check every pooled client now, reconnecting the unhealthy ones."""
+        with self._lock:
+            keys = list(self._entries)
+        results = {}
+        for key in keys:
+            with self._connect_locks[key]:
+                entry = self._entries.get(key)
+                if entry is None:
+                    continue
+                results[key] = self._healthy(entry, force=True)
+                if not results[key]:
+                    self._reconnect(entry)
+        return results
+
+    def release(self, client: Any, close: bool = False):
+        """
+        Drop one reference to a client from acquire(); close it when unused if
+        close. A client replaced by a reconnect is always closed when unused.
+        """
+        with self._lock:
+            entry = self._open.get(id(client))
+            if entry is None or entry.client is not client:
+                return
+            entry.refcount = max(0, entry.refcount - 1)
+            if entry.refcount or not (close or entry.stale):
+                return
+            self._open.pop(id(client))
+            if not entry.stale:
+                self._entries.pop(entry.key)
+        self._close_client(entry)
+
+    def close_all(self):
+        """Close every pooled client, regardless of references (shutdown)."""
+        with self._lock:
+            entries = list(self._open.values())
+            self._entries.clear()
+            self._open.clear()
+        for entry in entries:
+            self._close_client(entry)
+        if entries:
+            logger.info("Closed %d pooled clients", len(entries))
+
+    def stats(self) -> dict:
+        """Open connections, their reference counts and lifetime connect/reconnect/close counts."""
+        with self._lock:
+            return {
+                "open": len(self._open),
+                "in_use": sum(1 for entry in self._open.values() if entry.refcount),
+                "clients": {key: entry.refcount for key, entry in self._entries.items()},
+                "stale": sum(1 for entry in self._open.values() if entry.stale),
+                "connects": self.connects,
+                "reconnects": self.reconnects,
+                "closes": self.closes,
+                "health_checks": self.health_checks,
+            }
+
+
+_pool = ClientPool()
+atexit.register(_pool.close_all)
+
+
+def get_client_pool() -> ClientPool:
+    """The pool shared by the whole process."""
+    return _pool
+
+
+def _secret_key(secret: Optional[str]) -> str:
+    """Short hash identifying an API key in pool keys and metrics without exposing it."""
+    return hashlib.sha256((secret or "").encode("utf-8")).hexdigest()[:12]
+
+
+def acquire_weaviate_client(host: str = "localhost", port: int = 8080, grpc_port: int = 50051):
+    """Pooled weaviate.connect_to_local client for one endpoint."""
+
+    def connect():
+        import weaviate
+
+        return weaviate.connect_to_local(host=host, port=port, grpc_port=grpc_port)
+
+    return get_client_pool().acquire(
+        ("weaviate", host, port, grpc_port),
+        connect,
+        health_check=lambda client: client.is_ready(),
+        close=lambda client: client.close(),
+    )
+
+
+def acquire_pinecone_client(api_key: str):
+    """Pooled Pinecone client for one API key."""
+
+    def connect():
+        from pinecone import Pinecone
+
+        return Pinecone(api_key=api_key)
+
+    return get_client_pool().acquire(
+        ("pinecone", _secret_key(api_key)),
+        connect,
+        health_check=lambda client: client.list_indexes() is not None,
+    )
+
+
+def acquire_pinecone_index(index_name: str, api_key: str, create: Callable[[Any], None] = None):
+    """
+    Pooled Pinecone Index handle (it keeps its own HTTP connection pool).
+
+    create(pinecone_client) runs once, before the first handle is opened,
+    e.g. to create the index if it does not exist.
+    """
+
+    def connect():
+        client = acquire_pinecone_client(api_key)
+        try:
+            if create is not None:
+                create(client)
+            return client.Index(index_name)
+        finally:
+            get_client_pool().release(client)
+
+    def close(index):
+        if hasattr(index, "close"):
+            index.close()
+
+    return get_client_pool().acquire(
+        ("pinecone_index", _secret_key(api_key), index_name),
+        connect,
+        health_check=lambda index: index.describe_index_stats() is not None,
+        close=close,
+    )
@@ -1,7 +1,12 @@
 import os
 import json
+import hashlib
+import logging
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
 from pathlib import Path
-from typing import List
+from typing import Iterable, Iterator, List, Optional, Tuple
 
 from langchain_community.document_loaders import (
     PyPDFLoader,
@@ -13,11 +18,122 @@ from langchain_community.document_loaders import (
 
 from langchain.schema import Document
 
+logger = logging.getLogger(__name__)
 
-def load_pdf(path: str) -> List[Document]:
-    """Load a PDF file into LangChain Documents."""
-    loader = PyPDFLoader(path)
-    return loader.load()
+SUPPORTED_EXTENSIONS = {
+    ".pdf", ".txt", ".docx", ".md", ".markdown", ".html", ".htm", ".json", ".jsonl", ".ndjson",
+}
+
+
+def hash_file(path: str, block_size: int = 1 << 20) -> str:
+    """Return the SHA-256 hex digest of a file's content."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while block := f.read(block_size):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _extract_pdf_pages(path: str, start: int, end: int) -> List[Tuple[int, str, str]]:
+    """Extract (page_number, text, page_label) for pages [start, end) of a PDF."""
+    from pypdf import PdfReader
+
+    reader = PdfReader(path)
+    labels = reader.page_labels
+    return [
+        (i, reader.pages[i].extract_text(extraction_mode="plain").strip(), labels[i])
+        for i in range(start, end)
+    ]
+
+
+def _write_json_atomic(path: str, obj):
+    """Write-then-rename so concurrent loads never read a partial cache file."""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(obj, f)
+    os.replace(tmp_path, path)
+
+
+def load_pdf(path: str, num_workers: int = 1, cache_dir: str = None) -> List[Document]:
+    """
+    Load a PDF file into LangChain Documents (one per page).
+
+    Args:
+        path: PDF file path.
+        num_workers: Worker processes that extract disjoint page ranges.
+            1 loads sequentially, None uses all available CPU cores.
+        cache_dir: Optional directory caching extracted page text, keyed by file
+            content hash and page number, so re-loading an unchanged PDF skips extraction.
+
+    Returns:
+        List[Document]: Pages with the same metadata PyPDFLoader produces.
+    """
+    num_workers = num_workers or os.cpu_count() or 1
+    if num_workers <= 1 and not cache_dir:
+        loader = PyPDFLoader(path)
+        return loader.load()
+
+    page_dir = os.path.join(cache_dir, hash_file(path)) if cache_dir else None
+    meta_path = os.path.join(page_dir, "metadata.json") if page_dir else None
+
+    if meta_path and os.path.exists(meta_path):
+        with open(meta_path, "r", encoding="utf-8") as f:
+            doc_metadata = json.load(f)
+    else:
+        # Document-level metadata exactly as PyPDFLoader builds it (costs one page)
+        first_page = next(PyPDFLoader(path).lazy_load(), None)
+        if first_page is None:
+            return []  # No pages, as PyPDFLoader.load() returns
+        doc_metadata = {
+            k: v for k, v in first_page.metadata.items() if k not in ("page", "page_label")
+        }
+    doc_metadata["source"] = path
+    total_pages = doc_metadata["total_pages"]
+
+    pages = {}
+    if page_dir and os.path.isdir(page_dir):
+        for i in range(total_pages):
+            page_path = os.path.join(page_dir, f"{i}.json")
+            if os.path.exists(page_path):
+                with open(page_path, "r", encoding="utf-8") as f:
+                    cached = json.load(f)
+                pages[i] = (cached["text"], cached["page_label"])
+
+    missing = [i for i in range(total_pages) if i not in pages]
+    if missing:
+        # Contiguous ranges of uncached pages, split evenly across workers
+        ranges = []
+        for i in missing:
+            if ranges and ranges[-1][1] == i:
+                ranges[-1][1] = i + 1
+            else:
+                ranges.append([i, i + 1])
+        step = max(1, -(-len(missing) // num_workers))
+        tasks = [(a, min(a + step, b)) for a, b in ranges for a in range(a, b, step)]
+
+        if num_workers > 1 and len(tasks) > 1:
+            with ProcessPoolExecutor(max_workers=min(num_workers, len(tasks))) as executor:
+                futures = [executor.submit(_extract_pdf_pages, path, a, b) for a, b in tasks]
+                extracted = [page for future in futures for page in future.result()]
+        else:
+            extracted = [page for a, b in tasks for page in _extract_pdf_pages(path, a, b)]
+
+        if page_dir:
+            os.makedirs(page_dir, exist_ok=True)
+        for i, text, label in extracted:
+            pages[i] = (text, label)
+            if page_dir:
+                _write_json_atomic(os.path.join(page_dir, f"{i}.json"), {"text": text, "page_label": label})
+        if meta_path and not os.path.exists(meta_path):
+            _write_json_atomic(meta_path, doc_metadata)
+
+    return [
+        Document(
+            page_content=pages[i][0],
+            metadata={**doc_metadata, "page": i, "page_label": pages[i][1]},
+        )
+        for i in range(total_pages)
+    ]
 
 
 def load_txt(path: str, encoding: str = "utf-8") -> List[Document]:
@@ -44,34 +160,151 @@ def load_html(path: str) -> List[Document]:
     return loader.load()
 
 
-def load_json(path: str, text_field: str = None) -> List[Document]:
+_JSON_DECODER = json.JSONDecoder()
+_JSON_WHITESPACE = " \t\n\r"
+
+
+def _iter_json_values(f, read_size: int = 1 << 16) -> Iterator:
+    """
+    Incrementally yield the entries of a JSON file.
+
+    A top-level array is parsed item by item from a sliding buffer, so memory is
+    bounded by the largest single entry. Any other top-level value (e.g. a dict)
+    is parsed whole and yielded once.
+    """
+    buffer = f.read(read_size).lstrip(_JSON_WHITESPACE)
+    while not buffer:
+        chunk = f.read(read_size)
+        if not chunk:
+            return  # empty file
+        buffer = chunk.lstrip(_JSON_WHITESPACE)
+    pos = 0
+    if buffer[pos] != "[":
+        yield json.loads(buffer[pos:] + f.read())
+        return
+
+    pos += 1
+    eof = False
+    while True:
+        # Skip separators between items
+        while pos < len(buffer) and buffer[pos] in _JSON_WHITESPACE + ",":
+            pos += 1
+        if pos < len(buffer) and buffer[pos] == "]":
+            return
+
+        try:
+            value, end = _JSON_DECODER.raw_decode(buffer, pos)
+            # A value ending exactly at the buffer edge may be a truncated number
+            complete = end < len(buffer) or eof
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            complete = False
+
+        if complete:
+            yield value
+            pos = end
+            continue
+
+        more = f.read(max(read_size, len(buffer) - pos))
+        eof = not more
+        if pos > len(buffer) // 2:
+            buffer, pos = buffer[pos:], 0  # drop consumed items
+        buffer += more
+        if eof and pos >= len(buffer):
+            raise ValueError("Unterminated JSON array")
+
+
+def _json_entry_to_document(
+    entry, path: str, text_field: str = None, metadata_fields: List[str] = None
+) -> Document:
+    """
+    Wrap one JSON entry into a Document.
+    metadata_fields are copied into metadata as-is and left out of the content.
+    """
+    metadata = {"source": path}
+    if isinstance(entry, dict):
+        if metadata_fields:
+            metadata.update({key: entry[key] for key in metadata_fields if key in entry})
+        if text_field and text_field in entry:
+            return Document(page_content=entry[text_field], metadata=metadata)
+        if metadata_fields:
+            entry = {key: value for key, value in entry.items() if key not in metadata_fields}
+    return Document(page_content=json.dumps(entry, ensure_ascii=False), metadata=metadata)
+
+
+def iter_json(
+    path: str,
+    text_field: str = None,
+    batch_size: int = None,
+    metadata_fields: List[str] = None,
+) -> Iterator:
+    """
+    Lazily yield Documents from a JSON file, one entry at a time
+    (or lists of up to batch_size Documents when batch_size is set).
+    Top-level arrays are parsed incrementally, so memory stays constant in file size.
+    If text_field is provided, use that field for content.
+    Otherwise, dumps entire JSON entry as string.
+    metadata_fields are kept as Document metadata instead of being serialized.
+    """
+    def _documents() -> Iterator[Document]:
+        with open(path, "r", encoding="utf-8") as f:
+            for entry in _iter_json_values(f):
+                yield _json_entry_to_document(entry, path, text_field, metadata_fields)
+
+    if batch_size:
+        yield from iter_batches(_documents(), batch_size)
+    else:
+        yield from _documents()
+
+
+def load_json(path: str, text_field: str = None, metadata_fields: List[str] = None) -> List[Document]:
     """
     Load JSON file into Documents.
     If text_field is provided, use that field for content.
     Otherwise, dumps entire JSON entry as string.
     """
-    docs = []
-    with open(path, "r", encoding="utf-8") as f:
-        data = json.load(f)
+    return list(iter_json(path, text_field=text_field, metadata_fields=metadata_fields))
 
-    if isinstance(data, dict):
-        data = [data]  # wrap single dict into list
 
-    for entry in data:
-        if text_field and text_field in entry:
-            content = entry[text_field]
-        else:
-            content = json.dumps(entry, ensure_ascii=False)
-        docs.append(Document(page_content=content, metadata={"source": path}))
-    return docs
+def iter_jsonl(
+    path: str,
+    text_field: str = None,
+    batch_size: int = None,
+    metadata_fields: List[str] = None,
+) -> Iterator:
+    """
+    Lazily yield Documents from a JSON Lines file (one JSON entry per line).
+    Arguments behave as in iter_json; blank lines are skipped.
+    """
+    def _documents() -> Iterator[Document]:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    yield _json_entry_to_document(entry, path, text_field, metadata_fields)
+
+    if batch_size:
+        yield from iter_batches(_documents(), batch_size)
+    else:
+        yield from _documents()
+
+
+def load_jsonl(path: str, text_field: str = None, metadata_fields: List[str] = None) -> List[Document]:
+    """Load a JSON Lines file into Documents (see iter_jsonl)."""
+    return list(iter_jsonl(path, text_field=text_field, metadata_fields=metadata_fields))
 
 
-def load_file(path: str) -> List[Document]:
-    """Generic loader that dispatches based on file extension."""
+def load_file(path: str, num_workers: int = 1, pdf_cache_dir: str = None) -> List[Document]:
+    """
+    Generic loader that dispatches based on file extension.
+
+    num_workers and pdf_cache_dir only apply to PDFs (see load_pdf).
+    """
     ext = Path(path).suffix.lower()
 
     if ext == ".pdf":
-        return load_pdf(path)
+        return load_pdf(path, num_workers=num_workers, cache_dir=pdf_cache_dir)
     elif ext == ".txt":
         return load_txt(path)
     elif ext == ".docx":
@@ -82,37 +315,181 @@ def load_file(path: str) -> List[Document]:
         return load_html(path)
     elif ext == ".json":
         return load_json(path)
+    elif ext in [".jsonl", ".ndjson"]:
+        return load_jsonl(path)
     else:
         raise ValueError(f"Unsupported file type: {ext}")
 
 
-def load_directory(directory: str, recursive: bool = True) -> List[Document]:
+def _list_files(directory: str, recursive: bool = True) -> List[str]:
+    """Collect supported file paths under a directory in a stable, sorted order."""
+    paths = []
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        for file in sorted(files):
+            if Path(file).suffix.lower() in SUPPORTED_EXTENSIONS:
+                paths.append(os.path.join(root, file))
+        if not recursive:
+            break
+    return paths
+
+
+def _load_file_safe(
+    path: str, pdf_cache_dir: str = None, num_workers: int = 1
+) -> Tuple[List[Document], Optional[str]]:
+    """Load a single file, returning (documents, error) instead of raising."""
+    try:
+        return load_file(path, num_workers=num_workers, pdf_cache_dir=pdf_cache_dir), None
+    except Exception as e:
+        return [], f"{type(e).__name__}: {e}"
+
+
+def iter_batches(items: Iterable, batch_size: int) -> Iterator[list]:
+    """Group any iterable into lists of at most batch_size items."""
+    if batch_size < 1:
+        raise ValueError("batch_size must be >= 1")
+    iterator = iter(items)
+    while batch := list(islice(iterator, batch_size)):
+        yield batch
+
+
+def _iter_loaded_files(
+    paths: List[str], num_workers: int, pdf_cache_dir: str = None
+) -> Iterator[Tuple[List[Document], Optional[str]]]:
     """
-    Load all supported files from a directory.
+    Yield (documents, error) per path in input order.
+    With several workers only a bounded window of files is in flight at once,
+    so parsed documents never pile up faster than the consumer reads them.
+    With fewer files than workers, the spare workers extract the pages of
+    each PDF in parallel (see load_pdf).
+    """
+    file_workers = max(1, num_workers // max(1, len(paths)))
+    if num_workers <= 1 or len(paths) <= 1:
+        for path in paths:
+            yield _load_file_safe(path, pdf_cache_dir, file_workers)
+        return
+
+    window = num_workers * 2
+    with ProcessPoolExecutor(max_workers=min(num_workers, len(paths))) as executor:
+        pending = deque()
+        for path in paths:
+            pending.append(executor.submit(_load_file_safe, path, pdf_cache_dir, file_workers))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def iter_directory(
+    directory: str,
+    recursive: bool = True,
+    num_workers: int = 1,
+    raise_on_error: bool = False,
+    batch_size: int = None,
+    pdf_cache_dir: str = None,
+) -> Iterator:
     """
-    documents = []
-    for root, _, files in os.walk(directory):
-        for file in files:
-            path = os.path.join(root, file)
-            try:
-                docs = load_file(path)
-                documents.extend(docs)
-            except ValueError:
-                # Skip unsupported file types
+    Lazily load all supported files from a directory.
+
+    Args:
+        directory: Root directory to scan.
+        recursive: Whether to descend into subdirectories.
+        num_workers: Number of worker processes used to parse files; with fewer
+            files than workers, the rest extract PDF pages in parallel.
+            1 loads sequentially, None uses all available CPU cores.
+        raise_on_error: Raise on the first file that fails to load instead of
+            logging it and continuing.
+        batch_size: If set, yield lists of up to batch_size Documents
+            instead of single Documents.
+        pdf_cache_dir: Optional page text cache for PDFs (see load_pdf).
+
+    Yields:
+        Document (or List[Document] when batch_size is set), in sorted file path order.
+    """
+    paths = _list_files(directory, recursive=recursive)
+    num_workers = num_workers or os.cpu_count() or 1
+
+    def _documents() -> Iterator[Document]:
+        failures = 0
+        for path, (docs, error) in zip(paths, _iter_loaded_files(paths, num_workers, pdf_cache_dir)):
+            if error is not None:
+                if raise_on_error:
+                    raise RuntimeError(f"Failed to load {path}: {error}")
+                failures += 1
+                logger.warning("Failed to load %s: %s", path, error)
                 continue
-        if not recursive:
-            break
-    return documents
+            yield from docs
 
-def load_hf_dataset(
+        if failures:
+            logger.warning("Skipped %d of %d files in %s", failures, len(paths), directory)
+
+    if batch_size:
+        yield from iter_batches(_documents(), batch_size)
+    else:
+        yield from _documents()
+
+
+def load_directory(
+    directory: str,
+    recursive: bool = True,
+    num_workers: int = 1,
+    raise_on_error: bool = False,
+    pdf_cache_dir: str = None,
+) -> List[Document]:
+    """
+    Load all supported files from a directory.
+
+    Args:
+        directory: Root directory to scan.
+        recursive: Whether to descend into subdirectories.
+        num_workers: Number of worker processes used to parse files; with fewer
+            files than workers, the rest extract PDF pages in parallel.
+            1 loads sequentially, None uses all available CPU cores.
+        raise_on_error: Raise on the first file that fails to load instead of
+            logging it and continuing.
+        pdf_cache_dir: Optional page text cache for PDFs (see load_pdf).
+
+    Returns:
+        List[Document]: Documents in sorted file path order, regardless of num_workers.
+    """
+    return list(
+        iter_directory(
+            directory,
+            recursive=recursive,
+            num_workers=num_workers,
+            raise_on_error=raise_on_error,
+            pdf_cache_dir=pdf_cache_dir,
+        )
+    )
+
+
+def _shard_range(total: int, num_shards: int, shard_index: int) -> Tuple[int, int]:
+    """Return the [start, end) row range of one contiguous shard."""
+    if not 0 <= shard_index < num_shards:
+        raise ValueError(f"shard_index must be in [0, {num_shards}), got {shard_index}")
+    base, extra = divmod(total, num_shards)
+    start = shard_index * base + min(shard_index, extra)
+    end = start + base + (1 if shard_index < extra else 0)
+    return start, end
+
+
+def iter_hf_dataset(
     dataset_name: str,
     split: str = "train",
     limit: int = None,
     text_field: str = "text",
     id_field: str = "id",
-) -> list:
+    batch_size: int = None,
+    streaming: bool = False,
+    num_shards: int = 1,
+    shard_index: int = 0,
+    **load_kwargs,
+) -> Iterator:
     """
-    Load a HuggingFace dataset and wrap entries into LangChain Document objects.
+    Lazily wrap entries of a HuggingFace dataset into LangChain Document objects.
+
+    Rows are read as Arrow column batches (only text_field and id_field), so no
+    per-row Python dicts of unused columns are ever built.
 
     Args:
         dataset_name (str): Name of the dataset on HuggingFace hub.
@@ -120,38 +497,107 @@ def load_hf_dataset(
         limit (int, optional): Limit number of samples (download only part).
         text_field (str): Column containing the main text.
         id_field (str): Column to use as unique identifier (or auto-generate).
-
-    Returns:
-        list[Document]: List of LangChain Document objects.
+        batch_size (int, optional): If set, yield lists of up to batch_size Documents.
+        streaming (bool): Stream rows from the hub instead of downloading the split.
+        num_shards (int): Split the rows into this many contiguous index ranges.
+        shard_index (int): Which index range this worker reads.
+        **load_kwargs: Extra arguments for datasets.load_dataset (e.g. data_files).
+
+    Yields:
+        Document (or List[Document] when batch_size is set).
     """
     from datasets import load_dataset
-    from langchain.schema import Document
 
-    # Use HuggingFace slicing if limit is set
-    if limit:
-        split = f"{split}[:{limit}]"
+    if streaming:
+        dataset = load_dataset(dataset_name, split=split, streaming=True, **load_kwargs)
+        if limit:
+            total = limit
+        else:
+            split_info = (dataset.info.splits or {}).get(split)
+            total = split_info.num_examples if split_info else None
+    else:
+        # Use HuggingFace slicing if limit is set
+        dataset = load_dataset(
+            dataset_name, split=f"{split}[:{limit}]" if limit else split, **load_kwargs
+        )
+        total = len(dataset)
+
+    if num_shards > 1:
+        if total is None:
+            raise ValueError("Sharding a streamed dataset requires limit or a known split size.")
+        start, end = _shard_range(total, num_shards, shard_index)
+    else:
+        start, end = 0, total
 
-    dataset = load_dataset(dataset_name, split=split)
+    if streaming:
+        dataset = dataset.skip(start) if start else dataset
+        dataset = dataset.take(end - start) if end is not None else dataset
+    else:
+        dataset = dataset.select(range(start, end))
 
-    documents = []
-    for i, entry in enumerate(dataset):
-        # Check for the text field
-        if text_field not in entry:
+    # Check for the text field
+    columns = dataset.column_names
+    if columns is not None:
+        if text_field not in columns:
             raise KeyError(
-                f"Text field '{text_field}' not found in dataset columns: {dataset.column_names}"
+                f"Text field '{text_field}' not found in dataset columns: {columns}"
             )
+        dataset = dataset.select_columns([c for c in (text_field, id_field) if c in columns])
+
+    def _document_batches() -> Iterator[List[Document]]:
+        row = start
+        for batch in dataset.iter(batch_size=batch_size or 1000):
+            if text_field not in batch:
+                raise KeyError(
+                    f"Text field '{text_field}' not found in dataset columns: {list(batch)}"
+                )
+            texts = batch[text_field]
+            # Use id_field if present, otherwise auto-generate
+            ids = batch.get(id_field) or [
+                f"{dataset_name}_{split}_{i}" for i in range(row, row + len(texts))
+            ]
+            row += len(texts)
+            yield [
+                Document(page_content=text, metadata={id_field: doc_id})
+                for text, doc_id in zip(texts, ids)
+            ]
+
+    if batch_size:
+        yield from _document_batches()
+    else:
+        for batch in _document_batches():
+            yield from batch
 
-        # Use id_field if present, otherwise auto-generate
-        if id_field in entry:
-            doc_id = entry[id_field]
-        else:
-            doc_id = f"{dataset_name}_{split}_{i}"
-
-        documents.append(
-            Document(page_content=entry[text_field], metadata={id_field: doc_id})
-        )
-
-    return documents
 
+def load_hf_dataset(
+    dataset_name: str,
+    split: str = "train",
+    limit: int = None,
+    text_field: str = "text",
+    id_field: str = "id",
+    **kwargs,
+) -> list:
+    """
+    Load a HuggingFace dataset and wrap entries into LangChain Document objects.
 
+    Args:
+        dataset_name (str): Name of the dataset on HuggingFace hub.
+        split (str): Split to load (e.g., "train", "test").
+        limit (int, optional): Limit number of samples (download only part).
+        text_field (str): Column containing the main text.
+        id_field (str): Column to use as unique identifier (or auto-generate).
+        **kwargs: Streaming/sharding options and load_dataset arguments (see iter_hf_dataset).
 
+    Returns:
+        list[Document]: List of LangChain Document objects.
+    """
+    return list(
+        iter_hf_dataset(
+            dataset_name,
+            split=split,
+            limit=limit,
+            text_field=text_field,
+            id_field=id_field,
+            **kwargs,
+        )
+    )
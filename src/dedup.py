@@ -0,0 +1,230 @@
+"""
+dedup.py
+
+Exact and near-duplicate chunk removal between splitting and embedding.
+
+Exact duplicates are found by hashing normalized chunk text. Near-duplicates
+(boilerplate headers/footers, repeated legal clauses with small edits) are found
+with MinHash signatures over word shingles and banded locality-sensitive hashing,
+so only candidate pairs sharing a band are compared. The first occurrence of each
+group is kept; every dropped chunk is recorded against the chunk that replaced it
+so provenance (source, page, ...) is not lost.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from langchain.schema import Document
+
+logger = logging.getLogger(__name__)
+
+# Largest Mersenne prime below 2**64; with 32-bit hashes and coefficients the
+# products a * h + b fit in uint64, so the permutations are exact
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """Lower-case and collapse whitespace so trivial formatting differences do not matter."""
+    return _WHITESPACE_RE.sub(" ", text).strip().lower()
+
+
+def _shingle_hashes(text: str, shingle_size: int) -> np.ndarray:
+    """32-bit hashes of the word n-grams of a normalized text."""
+    words = text.split(" ")
+    if len(words) <= shingle_size:
+        shingles = {text}
+    else:
+        shingles = {" ".join(words[i:i + shingle_size]) for i in range(len(words) - shingle_size + 1)}
+    return np.fromiter(
+        (int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest(), "little") for s in shingles),
+        dtype=np.uint64,
+        count=len(shingles),
+    )
+
+
+def _lsh_params(threshold: float, num_perm: int) -> Tuple[int, int]:
+    """
+    Pick (bands, rows) with bands * rows <= num_perm whose S-curve midpoint
+    (1 / bands) ** (1 / rows) is closest to the similarity threshold.
+    """
+    best = None
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        error = abs((1.0 / bands) ** (1.0 / rows) - threshold)
+        if best is None or error < best[0]:
+            best = (error, bands, rows)
+    return best[1], best[2]
+
+
+class MinHasher:
+    """
+    MinHash signatures over word shingles.
+
+    Args:
+        num_perm: Number of hash permutations (signature length).
+        shingle_size: Words per shingle.
+        seed: Seed of the permutation coefficients; signatures are only
+            comparable between hashers with the same seed and num_perm.
+    """
+
+    def __init__(self, num_perm: int = 128, shingle_size: int = 5, seed: int = 1):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, 1 << 32, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, 1 << 32, size=num_perm, dtype=np.uint64)
+
+    def signature(self, normalized_text: str) -> np.ndarray:
+        hashes = _shingle_hashes(normalized_text, self.shingle_size)
+        # (shingles, num_perm) permuted hashes, minimum per permutation
+        permuted = (np.outer(hashes, self._a) + self._b) % _MERSENNE_PRIME & _MAX_HASH
+        return permuted.min(axis=0)
+
+
+@dataclass
+class DedupResult:
+    """
+    Outcome of deduplicate_chunks.
+
+    Attributes:
+        chunks: Kept chunks, in input order.
+        duplicates: Kept chunk id -> chunks dropped in its favour (with their metadata).
+        exact_dropped: Number of chunks dropped as exact duplicates.
+        near_dropped: Number of chunks dropped as near-duplicates.
+    """
+
+    chunks: List[Document]
+    duplicates: Dict[str, List[Document]] = field(default_factory=dict)
+    exact_dropped: int = 0
+    near_dropped: int = 0
+
+    @property
+    def dropped(self) -> int:
+        return self.exact_dropped + self.near_dropped
+
+    def provenance(self) -> Dict[str, List[dict]]:
+        """Kept chunk id -> id and metadata of every chunk it replaced (JSON-serializable)."""
+        return {
+            kept_id: [{"id": doc.id, "metadata": doc.metadata} for doc in dropped]
+            for kept_id, dropped in self.duplicates.items()
+        }
+
+    def save_provenance(self, path: str):
+        """Write the provenance mapping to a JSON file."""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.provenance(), f, ensure_ascii=False, indent=2, default=str)
+
+    def __str__(self) -> str:
+        kept = len(self.chunks)
+        return (
+            f"{self.dropped} of {kept + self.dropped} chunks dropped "
+            f"({self.exact_dropped} exact, {self.near_dropped} near-duplicate)"
+        )
+
+
+def deduplicate_chunks(
+    chunks: List[Document],
+    exact: bool = True,
+    near: bool = True,
+    threshold: float = 0.85,
+    num_perm: int = 128,
+    shingle_size: int = 5,
+    seed: int = 1,
+) -> DedupResult:
+    """
+    Drop exact and near-duplicate chunks, keeping the first occurrence.
+
+    Args:
+        chunks: Chunks as returned by splitters.split_documents.
+        exact: Drop chunks whose normalized text is identical to an earlier one.
+        near: Drop chunks whose estimated Jaccard similarity (over word shingles)
+            with an earlier kept chunk is at least threshold.
+        threshold: Near-duplicate similarity threshold in [0, 1].
+        num_perm: MinHash signature length; higher is more accurate and slower.
+        shingle_size: Words per shingle.
+        seed: Seed of the MinHash permutations.
+
+    Returns:
+        DedupResult: Kept chunks, counts and the provenance of dropped chunks.
+    """
+    result = DedupResult(chunks=[])
+    kept_ids: List[str] = []
+    exact_seen: Dict[str, int] = {}  # text digest -> index of the kept chunk
+
+    if near:
+        hasher = MinHasher(num_perm=num_perm, shingle_size=shingle_size, seed=seed)
+        bands, rows = _lsh_params(threshold, num_perm)
+        buckets = [defaultdict(list) for _ in range(bands)]
+        signatures: List[np.ndarray] = []
+
+    for position, chunk in enumerate(chunks):
+        text = normalize_text(chunk.page_content)
+        kept_index: Optional[int] = None
+
+        if exact:
+            digest = hashlib.sha1(text.encode("utf-8")).hexdigest()
+            kept_index = exact_seen.get(digest)
+            if kept_index is not None:
+                result.exact_dropped += 1
+
+        if kept_index is None and near:
+            signature = hasher.signature(text)
+            band_keys = [signature[i * rows:(i + 1) * rows].tobytes() for i in range(bands)]
+            candidates = {idx for band, key in zip(buckets, band_keys) for idx in band.get(key, ())}
+            for idx in sorted(candidates):
+                if np.mean(signatures[idx] == signature) >= threshold:
+                    kept_index = idx
+                    result.near_dropped += 1
+                    break
+            else:
+                for band, key in zip(buckets, band_keys):
+                    band[key].append(len(result.chunks))
+                signatures.append(signature)
+
+        if kept_index is None:
+            kept_index = len(result.chunks)
+            result.chunks.append(chunk)
+            kept_ids.append(chunk.id if chunk.id is not None else str(position))
+        else:
+            result.duplicates.setdefault(kept_ids[kept_index], []).append(chunk)
+        if exact:
+            exact_seen.setdefault(digest, kept_index)
+
+    return result
+
+
+def apply_dedup(chunks: List[Document], dedup_cfg: dict) -> List[Document]:
+    """
+    Run deduplicate_chunks as configured by the dedup section of config.yaml.
+
+    Returns the chunks unchanged when dedup.enabled is false. Logs how many chunks
+    were dropped and writes the provenance mapping to dedup.provenance_path if set.
+    """
+    dedup_cfg = dedup_cfg or {}
+    if not dedup_cfg.get("enabled", False):
+        return chunks
+
+    result = deduplicate_chunks(
+        chunks,
+        exact=dedup_cfg.get("exact", True),
+        near=dedup_cfg.get("near", True),
+        threshold=dedup_cfg.get("threshold", 0.85),
+        num_perm=dedup_cfg.get("num_perm", 128),
+        shingle_size=dedup_cfg.get("shingle_size", 5),
+    )
+    logger.info("Deduplication: %s", result)
+    if dedup_cfg.get("provenance_path"):
+        result.save_provenance(dedup_cfg["provenance_path"])
+    return result.chunks
@@ -0,0 +1,268 @@
+"""
+embedding_cache.py
+
+Persistent, content-addressed cache of document embeddings.
+
+CachedEmbeddings wraps any LangChain Embeddings model. Vectors are stored per
+(provider, model name) in a memory-mapped float32/float16 matrix, one row per
+text, with an index file mapping text hashes to rows and their last use. Texts
+seen before (on a previous run, or by another RAG architecture) are read from
+the matrix instead of being re-embedded; only misses reach the provider.
+When the cache is full, the least recently used rows are reused.
+
+Vectors are written straight into the memory-mapped matrix; the index is saved
+by flush(). Vectorstore builds call it once at the end, long embedding runs at
+most every flush_interval seconds, and it runs again at interpreter exit.
+Before a row is reused the index is flushed, so a crash can lose recent
+entries but never map a key to another text's vector.
+
+Instances are thread-safe; the cache assumes a single writing process per
+directory at a time.
+"""
+
+import atexit
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+import weakref
+from typing import Dict, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+VECTORS_FILENAME = "vectors.mmap"
+INDEX_FILENAME = "index.npz"
+_KEY_LENGTH = 32  # hex characters (128 bits); hex keeps NumPy from stripping trailing NUL bytes
+_INITIAL_CAPACITY = 1024
+
+
+def text_key(text: str) -> bytes:
+    """Content hash identifying a text within one (provider, model) cache."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:_KEY_LENGTH].encode("ascii")
+
+
+def flush_embeddings_cache(embeddings):
+    """Save the index of a CachedEmbeddings model; a no-op for any other model."""
+    if isinstance(embeddings, CachedEmbeddings):
+        embeddings.flush()
+
+
+def _flush_at_exit(ref):
+    cache = ref()
+    if cache is not None:
+        cache.flush()
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper backed by an on-disk vector cache.
+
+    Args:
+        embeddings: Underlying LangChain Embeddings model.
+        cache_dir: Root cache directory; each (provider, model) gets a subdirectory.
+        provider: Provider name, part of the cache key.
+        model_name: Model name, part of the cache key.
+        dtype: "float32" or "float16" storage for the cached vectors.
+        max_bytes: Upper bound on the size of the vector matrix. None means unbounded.
+        flush_interval: Seconds after which embed_documents saves pending index
+            changes itself. None leaves it to flush() and interpreter exit.
+
+    embed_query is passed through: query embeddings are not cached here since
+    some providers embed queries differently from documents.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        cache_dir: str,
+        provider: str,
+        model_name: str = None,
+        dtype: str = "float32",
+        max_bytes: Optional[int] = None,
+        flush_interval: Optional[float] = 30.0,
+    ):
+        if dtype not in ("float32", "float16"):
+            raise ValueError(f"Unsupported cache dtype: {dtype}")
+        self.embeddings = embeddings
+        self.provider = provider
+        self.model_name = model_name
+        self.dtype = np.dtype(dtype)
+        self.max_bytes = max_bytes
+        self.flush_interval = flush_interval
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        namespace = re.sub(r"[^A-Za-z0-9._-]+", "_", f"{provider}__{model_name or 'default'}")
+        self.directory = os.path.join(cache_dir, namespace)
+        os.makedirs(self.directory, exist_ok=True)
+        self._vectors_path = os.path.join(self.directory, VECTORS_FILENAME)
+        self._index_path = os.path.join(self.directory, INDEX_FILENAME)
+
+        self.dim: Optional[int] = None
+        self._vectors: Optional[np.memmap] = None
+        self._keys = np.zeros(0, dtype=f"S{_KEY_LENGTH}")  # row -> text key (b"" = free)
+        self._last_used = np.zeros(0, dtype=np.int64)    # row -> clock value of last use
+        self._rows: Dict[bytes, int] = {}
+        self._clock = 0
+        self._dirty = False
+        self._last_flush = time.monotonic()
+        # Architectures built concurrently share one instance (see embeddings.acquire_embeddings_model)
+        self._lock = threading.Lock()
+        self._load()
+        atexit.register(_flush_at_exit, weakref.ref(self))
+
+    # --- persistence ------------------------------------------------------
+
+    def _load(self):
+        if not os.path.exists(self._index_path):
+            return
+        with np.load(self._index_path) as index:
+            if str(index["dtype"]) != self.dtype.name:
+                logger.warning("Embedding cache %s has dtype %s; starting empty", self.directory, index["dtype"])
+                return
+            self.dim = int(index["dim"])
+            self._clock = int(index["clock"])
+            self._keys = index["keys"].copy()
+            self._last_used = index["last_used"].copy()
+        self._rows = {key: row for row, key in enumerate(self._keys.tolist()) if key}
+        self._vectors = np.memmap(self._vectors_path, dtype=self.dtype, mode="r+", shape=(len(self._keys), self.dim))
+
+    def flush(self):
+        """Write pending vectors and the index to disk."""
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        self._last_flush = time.monotonic()
+        if self._vectors is None or not self._dirty:
+            return
+        self._vectors.flush()
+        tmp_path = f"{self._index_path}.tmp.npz"
+        np.savez(
+            tmp_path,
+            dim=self.dim,
+            dtype=self.dtype.name,
+            clock=self._clock,
+            keys=self._keys,
+            last_used=self._last_used,
+        )
+        os.replace(tmp_path, self._index_path)
+        self._dirty = False
+
+    # --- storage ----------------------------------------------------------
+
+    @property
+    def _max_rows(self) -> Optional[int]:
+        if self.max_bytes is None or self.dim is None:
+            return None
+        return max(1, self.max_bytes // (self.dim * self.dtype.itemsize))
+
+    def _grow(self, capacity: int):
+        """Extend the matrix and the index to capacity rows."""
+        old = len(self._keys)
+        if self._vectors is not None:
+            self._vectors.flush()
+            del self._vectors
+        with open(self._vectors_path, "ab") as f:
+            f.truncate(capacity * self.dim * self.dtype.itemsize)
+        self._vectors = np.memmap(self._vectors_path, dtype=self.dtype, mode="r+", shape=(capacity, self.dim))
+        self._keys = np.concatenate([self._keys, np.zeros(capacity - old, dtype=self._keys.dtype)])
+        self._last_used = np.concatenate([self._last_used, np.zeros(capacity - old, dtype=np.int64)])
+
+    def _allocate(self, count: int) -> np.ndarray:
+        """Return count rows to write into: free rows first, then growth, then LRU eviction."""
+        free = np.flatnonzero(self._keys == b"")
+        if len(free) < count:
+            needed = len(self._rows) + count
+            capacity = max(len(self._keys) * 2, needed, _INITIAL_CAPACITY)
+            if self._max_rows is not None:
+                capacity = min(capacity, self._max_rows)
+            if capacity > len(self._keys):
+                self._grow(capacity)
+                free = np.flatnonzero(self._keys == b"")
+        if len(free) < count:
+            used = np.flatnonzero(self._keys != b"")
+            victims = used[np.argsort(self._last_used[used], kind="stable")[:count - len(free)]]
+            for row in victims:
+                del self._rows[self._keys[row]]
+            self._keys[victims] = b""
+            self.evictions += len(victims)
+            # The saved index must stop pointing at the victims before they are overwritten
+            self._dirty = True
+            self._flush()
+            free = np.concatenate([free, victims])
+        return free[:count]
+
+    # --- Embeddings interface ---------------------------------------------
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [text_key(text) for text in texts]
+        with self._lock:
+            self._clock += 1
+
+            # Read hits before allocating so eviction cannot reclaim their rows
+            hit_keys = list({key for key in keys if key in self._rows})
+            hit_rows = np.array([self._rows[key] for key in hit_keys], dtype=np.int64)
+            vectors: Dict[bytes, List[float]] = {}
+            if len(hit_rows):
+                self._last_used[hit_rows] = self._clock
+                self._dirty = True
+                vectors = dict(zip(hit_keys, self._vectors[hit_rows].astype(np.float32).tolist()))
+
+            # Unique misses only: repeated texts in one call are embedded once
+            missing: Dict[bytes, str] = {}
+            for key, text in zip(keys, texts):
+                if key not in vectors:
+                    missing.setdefault(key, text)
+            num_missed = sum(1 for key in keys if key in missing)
+            self.misses += num_missed
+            self.hits += len(keys) - num_missed
+
+        if missing:
+            # The provider runs outside the lock so concurrent callers embed in parallel
+            new_vectors = self.embeddings.embed_documents(list(missing.values()))
+            vectors.update(zip(missing.keys(), new_vectors))
+            with self._lock:
+                self._store(dict(zip(missing.keys(), new_vectors)))
+
+        return [vectors[key] for key in keys]
+
+    def _store(self, new_vectors: Dict[bytes, List[float]]):
+        """Write freshly embedded vectors into the matrix (call with the lock held)."""
+        # Another thread may have stored some of the same texts meanwhile
+        new_vectors = {key: vector for key, vector in new_vectors.items() if key not in self._rows}
+        if not new_vectors:
+            return
+        if self.dim is None:
+            self.dim = len(next(iter(new_vectors.values())))
+        # A batch larger than the whole cache is returned in full but only partly cached
+        rows = self._allocate(min(len(new_vectors), self._max_rows or len(new_vectors)))
+        for row, (key, vector) in zip(rows, new_vectors.items()):
+            self._vectors[row] = vector
+            self._keys[row] = key
+            self._rows[key] = int(row)
+        self._last_used[rows] = self._clock
+        self._dirty = True
+        if self.flush_interval is not None and time.monotonic() - self._last_flush >= self.flush_interval:
+            self._flush()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embeddings.embed_query(text)
+
+    def stats(self) -> dict:
+        """Return hit/miss counters and cache occupancy."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": len(self._rows),
+            "size_bytes": len(self._keys) * (self.dim or 0) * self.dtype.itemsize,
+        }
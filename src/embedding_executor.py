@@ -0,0 +1,269 @@
+"""
+embedding_executor.py
+
+Concurrent, rate-limit-aware batch embedding for HTTP embedding APIs (OpenAI, Cohere).
+
+Inputs are split into contiguous batches bounded by an estimated token count and
+a maximum number of texts, dispatched concurrently with asyncio under a
+concurrency limit, and throttled by token buckets for requests and tokens per
+minute. Requests answered with 429 (or a transient 5xx) are retried with
+exponential backoff, honouring Retry-After. Vectors are reassembled in input order.
+"""
+
+import asyncio
+import logging
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Tuple
+
+import aiohttp
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+_RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Endpoint, API key variable and maximum texts per request of each provider
+PROVIDERS = {
+    "openai": {
+        "base_url": "https://api.openai.com/v1",
+        "path": "/embeddings",
+        "api_key_env": "OPENAI_API_KEY",
+        "max_batch_size": 2048,
+    },
+    "cohere": {
+        "base_url": "https://api.cohere.com",
+        "path": "/v1/embed",
+        "api_key_env": "COHERE_API_KEY",
+        "max_batch_size": 96,
+    },
+}
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap upper-bound-ish token estimate (about 4 characters per token)."""
+    return len(text) // 4 + 1
+
+
+def make_batches(
+    token_counts: List[int],
+    max_batch_tokens: int,
+    max_batch_size: int,
+) -> List[Tuple[int, int]]:
+    """
+    Group consecutive inputs into [start, end) ranges holding at most
+    max_batch_size inputs and max_batch_tokens estimated tokens.
+    An input larger than max_batch_tokens gets a batch of its own.
+    """
+    batches = []
+    start, tokens = 0, 0
+    for i, count in enumerate(token_counts):
+        if i > start and (tokens + count > max_batch_tokens or i - start >= max_batch_size):
+            batches.append((start, i))
+            start, tokens = i, 0
+        tokens += count
+    if start < len(token_counts):
+        batches.append((start, len(token_counts)))
+    return batches
+
+
+class TokenBucket:
+    """
+    Async token bucket: capacity tokens, refilled continuously at rate tokens/second.
+    acquire(n) waits until n tokens are available (n is capped at capacity).
+    The bucket may be shared by successive event loops (one per sync call).
+    """
+
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = None
+        self._loop = None
+
+    async def acquire(self, amount: float = 1):
+        amount = min(amount, self.capacity)
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._lock, self._loop = asyncio.Lock(), loop
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return
+                await asyncio.sleep((amount - self._tokens) / self.rate)
+
+    def drain(self):
+        """Empty the bucket, e.g. on a 429, so every concurrent caller slows down."""
+        self._tokens = min(self._tokens, 0)
+        self._updated = time.monotonic()
+
+
+class ConcurrentAPIEmbeddings(Embeddings):
+    """
+    LangChain Embeddings that call the OpenAI or Cohere embedding endpoint directly,
+    with concurrent token-bounded batches.
+
+    Args:
+        provider: "openai" or "cohere".
+        model_name: Embedding model.
+        api_key: API key; defaults to OPENAI_API_KEY / COHERE_API_KEY.
+        base_url: API root; defaults to the provider's (OPENAI_BASE_URL is honoured).
+        max_concurrency: Maximum number of requests in flight.
+        max_batch_tokens: Estimated tokens per request.
+        max_batch_size: Texts per request (capped at the provider limit).
+        requests_per_minute: Request rate limit (None = unlimited).
+        tokens_per_minute: Estimated token rate limit (None = unlimited).
+        max_retries: Retries per batch on 429/5xx or connection errors.
+        backoff_base: First backoff delay in seconds (doubled per retry, with jitter).
+        timeout: Per-request timeout in seconds.
+        count_tokens: Token estimator used for batching and rate limiting.
+    """
+
+    def __init__(
+        self,
+        provider: str,
+        model_name: str,
+        api_key: str = None,
+        base_url: str = None,
+        max_concurrency: int = 8,
+        max_batch_tokens: int = 100_000,
+        max_batch_size: int = None,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        max_retries: int = 6,
+        backoff_base: float = 1.0,
+        timeout: float = 60,
+        count_tokens: Callable[[str], int] = estimate_tokens,
+    ):
+        provider = provider.lower()
+        if provider not in PROVIDERS:
+            raise ValueError(f"Unsupported embedding provider for batch embedding: {provider}")
+        spec = PROVIDERS[provider]
+        self.provider = provider
+        self.model_name = model_name
+        self.api_key = api_key or os.getenv(spec["api_key_env"])
+        if base_url is None and provider == "openai":
+            base_url = os.getenv("OPENAI_BASE_URL")
+        self.url = (base_url or spec["base_url"]).rstrip("/") + spec["path"]
+        self.max_concurrency = max_concurrency
+        self.max_batch_tokens = max_batch_tokens
+        self.max_batch_size = min(max_batch_size or spec["max_batch_size"], spec["max_batch_size"])
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.timeout = timeout
+        self.count_tokens = count_tokens
+        self.retries = 0  # total retried requests, for monitoring
+
+        # Buckets start full with one minute of budget, like the providers' windows,
+        # and persist across calls so limits hold over a whole indexing run
+        self._limits = (
+            TokenBucket(requests_per_minute / 60, requests_per_minute) if requests_per_minute else None,
+            TokenBucket(tokens_per_minute / 60, tokens_per_minute) if tokens_per_minute else None,
+        )
+
+    # --- provider formats -------------------------------------------------
+
+    def _payload(self, texts: List[str], is_query: bool) -> dict:
+        if self.provider == "openai":
+            return {"model": self.model_name, "input": texts}
+        return {
+            "model": self.model_name,
+            "texts": texts,
+            "input_type": "search_query" if is_query else "search_document",
+            "truncate": "END",
+        }
+
+    def _parse(self, body: dict) -> List[List[float]]:
+        if self.provider == "openai":
+            return [item["embedding"] for item in sorted(body["data"], key=lambda item: item["index"])]
+        embeddings = body["embeddings"]
+        return embeddings["float"] if isinstance(embeddings, dict) else embeddings
+
+    # --- async execution --------------------------------------------------
+
+    async def _post(self, session, texts: List[str], tokens: int, is_query: bool) -> List[List[float]]:
+        request_bucket, token_bucket = self._limits
+        for attempt in range(self.max_retries + 1):
+            if request_bucket:
+                await request_bucket.acquire(1)
+            if token_bucket:
+                await token_bucket.acquire(tokens)
+
+            retry_after = None
+            try:
+                async with session.post(self.url, json=self._payload(texts, is_query)) as response:
+                    if response.status not in _RETRY_STATUSES:
+                        response.raise_for_status()
+                        vectors = self._parse(await response.json())
+                        if len(vectors) != len(texts):
+                            raise RuntimeError(f"Expected {len(texts)} embeddings, got {len(vectors)}")
+                        return vectors
+                    error = f"HTTP {response.status}"
+                    retry_after = response.headers.get("Retry-After")
+                    if response.status == 429:
+                        for bucket in self._limits:
+                            if bucket:
+                                bucket.drain()
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                error = repr(e)
+
+            if attempt == self.max_retries:
+                raise RuntimeError(f"Embedding request failed after {attempt + 1} attempts: {error}")
+            self.retries += 1
+            delay = self.backoff_base * 2 ** attempt * (0.5 + random.random() / 2)
+            if retry_after:
+                try:
+                    delay = max(delay, float(retry_after))
+                except ValueError:
+                    pass
+            logger.debug("Embedding batch got %s, retrying in %.2fs", error, delay)
+            await asyncio.sleep(delay)
+
+    async def aembed_documents(self, texts: List[str], is_query: bool = False) -> List[List[float]]:
+        if not texts:
+            return []
+        token_counts = [self.count_tokens(text) for text in texts]
+        batches = make_batches(token_counts, self.max_batch_tokens, self.max_batch_size)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        headers = {"Authorization": f"Bearer {self.api_key}"} if self.api_key else {}
+
+        async with aiohttp.ClientSession(headers=headers, timeout=aiohttp.ClientTimeout(total=self.timeout)) as session:
+
+            async def run(start: int, end: int) -> List[List[float]]:
+                async with semaphore:
+                    return await self._post(session, texts[start:end], sum(token_counts[start:end]), is_query)
+
+            results = await asyncio.gather(*(run(start, end) for start, end in batches))
+
+        return [vector for batch in results for vector in batch]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return (await self.aembed_documents([text], is_query=True))[0]
+
+    # --- sync interface ---------------------------------------------------
+
+    @staticmethod
+    def _run(coroutine):
+        """Run a coroutine to completion, also from inside a running event loop."""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(coroutine)
+        # e.g. called from a Gradio/async handler: use a private loop in a worker thread
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(asyncio.run, coroutine).result()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._run(self.aembed_documents(texts))
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._run(self.aembed_query(text))
@@ -4,13 +4,38 @@ embeddings.py
 Unified embedding model loader for vectorstores.
 """
 
+import json
 import os
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
-def load_embeddings_model(provider: str, model_name: str = None):
+_DEFAULT_MODELS = {
+    "openai": "text-embedding-3-small",
+    "huggingface": "sentence-transformers/all-MiniLM-L6-v2",
+    "cohere": "embed-english-v3.0",
+}
+
+
+def embeddings_model_key(embeddings) -> str:
+    """Identify an embeddings model by class, provider and model name."""
+    name = getattr(embeddings, "model_name", None) or getattr(embeddings, "model", None)
+    provider = getattr(embeddings, "provider", None)
+    return ":".join(str(part) for part in (type(embeddings).__name__, provider, name) if part)
+
+
+def load_embeddings_model(
+    provider: str,
+    model_name: str = None,
+    cache_dir: str = None,
+    cache_dtype: str = "float32",
+    cache_max_mb: float = None,
+    batching: dict = None,
+    local_batching: dict = None,
+    onnx: dict = None,
+    device: str = None,
+):
     """
     Returns an embedding model instance based on provider and optional model name.
 
@@ -18,14 +43,70 @@ def load_embeddings_model(provider: str, model_name: str = None):
       - openai
       - huggingface
       - cohere
+      - onnx (a HuggingFace model_name exported to ONNX and run with ONNX Runtime on CPU)
+
+    If cache_dir is set, the model is wrapped in embedding_cache.CachedEmbeddings so
+    document embeddings are persisted per (provider, model name, text hash) and
+    reused across runs and architectures. cache_dtype ("float32"/"float16") and
+    cache_max_mb (None = unbounded, LRU eviction beyond it) configure that cache.
+
+    For "openai" and "cohere", batching (e.g. {"max_concurrency": 8,
+    "tokens_per_minute": 1000000}) replaces the LangChain client with
+    embedding_executor.ConcurrentAPIEmbeddings: concurrent token-bounded
+    requests with rate limiting and backoff on 429.
+
+    For "huggingface", local_batching (e.g. {"max_batch_tokens": 8192,
+    "num_threads": None}) uses local_embeddings.BucketedHuggingFaceEmbeddings:
+    length-sorted batches under a padded-token budget on all CPU threads.
+
+    For "onnx", onnx (e.g. {"export_dir": ".cache/onnx", "quantize": True}) and
+    local_batching configure local_embeddings.OnnxEmbeddings.
+
+    device (e.g. "cpu", "cuda") selects where the "huggingface" model runs.
     """
+    if provider.lower() == "onnx":
+        from local_embeddings import OnnxEmbeddings
+
+        model = OnnxEmbeddings(model_name or _DEFAULT_MODELS["huggingface"], **(onnx or {}), **(local_batching or {}))
+        model_name = model.model_name  # "@int8" when quantized: the cache must not serve the other model's vectors
+    elif local_batching and provider.lower() == "huggingface":
+        from local_embeddings import BucketedHuggingFaceEmbeddings
+
+        model = BucketedHuggingFaceEmbeddings(model_name or _DEFAULT_MODELS["huggingface"], **local_batching)
+    elif batching and provider.lower() in ("openai", "cohere"):
+        from embedding_executor import ConcurrentAPIEmbeddings
+
+        model = ConcurrentAPIEmbeddings(
+            provider,
+            model_name or _DEFAULT_MODELS[provider.lower()],
+            **batching,
+        )
+    else:
+        model = _load_provider_model(provider, model_name, device=device)
+    if not cache_dir:
+        return model
+
+    from embedding_cache import CachedEmbeddings
+
+    return CachedEmbeddings(
+        model,
+        cache_dir=cache_dir,
+        provider=provider.lower(),
+        model_name=model_name,
+        dtype=cache_dtype,
+        max_bytes=int(cache_max_mb * 1024 * 1024) if cache_max_mb else None,
+    )
+
+
+def _load_provider_model(provider: str, model_name: str = None, device: str = None):
+    """Instantiate the provider's LangChain embeddings client."""
     provider = provider.lower()
 
     if provider == "openai":
         from langchain_openai import OpenAIEmbeddings
         
         return OpenAIEmbeddings(
-            model=model_name or "text-embedding-3-small",
+            model=model_name or _DEFAULT_MODELS["openai"],
             api_key=os.getenv("OPENAI_API_KEY"),
         )
 
@@ -33,17 +114,38 @@ def load_embeddings_model(provider: str, model_name: str = None):
         from langchain_huggingface import HuggingFaceEmbeddings
 
         return HuggingFaceEmbeddings(
-            model_name=model_name or "sentence-transformers/all-MiniLM-L6-v2"
+            model_name=model_name or _DEFAULT_MODELS["huggingface"],
+            model_kwargs={"device": device} if device else {},
         )
 
     elif provider == "cohere":
         from langchain_cohere import CohereEmbeddings
 
         return CohereEmbeddings(
-            model=model_name or "embed-english-v3.0",
+            model=model_name or _DEFAULT_MODELS["cohere"],
             cohere_api_key=os.getenv("COHERE_API_KEY"),
         )
 
     else:
         raise ValueError(f"Unsupported embedding provider: {provider}")
 
+
+
+def acquire_embeddings_model(provider: str, model_name: str = None, device: str = None, **kwargs):
+    """
+    load_embeddings_model through the process-wide model registry.
+
+    Architectures with the same (provider, model name, device) and options share
+    one instance; release it with model_registry.get_model_registry().release(model).
+    kwargs are the remaining load_embeddings_model options.
+    """
+    from model_registry import get_model_registry
+
+    provider = provider.lower()
+    model_name = model_name or _DEFAULT_MODELS.get(provider)
+    # Options (cache, batching, ...) are part of the key so differently configured wrappers never mix
+    options = json.dumps(kwargs, sort_keys=True, default=str)
+    return get_model_registry().acquire(
+        ("embeddings", provider, model_name, device or "auto", options),
+        lambda: load_embeddings_model(provider, model_name, device=device, **kwargs),
+    )
@@ -0,0 +1,299 @@
+"""
+local_embeddings.py
+
+CPU-oriented embedding backends for local HuggingFace models.
+
+Batches of a transformer are padded to their longest member, so batching texts
+of very different lengths together wastes most of the compute. The backends
+here sort inputs by token length, cut the sorted list into batches whose padded
+size (texts x longest length) stays under a token budget, run them on the CPU
+and scatter the vectors back into input order.
+
+OnnxEmbeddings runs an ONNX export of the same model (optionally int8-quantized)
+with ONNX Runtime; cosine_parity/check_parity compare it against PyTorch output.
+"""
+
+import json
+import os
+import re
+from contextlib import contextmanager
+from typing import List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+
+def available_cpus() -> int:
+    """Number of CPUs this process may run on (respects CPU affinity)."""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def length_bucketed_batches(
+    lengths: List[int],
+    max_batch_tokens: int,
+    max_batch_size: Optional[int] = None,
+) -> List[np.ndarray]:
+    """
+    Group input positions into batches of similar token length.
+
+    Inputs are sorted longest first, and a batch grows while
+    (batch size x its longest length) stays within max_batch_tokens, so short
+    texts get large batches and long texts small ones.
+
+    Returns:
+        List of arrays of input positions, one per batch.
+    """
+    lengths = np.asarray(lengths)
+    order = np.argsort(-lengths, kind="stable")
+    batches = []
+    start = 0
+    while start < len(order):
+        longest = max(int(lengths[order[start]]), 1)
+        size = max(1, max_batch_tokens // longest)
+        if max_batch_size:
+            size = min(size, max_batch_size)
+        batches.append(order[start:start + size])
+        start += size
+    return batches
+
+
+@contextmanager
+def _torch_threads(num_threads: Optional[int]):
+    """Run the block with num_threads torch intra-op threads, restoring the previous count after."""
+    if not num_threads:
+        yield
+        return
+    import torch
+
+    previous = torch.get_num_threads()
+    torch.set_num_threads(num_threads)
+    try:
+        yield
+    finally:
+        torch.set_num_threads(previous)
+
+
+class BucketedHuggingFaceEmbeddings(Embeddings):
+    """
+    sentence-transformers model on CPU with length-bucketed dynamic batching.
+
+    Produces the same vectors as langchain_huggingface.HuggingFaceEmbeddings
+    for the same model.
+
+    Args:
+        model_name: sentence-transformers model name or path.
+        max_batch_tokens: Padded tokens per batch.
+        max_batch_size: Optional cap on texts per batch.
+        num_threads: Torch intra-op threads while embedding (the previous count is
+            restored afterwards); None keeps torch's own setting.
+        normalize_embeddings: L2-normalize the output vectors.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        max_batch_tokens: int = 8192,
+        max_batch_size: Optional[int] = None,
+        num_threads: Optional[int] = None,
+        normalize_embeddings: bool = False,
+    ):
+        from sentence_transformers import SentenceTransformer
+
+        self.model_name = model_name
+        self.model = SentenceTransformer(model_name, device="cpu")
+        self.max_batch_tokens = max_batch_tokens
+        self.max_batch_size = max_batch_size
+        self.num_threads = num_threads
+        self.normalize_embeddings = normalize_embeddings
+
+    def _token_lengths(self, texts: List[str]) -> List[int]:
+        encoded = self.model.tokenizer(
+            texts,
+            add_special_tokens=True,
+            truncation=True,
+            max_length=self.model.max_seq_length,
+        )
+        return [len(ids) for ids in encoded["input_ids"]]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        texts = [text.replace("\n", " ") for text in texts]
+        output = None
+        with _torch_threads(self.num_threads):
+            for batch in length_bucketed_batches(
+                self._token_lengths(texts), self.max_batch_tokens, self.max_batch_size
+            ):
+                vectors = self.model.encode(
+                    [texts[i] for i in batch],
+                    batch_size=len(batch),
+                    normalize_embeddings=self.normalize_embeddings,
+                    convert_to_numpy=True,
+                    show_progress_bar=False,
+                )
+                if output is None:
+                    output = np.empty((len(texts), vectors.shape[1]), dtype=vectors.dtype)
+                output[batch] = vectors
+        return output.tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+def _pooling_config(model_name: str) -> dict:
+    """Read pooling mode, normalization and max length from the sentence-transformers model."""
+    from sentence_transformers import SentenceTransformer
+    from sentence_transformers.models import Normalize, Pooling
+
+    model = SentenceTransformer(model_name, device="cpu")
+    pooling = next((m for m in model if isinstance(m, Pooling)), None)
+    return {
+        "pooling": "cls" if pooling is not None and pooling.pooling_mode_cls_token else "mean",
+        "normalize": any(isinstance(m, Normalize) for m in model),
+        "max_seq_length": model.max_seq_length,
+    }
+
+
+def export_onnx_model(model_name: str, export_dir: str = ".cache/onnx", quantize: bool = False) -> str:
+    """
+    Export a HuggingFace sentence-transformers model to ONNX once and return the
+    path of the .onnx file to run (the int8 dynamically quantized copy if quantize).
+
+    The export directory also holds the tokenizer and pooling.json, so later
+    loads need neither PyTorch nor sentence-transformers.
+    """
+    target = os.path.join(export_dir, re.sub(r"[^A-Za-z0-9._-]+", "_", model_name))
+    onnx_path = os.path.join(target, "model.onnx")
+
+    if not os.path.exists(onnx_path):
+        from optimum.onnxruntime import ORTModelForFeatureExtraction
+        from transformers import AutoTokenizer
+
+        ORTModelForFeatureExtraction.from_pretrained(model_name, export=True).save_pretrained(target)
+        AutoTokenizer.from_pretrained(model_name).save_pretrained(target)
+        with open(os.path.join(target, "pooling.json"), "w", encoding="utf-8") as f:
+            json.dump(_pooling_config(model_name), f)
+
+    if not quantize:
+        return onnx_path
+
+    quantized_path = os.path.join(target, "model_int8.onnx")
+    if not os.path.exists(quantized_path):
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        quantize_dynamic(onnx_path, quantized_path, weight_type=QuantType.QInt8)
+    return quantized_path
+
+
+class OnnxEmbeddings(Embeddings):
+    """
+    ONNX Runtime (CPU) version of a HuggingFace sentence-transformers model,
+    optionally int8-quantized, with the same length-bucketed batching as
+    BucketedHuggingFaceEmbeddings.
+
+    Args:
+        model_name: sentence-transformers model name; exported on first use.
+        export_dir: Where exported models are kept.
+        quantize: Run the int8 dynamically quantized model.
+        max_batch_tokens: Padded tokens per batch.
+        max_batch_size: Optional cap on texts per batch.
+        num_threads: ONNX Runtime intra-op threads; None uses every available core.
+
+    model_name is the HuggingFace name with "@int8" appended when quantized, so
+    caches and index fingerprints keyed on it never mix the two models' vectors.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        export_dir: str = ".cache/onnx",
+        quantize: bool = False,
+        max_batch_tokens: int = 8192,
+        max_batch_size: Optional[int] = None,
+        num_threads: Optional[int] = None,
+    ):
+        try:
+            import onnxruntime as ort
+        except ImportError as e:
+            raise ImportError('The "onnx" provider needs the onnx extra: uv sync --extra onnx') from e
+        from transformers import AutoTokenizer
+
+        self.model_name = f"{model_name}@int8" if quantize else model_name
+        self.quantize = quantize
+        onnx_path = export_onnx_model(model_name, export_dir, quantize=quantize)
+        model_dir = os.path.dirname(onnx_path)
+        with open(os.path.join(model_dir, "pooling.json"), "r", encoding="utf-8") as f:
+            self.pooling = json.load(f)
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = num_threads or available_cpus()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(onnx_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = {node.name for node in self.session.get_inputs()}
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self.max_batch_tokens = max_batch_tokens
+        self.max_batch_size = max_batch_size
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        inputs = self.tokenizer(
+            texts,
+            padding=True,
+            truncation=True,
+            max_length=self.pooling["max_seq_length"],
+            return_tensors="np",
+        )
+        feed = {name: value.astype(np.int64) for name, value in inputs.items() if name in self.input_names}
+        hidden = self.session.run(None, feed)[0]
+
+        if self.pooling["pooling"] == "cls":
+            vectors = hidden[:, 0]
+        else:
+            mask = inputs["attention_mask"][..., None].astype(hidden.dtype)
+            vectors = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        if self.pooling["normalize"]:
+            vectors = vectors / np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+        return vectors.astype(np.float32)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        texts = [text.replace("\n", " ") for text in texts]
+        lengths = [
+            len(ids)
+            for ids in self.tokenizer(texts, truncation=True, max_length=self.pooling["max_seq_length"])["input_ids"]
+        ]
+        output = None
+        for batch in length_bucketed_batches(lengths, self.max_batch_tokens, self.max_batch_size):
+            vectors = self._encode_batch([texts[i] for i in batch])
+            if output is None:
+                output = np.empty((len(texts), vectors.shape[1]), dtype=np.float32)
+            output[batch] = vectors
+        return output.tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+def cosine_parity(reference: Embeddings, candidate: Embeddings, texts: List[str]) -> dict:
+    """
+    Compare two embedding models on the same texts.
+
+    Returns:
+        dict with the minimum and mean cosine similarity between paired vectors.
+    """
+    a = np.asarray(reference.embed_documents(texts), dtype=np.float64)
+    b = np.asarray(candidate.embed_documents(texts), dtype=np.float64)
+    cosine = (a * b).sum(axis=1) / (np.linalg.norm(a, axis=1) * np.linalg.norm(b, axis=1))
+    return {"min_cosine": float(cosine.min()), "mean_cosine": float(cosine.mean())}
+
+
+def check_parity(reference: Embeddings, candidate: Embeddings, texts: List[str], min_cosine: float = 0.99) -> dict:
+    """cosine_parity, raising ValueError if any pair falls below min_cosine."""
+    parity = cosine_parity(reference, candidate, texts)
+    if parity["min_cosine"] < min_cosine:
+        raise ValueError(
+            f"Embedding parity check failed: min cosine {parity['min_cosine']:.4f} < {min_cosine}"
+        )
+    return parity
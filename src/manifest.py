@@ -0,0 +1,311 @@
+"""
+manifest.py
+
+On-disk ingestion manifest for incremental re-indexing of a data directory.
+
+The manifest records, per source file, its size, mtime, content hash and the ids
+of the chunks it produced, together with a hash of the splitter/embedding config.
+sync_directory uses it so that a rebuild only loads, splits and embeds new or
+modified files and deletes the chunks of files that were removed. Within a
+modified file only the chunks that actually changed are re-embedded.
+A BM25 SparseIndex can be kept in step with the same upserts and deletes, for
+the "sparse" and "hybrid" retrievers.
+"""
+
+import hashlib
+import json
+import logging
+import os
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+from data_loader import _iter_loaded_files, _list_files, hash_file
+from embedding_cache import flush_embeddings_cache
+from numpy_vectorstore import META_FILENAME as NUMPY_META_FILENAME
+from sparse_index import SparseIndex
+from splitters import split_documents
+from vectorstores import delete_chunks, load_vectorstore, save_vectorstore, upsert_chunks
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILENAME = "ingestion_manifest.json"
+SPARSE_DIRNAME = "sparse"
+
+
+def hash_config(config: dict) -> str:
+    """Return a stable hash of a (JSON-serializable) config dict."""
+    payload = json.dumps(config, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class ManifestDiff:
+    """Files grouped by what a sync has to do with them."""
+
+    added: List[str] = field(default_factory=list)
+    modified: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    unchanged: List[str] = field(default_factory=list)
+    refreshed: List[str] = field(default_factory=list)  # Unchanged, but touched: stat info updated
+    failed: List[str] = field(default_factory=list)     # Changed, but could not be loaded
+
+    @property
+    def changed(self) -> List[str]:
+        return self.added + self.modified
+
+    @property
+    def loaded(self) -> List[str]:
+        """Changed files that were loaded and indexed."""
+        return [path for path in self.changed if path not in self.failed]
+
+    def __str__(self) -> str:
+        return (
+            f"{len(self.added)} added, {len(self.modified)} modified, "
+            f"{len(self.removed)} removed, {len(self.unchanged)} unchanged"
+        )
+
+
+class IngestionManifest:
+    """
+    Persistent record of which files have been indexed and with which chunk ids.
+
+    If there is no manifest on disk yet, or the stored config hash differs from the
+    current one (e.g. a new chunk_size or embedding model), the manifest starts
+    empty and `stale` is set: the caller must then start from an empty vectorstore
+    (see vectorstores.load_vectorstore) since whatever it holds is unaccounted for.
+    """
+
+    def __init__(self, path: str, config: dict = None):
+        self.path = path
+        self.config_hash = hash_config(config or {})
+        self.files: Dict[str, dict] = {}
+        self.stale = True
+
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.stale = data.get("config_hash") != self.config_hash
+            if not self.stale:
+                self.files = data.get("files", {})
+
+    def diff(self, paths: List[str]) -> ManifestDiff:
+        """Compare the given file paths against the manifest."""
+        result = ManifestDiff()
+        current = set(paths)
+
+        for path in paths:
+            entry = self.files.get(path)
+            if entry is None:
+                result.added.append(path)
+            else:
+                stat = os.stat(path)
+                if stat.st_size == entry["size"] and stat.st_mtime == entry["mtime"]:
+                    result.unchanged.append(path)
+                elif hash_file(path) == entry["hash"]:
+                    # Touched but not edited: refresh stat info, keep chunks
+                    entry["size"], entry["mtime"] = stat.st_size, stat.st_mtime
+                    result.unchanged.append(path)
+                    result.refreshed.append(path)
+                else:
+                    result.modified.append(path)
+
+        result.removed = [path for path in self.files if path not in current]
+        return result
+
+    def chunk_ids(self, paths: List[str]) -> List[str]:
+        """Return all chunk ids recorded for the given paths."""
+        return [cid for path in paths for cid in self.files.get(path, {}).get("chunk_ids", [])]
+
+    def record(self, path: str, content_hash: str, chunk_ids: List[str]):
+        """Record a freshly indexed file."""
+        stat = os.stat(path)
+        self.files[path] = {
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+            "hash": content_hash,
+            "chunk_ids": chunk_ids,
+        }
+
+    def forget(self, path: str):
+        """Drop a file from the manifest."""
+        self.files.pop(path, None)
+
+    def reset(self):
+        """Forget every file; as with a stale manifest, the caller starts from empty indexes."""
+        self.files = {}
+        self.stale = True
+
+    def save(self):
+        """Write the manifest to disk atomically."""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"config_hash": self.config_hash, "files": self.files}, f)
+        os.replace(tmp_path, self.path)
+        self.stale = False
+
+
+def sync_directory(
+    directory: str,
+    vectorstore,
+    manifest: IngestionManifest,
+    splitter_kwargs: dict = None,
+    recursive: bool = True,
+    num_workers: int = 1,
+    pdf_cache_dir: str = None,
+    sparse_index: SparseIndex = None,
+) -> ManifestDiff:
+    """
+    Bring a persistent vectorstore in line with the files in a directory.
+
+    Only new or modified files are loaded, split and embedded. Documents of a
+    file get stable ids ("<path>#<n>"), so an edit keeps the ids of the chunks
+    before it. Chunks are upserted by id, which skips unchanged chunks and
+    replaces edited ones. Chunks a modified file no longer produces are deleted,
+    and so are all chunks of removed files.
+    The manifest is updated in memory; persist the vectorstore before calling
+    manifest.save() so a crash never leaves the manifest ahead of the index.
+
+    Args:
+        directory: Data directory to index.
+        vectorstore: Vectorstore supported by vectorstores.upsert_chunks/delete_chunks.
+        manifest: IngestionManifest describing what is already indexed.
+        splitter_kwargs: Arguments forwarded to splitters.split_documents.
+        recursive: Whether to descend into subdirectories.
+        num_workers: Processes used to parse changed files.
+        pdf_cache_dir: Optional page text cache for PDFs (see data_loader.load_pdf).
+        sparse_index: Optional SparseIndex that gets the same upserts and deletes,
+            applied in one write at the end (each write re-weights the whole index).
+
+    Returns:
+        ManifestDiff: What changed since the previous sync.
+    """
+    splitter_kwargs = splitter_kwargs or {}
+    diff = manifest.diff(_list_files(directory, recursive=recursive))
+
+    sparse_added: List = []
+    sparse_deleted: List[str] = []
+
+    def delete(ids):
+        delete_chunks(vectorstore, ids)
+        sparse_deleted.extend(ids)
+
+    removed_ids = manifest.chunk_ids(diff.removed)
+    if removed_ids:
+        delete(removed_ids)
+    for path in diff.removed:
+        manifest.forget(path)
+
+    changed = diff.changed
+    num_workers = num_workers or os.cpu_count() or 1
+    for path, (docs, error) in zip(changed, _iter_loaded_files(changed, num_workers, pdf_cache_dir)):
+        old_ids = manifest.chunk_ids([path])
+        if error is not None:
+            # Drop the old chunks and forget the file so the next sync retries it
+            logger.warning("Failed to load %s: %s", path, error)
+            if old_ids:
+                delete(old_ids)
+            manifest.forget(path)
+            diff.failed.append(path)
+            continue
+
+        for i, doc in enumerate(docs):
+            doc.metadata.setdefault("doc_id", f"{path}#{i}")
+        chunks = split_documents(docs, **splitter_kwargs) if docs else []
+        ids = [chunk.id for chunk in chunks]
+        stale_ids = sorted(set(old_ids) - set(ids))
+        if stale_ids:
+            delete(stale_ids)
+        if chunks:
+            upsert_chunks(vectorstore, chunks)
+            sparse_added.extend(chunks)
+        manifest.record(path, hash_file(path), ids)
+
+    if sparse_index is not None:
+        sparse_index.update(sparse_added, delete_ids=sparse_deleted)
+    return diff
+
+
+def build_incremental_vectorstore(
+    directory: str,
+    name: str,
+    embeddings_model,
+    splitter_kwargs: dict = None,
+    config: dict = None,
+    recursive: bool = True,
+    num_workers: int = 1,
+    pdf_cache_dir: str = None,
+    sparse: dict = None,
+    **vectorstore_kwargs,
+):
+    """
+    Open (or create) a persisted vectorstore and sync it with a data directory.
+
+    The manifest lives next to the index in vectorstore_kwargs["persist_directory"],
+    so deleting the index also discards the manifest. With sparse, a SparseIndex
+    over the same chunks is kept in its "sparse" subdirectory; if it is missing
+    (e.g. sparse retrieval was just switched on), everything is re-indexed once.
+
+    Args:
+        directory: Data directory to index.
+        name: Vectorstore backend ("faiss", "chroma" or "numpy").
+        embeddings_model: Embeddings used for new chunks.
+        splitter_kwargs: Arguments forwarded to splitters.split_documents.
+        config: Splitter/embedding settings whose change invalidates the index.
+        recursive: Whether to descend into subdirectories.
+        num_workers: Processes used to parse changed files.
+        pdf_cache_dir: Optional page text cache for PDFs (see data_loader.load_pdf).
+        sparse: BM25 parameters (k1, b, epsilon) of the SparseIndex to maintain,
+            or None for no sparse index. A "directory" key is ignored.
+        **vectorstore_kwargs: Forwarded to load_vectorstore/save_vectorstore.
+
+    Returns:
+        (vectorstore, sparse_index or None, ManifestDiff)
+    """
+    persist_dir = vectorstore_kwargs.get("persist_directory")
+    if not persist_dir:
+        raise ValueError("persist_directory is required for incremental indexing.")
+
+    # Parallelism and caching settings do not change the chunks, so they must not invalidate the index
+    splitter_config = {k: v for k, v in (splitter_kwargs or {}).items() if k not in ("num_workers", "cache")}
+    manifest_config = {"vectorstore": name, "splitter": splitter_config, **(config or {})}
+    manifest = IngestionManifest(os.path.join(persist_dir, MANIFEST_FILENAME), config=manifest_config)
+
+    if name == "numpy" and not os.path.exists(os.path.join(persist_dir, NUMPY_META_FILENAME)):
+        # A NumPy store drops its meta.json on the first write, so a sync cut short leaves none behind
+        manifest.reset()
+
+    sparse_index = None
+    sparse_dir = os.path.join(persist_dir, SPARSE_DIRNAME)
+    if sparse is not None:
+        params = {k: v for k, v in sparse.items() if k in ("k1", "b", "epsilon")}
+        if not manifest.stale and SparseIndex.stored(sparse_dir):
+            sparse_index = SparseIndex.load(sparse_dir, **params)
+        else:
+            # The chunks of unchanged files are not split again, so a missing index means starting over
+            manifest.reset()
+            sparse_index = SparseIndex(**params)
+    vectorstore = load_vectorstore(name, embeddings_model, reset=manifest.stale, **vectorstore_kwargs)
+
+    diff = sync_directory(
+        directory,
+        vectorstore,
+        manifest,
+        splitter_kwargs=splitter_kwargs,
+        recursive=recursive,
+        num_workers=num_workers,
+        pdf_cache_dir=pdf_cache_dir,
+        sparse_index=sparse_index,
+    )
+    flush_embeddings_cache(embeddings_model)
+    if diff.changed or diff.removed or manifest.stale:
+        save_vectorstore(name, vectorstore, **vectorstore_kwargs)
+        if sparse_index is not None:
+            sparse_index.save(sparse_dir)
+        manifest.save()
+    elif diff.refreshed:
+        # Only stat info changed: save it so touched files are not rehashed on every start
+        manifest.save()
+    return vectorstore, sparse_index, diff
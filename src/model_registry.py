@@ -0,0 +1,116 @@
+"""
+model_registry.py
+
+Process-wide, thread-safe registry of loaded models (embeddings, rerankers).
+
+RAG architectures built in the same process (e.g. by the Gradio app) share one
+instance per (provider, model name, device) instead of each loading its own copy
+of the weights. Every acquire() is reference counted; release() drops a
+reference and unload() frees a model explicitly. Models whose count drops to
+zero stay loaded (warm) until unloaded, unless release(..., unload=True).
+"""
+
+import logging
+import threading
+from typing import Any, Callable, Dict, Hashable
+
+logger = logging.getLogger(__name__)
+
+
+class ModelRegistry:
+    """Reference-counted model instances keyed by a hashable key."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._models: Dict[Hashable, Any] = {}
+        self._refcounts: Dict[Hashable, int] = {}
+        self._keys_by_id: Dict[int, Hashable] = {}
+        self._load_locks: Dict[Hashable, threading.Lock] = {}
+        self.loads = 0
+
+    def acquire(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """
+        Return the model registered under key, loading it with loader() on first use.
+        Concurrent acquires of the same key load once; different keys load in parallel.
+        """
+        with self._lock:
+            if key in self._models:
+                self._refcounts[key] += 1
+                return self._models[key]
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+        with load_lock:
+            with self._lock:
+                # Another thread may have finished loading while we waited
+                if key in self._models:
+                    self._refcounts[key] += 1
+                    return self._models[key]
+            logger.info("Loading model %s", key)
+            model = loader()
+            with self._lock:
+                self._models[key] = model
+                self._refcounts[key] = 1
+                self._keys_by_id[id(model)] = key
+                self.loads += 1
+            return model
+
+    def release(self, model: Any, unload: bool = False):
+        """Drop one reference to a model obtained from acquire()."""
+        with self._lock:
+            key = self._keys_by_id.get(id(model))
+            if key is None:
+                return
+            self._refcounts[key] = max(0, self._refcounts[key] - 1)
+            if unload and self._refcounts[key] == 0:
+                self._remove(key)
+
+    def unload(self, key: Hashable, force: bool = False) -> bool:
+        """
+        Remove a model from the registry so it can be garbage collected.
+        Refuses (returns False) while references are held, unless force.
+        """
+        with self._lock:
+            if key not in self._models or (self._refcounts[key] and not force):
+                return False
+            self._remove(key)
+            return True
+
+    def _remove(self, key: Hashable):
+        model = self._models.pop(key)
+        self._refcounts.pop(key, None)
+        self._keys_by_id.pop(id(model), None)
+        self._load_locks.pop(key, None)
+        logger.info("Unloaded model %s", key)
+
+    def clear(self):
+        """Unload every model, regardless of references."""
+        with self._lock:
+            for key in list(self._models):
+                self._remove(key)
+
+    def stats(self) -> dict:
+        """Return the loaded keys with their reference counts and the number of loads."""
+        with self._lock:
+            return {"models": dict(self._refcounts), "loads": self.loads}
+
+
+_registry = ModelRegistry()
+
+
+def get_model_registry() -> ModelRegistry:
+    """The registry shared by the whole process."""
+    return _registry
+
+
+def release_pipeline(*models: Any, vectorstore: Any = None):
+    """
+    Release what a RAG pipeline acquired when it is closed: one reference to
+    each shared model (see ModelRegistry.acquire), and its vectorstore's pooled
+    client or worker threads (see vectorstores.release_vectorstore).
+    """
+    for model in models:
+        _registry.release(model)
+    if vectorstore is not None:
+        from vectorstores import release_vectorstore
+
+        release_vectorstore(vectorstore)
@@ -0,0 +1,326 @@
+"""
+numpy_vectorstore.py
+
+Dependency-free exact vectorstore for small-to-medium corpora.
+
+NumpyVectorStore keeps L2-normalized vectors in one float32/float16 matrix,
+memory-mapped from disk when a directory is given. A search is a single BLAS
+matmul of the (batched) query vectors against the matrix followed by
+np.argpartition for the top k, so results equal a FAISS flat inner-product
+index. Scores are cosine similarities (higher is better).
+
+It is a regular LangChain VectorStore: as_retriever, add_documents(ids=...),
+delete(ids) and get_by_ids work as usual, and vectorstores.upsert_chunks /
+delete_chunks support it.
+
+The store assumes a single writer per directory at a time; call save() to
+commit documents and vectors together. Vectors are written straight into the
+memory-mapped matrix, so the first write after a save() or load() removes
+meta.json: until the next save() the directory holds no valid snapshot.
+"""
+
+import json
+import logging
+import os
+import uuid
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+logger = logging.getLogger(__name__)
+
+VECTORS_FILENAME = "vectors.mmap"
+DOCUMENTS_FILENAME = "documents.jsonl"
+META_FILENAME = "meta.json"
+_INITIAL_CAPACITY = 1024
+_FLOAT16_BLOCK_ROWS = 65536  # float16 rows upcast per matmul (BLAS has no half-precision gemm)
+_QUERY_BATCH = 256           # queries scored at once, bounding the (queries x rows) score matrix
+
+
+def _normalize(vectors) -> np.ndarray:
+    vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    return vectors / np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+
+
+class NumpyVectorStore(VectorStore):
+    """
+    Exact cosine-similarity vectorstore over a (memory-mapped) NumPy matrix.
+
+    Args:
+        embedding: Embeddings model used for documents and queries.
+        directory: Where to keep the matrix and documents; None keeps everything in memory.
+            A new store starts empty; use NumpyVectorStore.load to reopen a saved one.
+        dtype: "float32" or "float16" storage (float16 halves memory, ~1e-3 score error).
+    """
+
+    def __init__(self, embedding: Embeddings, directory: Optional[str] = None, dtype: str = "float32"):
+        if dtype not in ("float32", "float16"):
+            raise ValueError(f"Unsupported vector dtype: {dtype}")
+        self._embedding = embedding
+        self.directory = directory
+        self.dtype = np.dtype(dtype)
+        self.fingerprint: Optional[str] = None
+        self.dim: Optional[int] = None
+        self._matrix: Optional[np.ndarray] = None  # (capacity, dim); rows [:len(self._ids)] are live
+        self._ids: List[str] = []
+        self._docs: List[Document] = []
+        self._rows: Dict[str, int] = {}
+        self._committed = False  # meta.json describes the matrix on disk
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            self._vectors_path = os.path.join(directory, VECTORS_FILENAME)
+            # Invalidate meta.json first so a crash never pairs old metadata with new vectors
+            for filename in (META_FILENAME, VECTORS_FILENAME):
+                if os.path.exists(os.path.join(directory, filename)):
+                    os.remove(os.path.join(directory, filename))
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self._embedding
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    # --- persistence ------------------------------------------------------
+
+    @staticmethod
+    def stored_fingerprint(directory: str) -> Optional[str]:
+        """Fingerprint recorded by the last save() in directory, if any."""
+        try:
+            with open(os.path.join(directory, META_FILENAME), "r", encoding="utf-8") as f:
+                return json.load(f).get("fingerprint")
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    @classmethod
+    def load(cls, directory: str, embedding: Embeddings, read_only: bool = False) -> "NumpyVectorStore":
+        """Reopen a store written by save(); the matrix is memory-mapped, not read."""
+        with open(os.path.join(directory, META_FILENAME), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        store = cls.__new__(cls)
+        store._embedding = embedding
+        store.directory = directory
+        store.dtype = np.dtype(meta["dtype"])
+        store.fingerprint = meta.get("fingerprint")
+        store.dim = meta["dim"]
+        store._vectors_path = os.path.join(directory, VECTORS_FILENAME)
+        store._ids, store._docs = [], []
+        with open(os.path.join(directory, DOCUMENTS_FILENAME), "r", encoding="utf-8") as f:
+            for line in f:
+                record = json.loads(line)
+                store._ids.append(record["id"])
+                store._docs.append(Document(page_content=record["text"], metadata=record["metadata"], id=record["id"]))
+        store._rows = {doc_id: row for row, doc_id in enumerate(store._ids)}
+        store._committed = True
+        store._matrix = None
+        if store.dim is not None:
+            store._matrix = np.memmap(
+                store._vectors_path,
+                dtype=store.dtype,
+                mode="r" if read_only else "r+",
+                shape=(meta["capacity"], store.dim),
+            )
+        logger.info("Loaded NumPy vectorstore (%d vectors) from %s", len(store._ids), directory)
+        return store
+
+    def save(self, fingerprint: Optional[str] = None):
+        """Flush the matrix and write documents and metadata; meta.json is written last."""
+        if not self.directory:
+            raise ValueError("save() needs a store created with a directory.")
+        self.fingerprint = fingerprint
+        if isinstance(self._matrix, np.memmap):
+            self._matrix.flush()
+        docs_path = os.path.join(self.directory, DOCUMENTS_FILENAME)
+        with open(f"{docs_path}.tmp", "w", encoding="utf-8") as f:
+            for doc_id, doc in zip(self._ids, self._docs):
+                f.write(json.dumps({"id": doc_id, "text": doc.page_content, "metadata": doc.metadata}, default=str))
+                f.write("\n")
+        os.replace(f"{docs_path}.tmp", docs_path)
+        meta_path = os.path.join(self.directory, META_FILENAME)
+        meta = {
+            "dim": self.dim,
+            "dtype": self.dtype.name,
+            "count": len(self._ids),
+            "capacity": 0 if self._matrix is None else len(self._matrix),
+            "fingerprint": fingerprint,
+        }
+        with open(f"{meta_path}.tmp", "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(f"{meta_path}.tmp", meta_path)
+        self._committed = True
+
+    def _uncommit(self):
+        """Remove meta.json before the first write into a saved matrix, so a stale snapshot is never reloaded."""
+        if not self._committed:
+            return
+        meta_path = os.path.join(self.directory, META_FILENAME)
+        if os.path.exists(meta_path):
+            os.remove(meta_path)
+        self._committed = False
+
+    # --- storage ----------------------------------------------------------
+
+    def _reserve(self, count: int):
+        """Make room for count live rows, doubling the matrix as needed."""
+        capacity = 0 if self._matrix is None else len(self._matrix)
+        if count <= capacity:
+            return
+        capacity = max(capacity * 2, count, _INITIAL_CAPACITY)
+        if not self.directory:
+            matrix = np.zeros((capacity, self.dim), dtype=self.dtype)
+            if self._matrix is not None:
+                matrix[:len(self._ids)] = self._matrix[:len(self._ids)]
+            self._matrix = matrix
+            return
+        if self._matrix is not None:
+            self._matrix.flush()
+            self._matrix = None
+        with open(self._vectors_path, "ab") as f:
+            f.truncate(capacity * self.dim * self.dtype.itemsize)
+        self._matrix = np.memmap(self._vectors_path, dtype=self.dtype, mode="r+", shape=(capacity, self.dim))
+
+    def add_embeddings(
+        self,
+        texts: Sequence[str],
+        vectors,
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+    ) -> List[str]:
+        """Add pre-computed vectors; an existing id is overwritten in place."""
+        vectors = _normalize(vectors)
+        ids = list(ids) if ids is not None else [str(uuid.uuid4()) for _ in texts]
+        metadatas = metadatas or [{} for _ in texts]
+        if self.dim is None:
+            self.dim = vectors.shape[1]
+        elif vectors.shape[1] != self.dim:
+            raise ValueError(f"Vector dimension {vectors.shape[1]} does not match the store's {self.dim}")
+
+        self._uncommit()
+        new_ids = [doc_id for doc_id in dict.fromkeys(ids) if doc_id not in self._rows]
+        self._reserve(len(self._ids) + len(new_ids))
+        for doc_id in new_ids:
+            self._rows[doc_id] = len(self._ids)
+            self._ids.append(doc_id)
+            self._docs.append(None)
+
+        rows = np.array([self._rows[doc_id] for doc_id in ids], dtype=np.int64)
+        self._matrix[rows] = vectors.astype(self.dtype)  # repeated ids: the last one wins
+        for row, doc_id, text, metadata in zip(rows, ids, texts, metadatas):
+            self._docs[row] = Document(page_content=text, metadata=metadata or {}, id=doc_id)
+        return ids
+
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[List[dict]] = None,
+        *,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        texts = list(texts)
+        if not texts:
+            return []
+        return self.add_embeddings(texts, self._embedding.embed_documents(texts), metadatas, ids)
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        """Remove ids (unknown ids are ignored); the last row moves into each freed row."""
+        ids = [doc_id for doc_id in ids or [] if doc_id in self._rows]
+        if ids:
+            self._uncommit()
+        for doc_id in ids:
+            row = self._rows.pop(doc_id, None)
+            if row is None:
+                continue
+            last = len(self._ids) - 1
+            if row != last:
+                self._matrix[row] = self._matrix[last]
+                self._ids[row], self._docs[row] = self._ids[last], self._docs[last]
+                self._rows[self._ids[row]] = row
+            self._ids.pop()
+            self._docs.pop()
+        return True
+
+    def get_by_ids(self, ids: Sequence[str], /) -> List[Document]:
+        return [self._docs[self._rows[doc_id]] for doc_id in ids if doc_id in self._rows]
+
+    # --- search -----------------------------------------------------------
+
+    def _scores(self, queries: np.ndarray) -> np.ndarray:
+        """Cosine similarity of normalized queries against every live row, (queries x rows) float32."""
+        matrix = self._matrix[:len(self._ids)]
+        if self.dtype == np.float32:
+            return queries @ matrix.T
+        scores = np.empty((len(queries), len(matrix)), dtype=np.float32)
+        for start in range(0, len(matrix), _FLOAT16_BLOCK_ROWS):
+            block = matrix[start:start + _FLOAT16_BLOCK_ROWS].astype(np.float32)
+            scores[:, start:start + len(block)] = queries @ block.T
+        return scores
+
+    def search_vectors(self, query_vectors, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Exact top-k for a batch of query vectors.
+
+        Returns:
+            (rows, scores): two (queries x min(k, len(store))) arrays, best first.
+        """
+        queries = _normalize(query_vectors)
+        k = min(k, len(self._ids))
+        rows = np.empty((len(queries), max(k, 0)), dtype=np.int64)
+        scores = np.empty((len(queries), max(k, 0)), dtype=np.float32)
+        if k <= 0:
+            return rows, scores
+
+        for start in range(0, len(queries), _QUERY_BATCH):
+            batch_scores = self._scores(queries[start:start + _QUERY_BATCH])
+            if k < batch_scores.shape[1]:
+                top = np.argpartition(-batch_scores, k - 1, axis=1)[:, :k]
+            else:
+                top = np.broadcast_to(np.arange(batch_scores.shape[1]), batch_scores.shape)
+            top_scores = np.take_along_axis(batch_scores, top, axis=1)
+            order = np.argsort(-top_scores, axis=1, kind="stable")
+            rows[start:start + len(top)] = np.take_along_axis(top, order, axis=1)
+            scores[start:start + len(top)] = np.take_along_axis(top_scores, order, axis=1)
+        return rows, scores
+
+    def similarity_search_with_score_by_vector(
+        self, embedding: List[float], k: int = 4, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        rows, scores = self.search_vectors([embedding], k)
+        return [(self._docs[row], float(score)) for row, score in zip(rows[0], scores[0])]
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score_by_vector(embedding, k)]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, **kwargs: Any) -> List[Tuple[Document, float]]:
+        return self.similarity_search_with_score_by_vector(self._embedding.embed_query(query), k)
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k)]
+
+    def batch_similarity_search(self, queries: List[str], k: int = 4) -> List[List[Document]]:
+        """Top-k documents for several queries, scored in one matmul."""
+        rows, _ = self.search_vectors([self._embedding.embed_query(query) for query in queries], k)
+        return [[self._docs[row] for row in query_rows] for query_rows in rows]
+
+    def _select_relevance_score_fn(self):
+        # Scores already are cosine similarities
+        return lambda score: score
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts: List[str],
+        embedding: Embeddings,
+        metadatas: Optional[List[dict]] = None,
+        *,
+        ids: Optional[List[str]] = None,
+        directory: Optional[str] = None,
+        dtype: str = "float32",
+        **kwargs: Any,
+    ) -> "NumpyVectorStore":
+        store = cls(embedding, directory=directory, dtype=dtype)
+        store.add_texts(texts, metadatas, ids=ids)
+        return store
@@ -0,0 +1,103 @@
+"""
+query_cache.py
+
+Bounded LRU cache (with optional TTL) of query embeddings for the retrieval hot path.
+
+Entries are keyed on the embedding model and the query text with whitespace
+collapsed (case is kept: embedding models can be case-sensitive), so repeated
+questions skip the embedding call. The cache records hit rate and the embedding latency saved by hits.
+"""
+
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, List, Optional
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_query(query: str) -> str:
+    """Collapse runs of whitespace and strip the ends; case and punctuation are kept."""
+    return _WHITESPACE.sub(" ", query).strip()
+
+
+class QueryEmbeddingCache:
+    """
+    Thread-safe LRU of query vectors.
+
+    Args:
+        max_size: Maximum number of cached queries (0 disables caching).
+        ttl_seconds: Optional lifetime of an entry; None keeps entries until evicted.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl_seconds: Optional[float] = None):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()  # key -> (vector, latency, created)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+        self.embed_seconds = 0.0
+
+    def get_or_embed(self, query: str, model_key: str, embed: Callable[[str], List[float]]) -> List[float]:
+        """Return the cached vector of query, or embed it with embed(query) and cache it."""
+        key = (model_key, normalize_query(query))
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl_seconds is not None and now - entry[2] > self.ttl_seconds:
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                self.saved_seconds += entry[1]
+                # Callers get their own list, so mutating it cannot corrupt the cache
+                return list(entry[0])
+            self.misses += 1
+
+        # Embed outside the lock; concurrent misses on the same query just embed twice
+        start = time.perf_counter()
+        vector = embed(query)
+        latency = time.perf_counter() - start
+
+        with self._lock:
+            self.embed_seconds += latency
+            if self.max_size > 0:
+                self._entries[key] = (list(vector), latency, now)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+        return vector
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Return hit rate and the embedding time saved by hits."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "saved_seconds": self.saved_seconds,
+                "avg_embed_seconds": self.embed_seconds / self.misses if self.misses else 0.0,
+            }
+
+
+_shared_cache: Optional[QueryEmbeddingCache] = None
+_shared_lock = threading.Lock()
+
+
+def get_query_cache() -> QueryEmbeddingCache:
+    """Process-wide cache shared by every Retriever (and so every RAG architecture)."""
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = QueryEmbeddingCache()
+        return _shared_cache
@@ -1,11 +1,15 @@
 import os
 from dotenv import load_dotenv
 
-from retrievers import Retriever
+from retrievers import Retriever, dense_retriever
+from chunk_cache import load_chunk_cache
 from splitters import split_documents
+from dedup import apply_dedup
 from data_loader import load_file, load_directory
-from embeddings import load_embeddings_model
+from embeddings import acquire_embeddings_model
+from model_registry import release_pipeline
 from vectorstores import build_vectorstore
+from manifest import build_incremental_vectorstore
 from generator import Generator
 from rag_chain import RAGChain
 from memory import ConversationMemory
@@ -21,6 +25,7 @@ class AgenticRAG:
         load_dotenv()
 
         # Load config sections with defaults
+        data_cfg = config.get("data", {}) if config else {}
         splitter_cfg = config.get("splitter", {}) if config else {}
         emb_cfg = config.get("embeddings", {}) if config else {}
         retr_cfg = config.get("retriever", {}) if config else {}
@@ -28,43 +33,84 @@ class AgenticRAG:
         gen_cfg = config.get("generator", {}) if config else {}
         rerank_cfg = config.get("reranker", {}) if config else {}
 
-        # === Load documents ===
-        if file_path:
-            docs = load_file(file_path)
-        else:
-            docs = load_directory("./data")
-
-        if not docs:
-            raise ValueError("No documents found!")
-
-        # === Split documents ===
-        chunks = split_documents(
+        splitter_kwargs = dict(
             splitter_name=splitter_cfg.get("name", "recursive"),
-            documents=docs,
             chunk_size=splitter_cfg.get("chunk_size", 500),
             chunk_overlap=splitter_cfg.get("chunk_overlap", 50),
+            num_workers=splitter_cfg.get("num_workers", 1),
+            cache=load_chunk_cache(splitter_cfg),
         )
 
         # === Embeddings ===
-        self.emb = load_embeddings_model(
+        self.emb = acquire_embeddings_model(
             provider=emb_cfg.get("provider", "huggingface"),
             model_name=emb_cfg.get("model_name", "sentence-transformers/all-MiniLM-L6-v2"),
+            cache_dir=emb_cfg.get("cache_dir"),
+            cache_dtype=emb_cfg.get("cache_dtype", "float32"),
+            cache_max_mb=emb_cfg.get("cache_max_mb"),
+            batching=emb_cfg.get("batching"),
+            local_batching=emb_cfg.get("local_batching"),
+            onnx=emb_cfg.get("onnx"),
+            device=emb_cfg.get("device"),
         )
 
-        # === Vectorstore ===
-        vectorstore = build_vectorstore(
-            name=vec_cfg.get("name", "faiss"),
-            chunks=chunks,
-            embeddings_model=self.emb,
-            persist_directory=vec_cfg.get("persist_directory", None),
-            index_name=vec_cfg.get("index_name", None),
-            embeddings_dim=vec_cfg.get("embeddings_dim", None),
-            similarity_metric=vec_cfg.get("similarity_metric", "cosine"),
-        )
+        ingestion_cfg = config.get("ingestion", {}) if config else {}
+        if not file_path and ingestion_cfg.get("incremental", False):
+            # === Incremental indexing: only new/modified files are split and embedded ===
+            self.vectorstore, _, diff = build_incremental_vectorstore(
+                directory=data_cfg.get("path", "./data"),
+                name=vec_cfg.get("name", "faiss"),
+                embeddings_model=self.emb,
+                splitter_kwargs=splitter_kwargs,
+                config={"embeddings": {k: emb_cfg.get(k) for k in ("provider", "model_name")}},
+                num_workers=data_cfg.get("num_workers", 1),
+                pdf_cache_dir=data_cfg.get("pdf_cache_dir"),
+                persist_directory=vec_cfg.get("persist_directory"),
+            )
+            if not diff.loaded and not diff.unchanged:
+                raise ValueError("No documents found!")
+        else:
+            # === Load documents ===
+            if file_path:
+                docs = load_file(
+                    file_path,
+                    num_workers=data_cfg.get("num_workers", 1),
+                    pdf_cache_dir=data_cfg.get("pdf_cache_dir"),
+                )
+            else:
+                docs = load_directory(
+                    data_cfg.get("path", "./data"),
+                    num_workers=data_cfg.get("num_workers", 1),
+                    pdf_cache_dir=data_cfg.get("pdf_cache_dir"),
+                )
+
+            if not docs:
+                raise ValueError("No documents found!")
+
+            # === Split documents ===
+            chunks = split_documents(documents=docs, **splitter_kwargs)
+            chunks = apply_dedup(chunks, config.get("dedup") if config else None)
+
+            # === Vectorstore ===
+            self.vectorstore = build_vectorstore(
+                name=vec_cfg.get("name", "faiss"),
+                chunks=chunks,
+                embeddings_model=self.emb,
+                persist_directory=vec_cfg.get("persist_directory", None),
+                index_name=vec_cfg.get("index_name", None),
+                embeddings_dim=vec_cfg.get("embeddings_dim", None),
+                similarity_metric=vec_cfg.get("similarity_metric", "cosine"),
+                faiss_persist_directory=vec_cfg.get("faiss_persist_directory"),
+                faiss_index=vec_cfg.get("faiss_index"),
+                numpy_store=vec_cfg.get("numpy_store"),
+                sharded=vec_cfg.get("sharded"),
+                bulk_ingest=vec_cfg.get("bulk_ingest"),
+                weaviate=vec_cfg.get("weaviate"),
+            )
 
         # === Local retriever ===
-        self.local_retriever = vectorstore.as_retriever(
-            search_kwargs={"k": retr_cfg.get("k", 3)}  # top-k docs
+        self.local_retriever = dense_retriever(
+            self.vectorstore, k=retr_cfg.get("k", 3)  # top-k docs, query embeddings cached
         )
 
         # === Web retriever ===
@@ -132,3 +178,7 @@ class AgenticRAG:
             self.memory.add_message("assistant", answer)
 
         return answer
+
+    def close(self):
+        """Release this pipeline's shared models and vectorstore (see model_registry.release_pipeline)."""
+        release_pipeline(self.emb, vectorstore=self.vectorstore)
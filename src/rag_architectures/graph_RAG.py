@@ -3,6 +3,7 @@ import yaml
 from dotenv import load_dotenv
 
 from data_loader import load_file, load_directory
+from chunk_cache import load_chunk_cache
 from splitters import split_documents
 from memory import ConversationMemory
 from generator import Generator
@@ -25,10 +26,19 @@ class GraphRAG:
             cfg = yaml.safe_load(f)
 
         # --- 2. Load documents ---
+        data_cfg = cfg.get("data", {})
         if file_path:
-            docs = load_file(file_path)
+            docs = load_file(
+                file_path,
+                num_workers=data_cfg.get("num_workers", 1),
+                pdf_cache_dir=data_cfg.get("pdf_cache_dir"),
+            )
         else:
-            docs = load_directory(cfg.get("data", {}).get("path", "./data"))
+            docs = load_directory(
+                data_cfg.get("path", "./data"),
+                num_workers=data_cfg.get("num_workers", 1),
+                pdf_cache_dir=data_cfg.get("pdf_cache_dir"),
+            )
 
         if not docs:
             raise ValueError("No documents found!")
@@ -38,6 +48,8 @@ class GraphRAG:
             documents=docs,
             chunk_size=cfg["splitter"]["chunk_size"],
             chunk_overlap=0,
+            num_workers=cfg["splitter"].get("num_workers", 1),
+            cache=load_chunk_cache(cfg["splitter"]),
         )
 
         # --- 3. Initialize Generator (LLM client) ---
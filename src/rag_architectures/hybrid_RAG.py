@@ -2,10 +2,14 @@ import os
 from dotenv import load_dotenv
 import yaml
 
+from chunk_cache import load_chunk_cache
 from splitters import split_documents
+from dedup import apply_dedup
 from data_loader import load_file, load_directory
-from embeddings import load_embeddings_model
+from embeddings import acquire_embeddings_model
+from model_registry import release_pipeline
 from vectorstores import build_vectorstore
+from manifest import build_incremental_vectorstore
 from retrievers import Retriever
 from generator import Generator
 from memory import ConversationMemory
@@ -15,7 +19,8 @@ from rag_chain import RAGChain
 class HybridRAG:
     def __init__(self, config_path: str = "./config/config.yaml", file_path: str = None):
         """
-        Initialize a Hybrid RAG pipeline (dense + sparse retrievers) reading all parameters from config.
+        Initialize a Hybrid RAG pipeline (dense + sparse retrievers run concurrently and fused)
+        reading all parameters from config.
         """
         load_dotenv()
 
@@ -23,50 +28,98 @@ class HybridRAG:
         with open(config_path, "r", encoding="utf-8") as f:
             cfg = yaml.safe_load(f)
 
-        # 1. Load documents
-        if file_path:
-            docs = load_file(file_path)
-        else:
-            docs = load_directory("./data")
-
-        if not docs:
-            raise ValueError("No documents found!")
-
-        # 2. Split documents
+        data_cfg = cfg.get("data", {})
         splitter_cfg = cfg.get("splitter", {})
-        chunks = split_documents(
-            documents=docs,
+        splitter_kwargs = dict(
             splitter_name=splitter_cfg.get("name", "recursive"),
             chunk_size=splitter_cfg.get("chunk_size", 500),
             chunk_overlap=splitter_cfg.get("chunk_overlap", 50),
             separator=splitter_cfg.get("separator", "\n\n"),
             token_chunk_size=splitter_cfg.get("token_chunk_size", 256),
             token_chunk_overlap=splitter_cfg.get("token_chunk_overlap", 20),
+            num_workers=splitter_cfg.get("num_workers", 1),
+            cache=load_chunk_cache(splitter_cfg),
         )
 
-        # 3. Load embeddings
+        # 1. Load embeddings
         emb_cfg = cfg.get("embeddings", {})
-        self.emb = load_embeddings_model(
+        self.emb = acquire_embeddings_model(
             provider=emb_cfg.get("provider", "huggingface"),
             model_name=emb_cfg.get("model_name", "sentence-transformers/all-MiniLM-L6-v2"),
+            cache_dir=emb_cfg.get("cache_dir"),
+            cache_dtype=emb_cfg.get("cache_dtype", "float32"),
+            cache_max_mb=emb_cfg.get("cache_max_mb"),
+            batching=emb_cfg.get("batching"),
+            local_batching=emb_cfg.get("local_batching"),
+            onnx=emb_cfg.get("onnx"),
+            device=emb_cfg.get("device"),
         )
 
-        # 4. Build vectorstore
         vs_cfg = cfg.get("vectorstore", {})
-        vectorstore = build_vectorstore(
-            name=vs_cfg.get("name", "faiss"),
-            chunks=chunks,
-            embeddings_model=self.emb,
-        )
+        retr_cfg = cfg.get("retriever", {})
+        sparse_index = None
+        if not file_path and cfg.get("ingestion", {}).get("incremental", False):
+            # 2-4. Incremental indexing: only new/modified files are split and embedded
+            self.vectorstore, sparse_index, diff = build_incremental_vectorstore(
+                directory=data_cfg.get("path", "./data"),
+                name=vs_cfg.get("name", "faiss"),
+                embeddings_model=self.emb,
+                splitter_kwargs=splitter_kwargs,
+                config={"embeddings": {k: emb_cfg.get(k) for k in ("provider", "model_name")}},
+                num_workers=data_cfg.get("num_workers", 1),
+                pdf_cache_dir=data_cfg.get("pdf_cache_dir"),
+                # The BM25 index gets the same upserts and deletes as the vectorstore
+                sparse=retr_cfg.get("sparse") or {},
+                persist_directory=vs_cfg.get("persist_directory"),
+            )
+            if not diff.loaded and not diff.unchanged:
+                raise ValueError("No documents found!")
+            chunks = None  # Only the changed files are split; sparse_index covers the whole corpus
+        else:
+            # 2. Load documents
+            if file_path:
+                docs = load_file(
+                    file_path,
+                    num_workers=data_cfg.get("num_workers", 1),
+                    pdf_cache_dir=data_cfg.get("pdf_cache_dir"),
+                )
+            else:
+                docs = load_directory(
+                    data_cfg.get("path", "./data"),
+                    num_workers=data_cfg.get("num_workers", 1),
+                    pdf_cache_dir=data_cfg.get("pdf_cache_dir"),
+                )
+
+            if not docs:
+                raise ValueError("No documents found!")
+
+            # 3. Split documents
+            chunks = split_documents(documents=docs, **splitter_kwargs)
+            chunks = apply_dedup(chunks, cfg.get("dedup"))
+
+            # 4. Build vectorstore
+            self.vectorstore = build_vectorstore(
+                name=vs_cfg.get("name", "faiss"),
+                chunks=chunks,
+                embeddings_model=self.emb,
+                faiss_persist_directory=vs_cfg.get("faiss_persist_directory"),
+                faiss_index=vs_cfg.get("faiss_index"),
+                numpy_store=vs_cfg.get("numpy_store"),
+                sharded=vs_cfg.get("sharded"),
+                bulk_ingest=vs_cfg.get("bulk_ingest"),
+                weaviate=vs_cfg.get("weaviate"),
+            )
 
         # 5. Build hybrid retriever
-        retr_cfg = cfg.get("retriever", {})
         self.retriever = Retriever(
             retriever_type="hybrid",
-            vectorstore=vectorstore,
-            docs=docs,
+            vectorstore=self.vectorstore,
+            docs=chunks,
+            sparse_index=sparse_index,
             k=retr_cfg.get("k", 3),
             weights= [0.6, 0.4],
+            sparse=retr_cfg.get("sparse"),
+            hybrid=retr_cfg.get("hybrid"),
         )
 
         # 6. Generator
@@ -99,3 +152,7 @@ class HybridRAG:
         """
         response = self.conversation_chain.invoke(query)
         return str(response)
+
+    def close(self):
+        """Release this pipeline's shared models and vectorstore (see model_registry.release_pipeline)."""
+        release_pipeline(self.emb, vectorstore=self.vectorstore)
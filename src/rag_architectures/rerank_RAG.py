@@ -2,19 +2,20 @@ import os
 from dotenv import load_dotenv
 import yaml
 
+from chunk_cache import load_chunk_cache
 from splitters import split_documents
+from dedup import apply_dedup
 from data_loader import load_file, load_directory
-from embeddings import load_embeddings_model
+from embeddings import acquire_embeddings_model
+from model_registry import release_pipeline
 from vectorstores import build_vectorstore
+from manifest import build_incremental_vectorstore
 from retrievers import Retriever
-from rerankers import RerankRetriever
+from rerankers import RerankRetriever, acquire_cross_encoder  # CrossEncoder shared via the model registry
 from generator import Generator
 from memory import ConversationMemory
 from rag_chain import RAGChain
 
-# HuggingFace reranker
-from sentence_transformers import CrossEncoder
-
 
 class RerankRAG:
     def __init__(self, file_path: str = None, config_path: str = "./config/config.yaml"):
@@ -27,35 +28,77 @@ class RerankRAG:
         with open(config_path, "r", encoding="utf-8") as f:
             cfg = yaml.safe_load(f)
             self.cfg = cfg
-        # --- 1. Load documents ---
-        if file_path:
-            docs = load_file(file_path)
-        else:
-            docs = load_directory("./data")  # default folder
-
-        if not docs:
-            raise ValueError("No documents found!")
-
-        # --- 2. Split into chunks ---
-        chunks = split_documents(
+        data_cfg = cfg.get("data", {})
+        splitter_kwargs = dict(
             splitter_name=cfg["splitter"]["name"],          # Options: "recursive", "character", "token"
-            documents=docs,
             chunk_size=cfg["splitter"]["chunk_size"],      # Max chunk size for selected splitter
             chunk_overlap=cfg["splitter"]["chunk_overlap"],# Overlap between chunks
+            num_workers=cfg["splitter"].get("num_workers", 1),  # Parallel splitting processes
+            cache=load_chunk_cache(cfg["splitter"]),             # On-disk chunk cache (splitter.cache_dir)
         )
 
-        # --- 3. Embeddings ---
-        self.emb = load_embeddings_model(
+        # --- 1. Embeddings ---
+        self.emb = acquire_embeddings_model(
             provider=cfg["embeddings"]["provider"],        # Options: "huggingface", "openai", "cohere"
             model_name=cfg["embeddings"]["model_name"],
+            cache_dir=cfg["embeddings"].get("cache_dir"),              # Persistent embedding cache (null = off)
+            cache_dtype=cfg["embeddings"].get("cache_dtype", "float32"),
+            cache_max_mb=cfg["embeddings"].get("cache_max_mb"),
+            batching=cfg["embeddings"].get("batching"),                 # Concurrent API batching (openai/cohere)
+            local_batching=cfg["embeddings"].get("local_batching"),     # Length-bucketed CPU batching (huggingface)
+            onnx=cfg["embeddings"].get("onnx"),                         # ONNX export settings (provider "onnx")
+            device=cfg["embeddings"].get("device"),                     # e.g. "cpu", "cuda" (null = auto)
         )
 
-        # --- 4. Build FAISS vectorstore (dense retriever) ---
-        self.vectorstore = build_vectorstore(
-            name=cfg["vectorstore"]["name"],               # Options: "faiss", "chroma", "weaviate", "pinecone"
-            chunks=chunks,
-            embeddings_model=self.emb,
-        )
+        if not file_path and cfg.get("ingestion", {}).get("incremental", False):
+            # --- 2. Incremental indexing: only new/modified files are embedded ---
+            self.vectorstore, _, diff = build_incremental_vectorstore(
+                directory=data_cfg.get("path", "./data"),
+                name=cfg["vectorstore"]["name"],
+                embeddings_model=self.emb,
+                splitter_kwargs=splitter_kwargs,
+                config={"embeddings": {k: cfg["embeddings"][k] for k in ("provider", "model_name")}},
+                num_workers=data_cfg.get("num_workers", 1),
+                pdf_cache_dir=data_cfg.get("pdf_cache_dir"),
+                persist_directory=cfg["vectorstore"].get("persist_directory"),
+            )
+            if not diff.loaded and not diff.unchanged:
+                raise ValueError("No documents found!")
+        else:
+            # --- 2. Load documents ---
+            if file_path:
+                docs = load_file(
+                    file_path,
+                    num_workers=data_cfg.get("num_workers", 1),
+                    pdf_cache_dir=data_cfg.get("pdf_cache_dir"),
+                )
+            else:
+                docs = load_directory(
+                    data_cfg.get("path", "./data"),                # default folder
+                    num_workers=data_cfg.get("num_workers", 1),    # parallel file parsing
+                    pdf_cache_dir=data_cfg.get("pdf_cache_dir"),
+                )
+
+            if not docs:
+                raise ValueError("No documents found!")
+
+            # --- 3. Split into chunks ---
+            chunks = split_documents(documents=docs, **splitter_kwargs)
+            chunks = apply_dedup(chunks, cfg.get("dedup"))  # Drop exact/near-duplicate chunks
+
+            # --- 4. Build FAISS vectorstore (dense retriever) ---
+            self.vectorstore = build_vectorstore(
+                name=cfg["vectorstore"]["name"],               # Options: "faiss", "chroma", "weaviate", "pinecone", "numpy"
+                chunks=chunks,
+                embeddings_model=self.emb,
+                faiss_persist_directory=cfg["vectorstore"].get("faiss_persist_directory"),  # Reload FAISS if corpus unchanged
+                faiss_index=cfg["vectorstore"].get("faiss_index"),  # Flat, IVF or HNSW index
+                numpy_store=cfg["vectorstore"].get("numpy_store"),
+                sharded=cfg["vectorstore"].get("sharded"),
+                bulk_ingest=cfg["vectorstore"].get("bulk_ingest"),
+                weaviate=cfg["vectorstore"].get("weaviate"),
+            )
+
         self.retriever = Retriever(
             retriever_type="dense",
             vectorstore=self.vectorstore,
@@ -63,7 +106,7 @@ class RerankRAG:
         )
 
         # --- 5. Reranker model ---
-        self.reranker = CrossEncoder(cfg["reranker"]["model_name"])
+        self.reranker = acquire_cross_encoder(cfg["reranker"]["model_name"], device=cfg["reranker"].get("device"))
 
         # --- 6. Generator (LLM client) ---
         gen_cfg = cfg["generator"]
@@ -98,3 +141,7 @@ class RerankRAG:
         """
         response = self.conversation_chain.invoke(query)
         return str(response)
+
+    def close(self):
+        """Release this pipeline's shared models and vectorstore (see model_registry.release_pipeline)."""
+        release_pipeline(self.emb, self.reranker, vectorstore=self.vectorstore)
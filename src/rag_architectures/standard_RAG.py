@@ -4,10 +4,14 @@ from dotenv import load_dotenv
 from rag_chain import RAGChain
 
 # Local imports
+from chunk_cache import load_chunk_cache
 from splitters import split_documents
+from dedup import apply_dedup
 from data_loader import load_file, load_directory
-from embeddings import load_embeddings_model
+from embeddings import acquire_embeddings_model
+from model_registry import release_pipeline
 from vectorstores import build_vectorstore
+from manifest import build_incremental_vectorstore
 from retrievers import Retriever
 from generator import Generator
 
@@ -23,41 +27,89 @@ class StandardRAG:
         with open("./config/config.yaml", "r") as f:
             config = yaml.safe_load(f)
 
-        # === File handling ===
-        if file_path:
-            docs = load_file(file_path)
-        else:
-            docs = load_directory("./data")
-
-        if not docs:
-            raise ValueError("No documents found!")
-
-        # === Splitter ===
+        data_cfg = config.get("data", {})
         splitter_cfg = config["splitter"]
-        chunks = split_documents(
+        splitter_kwargs = dict(
             splitter_name=splitter_cfg["name"],
-            documents=docs,
             chunk_size=splitter_cfg["chunk_size"],
             chunk_overlap=splitter_cfg["chunk_overlap"],
             separator=splitter_cfg.get("separator", None),
             token_chunk_size=splitter_cfg.get("token_chunk_size", None),
             token_chunk_overlap=splitter_cfg.get("token_chunk_overlap", None),
+            num_workers=splitter_cfg.get("num_workers", 1),
+            cache=load_chunk_cache(splitter_cfg),
         )
 
         # === Embeddings ===
         emb_cfg = config["embeddings"]
-        self.emb = load_embeddings_model(
+        self.emb = acquire_embeddings_model(
             provider=emb_cfg["provider"],
             model_name=emb_cfg["model_name"],
+            cache_dir=emb_cfg.get("cache_dir"),
+            cache_dtype=emb_cfg.get("cache_dtype", "float32"),
+            cache_max_mb=emb_cfg.get("cache_max_mb"),
+            batching=emb_cfg.get("batching"),
+            local_batching=emb_cfg.get("local_batching"),
+            onnx=emb_cfg.get("onnx"),
+            device=emb_cfg.get("device"),
         )
 
-        # === Vectorstore ===
         vs_cfg = config["vectorstore"]
-        self.vectorstore = build_vectorstore(
-            name=vs_cfg["name"],
-            chunks=chunks,
-            embeddings_model=self.emb,
-        )
+        retr_cfg = config["retriever"]
+        sparse_index = None
+        if not file_path and config.get("ingestion", {}).get("incremental", False):
+            # === Incremental indexing: only new/modified files are embedded ===
+            self.vectorstore, sparse_index, diff = build_incremental_vectorstore(
+                directory=data_cfg.get("path", "./data"),
+                name=vs_cfg["name"],
+                embeddings_model=self.emb,
+                splitter_kwargs=splitter_kwargs,
+                config={"embeddings": {k: emb_cfg[k] for k in ("provider", "model_name")}},
+                num_workers=data_cfg.get("num_workers", 1),
+                pdf_cache_dir=data_cfg.get("pdf_cache_dir"),
+                # The BM25 index gets the same upserts and deletes as the vectorstore
+                sparse=(retr_cfg.get("sparse") or {}) if retr_cfg["type"] in ("sparse", "hybrid") else None,
+                persist_directory=vs_cfg.get("persist_directory"),
+            )
+            if not diff.loaded and not diff.unchanged:
+                raise ValueError("No documents found!")
+            chunks = None  # Only the changed files are split; sparse_index covers the whole corpus
+        else:
+            # === File handling ===
+            if file_path:
+                docs = load_file(
+                    file_path,
+                    num_workers=data_cfg.get("num_workers", 1),
+                    pdf_cache_dir=data_cfg.get("pdf_cache_dir"),
+                )
+            else:
+                docs = load_directory(
+                    data_cfg.get("path", "./data"),
+                    num_workers=data_cfg.get("num_workers", 1),
+                    pdf_cache_dir=data_cfg.get("pdf_cache_dir"),
+                )
+
+            if not docs:
+                raise ValueError("No documents found!")
+
+            # === Splitter ===
+            chunks = split_documents(documents=docs, **splitter_kwargs)
+
+            # === Deduplication ===
+            chunks = apply_dedup(chunks, config.get("dedup"))
+
+            # === Vectorstore ===
+            self.vectorstore = build_vectorstore(
+                name=vs_cfg["name"],
+                chunks=chunks,
+                embeddings_model=self.emb,
+                faiss_persist_directory=vs_cfg.get("faiss_persist_directory"),
+                faiss_index=vs_cfg.get("faiss_index"),
+                numpy_store=vs_cfg.get("numpy_store"),
+                sharded=vs_cfg.get("sharded"),
+                bulk_ingest=vs_cfg.get("bulk_ingest"),
+                weaviate=vs_cfg.get("weaviate"),
+            )
 
         # === Generator ===
         gen_cfg = config["generator"]
@@ -73,11 +125,14 @@ class StandardRAG:
         self.llm = generator.client
 
         # === Retriever ===
-        retr_cfg = config["retriever"]
         self.retriever = Retriever(
             retriever_type=retr_cfg["type"],
             vectorstore=self.vectorstore,
+            docs=chunks,
+            sparse_index=sparse_index,
             k=retr_cfg["k"],
+            sparse=retr_cfg.get("sparse"),
+            hybrid=retr_cfg.get("hybrid"),
         )
 
         # === Chain ===
@@ -94,3 +149,7 @@ class StandardRAG:
         """
         response = self.conversation_chain.invoke(query)
         return str(response)
+
+    def close(self):
+        """Release this pipeline's shared models and vectorstore (see model_registry.release_pipeline)."""
+        release_pipeline(self.emb, vectorstore=self.vectorstore)
@@ -17,3 +17,18 @@ class RerankRetriever:
         # 3. Sort by score (descending) and keep top-k
         reranked = sorted(zip(docs, scores), key=lambda x: x[1], reverse=True)
         return [doc for doc, _ in reranked[:self.top_k]]
+
+
+def acquire_cross_encoder(model_name: str, device: str = None):
+    """
+    sentence_transformers CrossEncoder shared through the process-wide model registry.
+    Release it with model_registry.get_model_registry().release(model).
+    """
+    from model_registry import get_model_registry
+
+    def load():
+        from sentence_transformers import CrossEncoder
+
+        return CrossEncoder(model_name, device=device)
+
+    return get_model_registry().acquire(("cross_encoder", "sentence_transformers", model_name, device or "auto"), load)
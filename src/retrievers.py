@@ -1,18 +1,246 @@
+import logging
 import os
+import threading
+import time
 import requests
-from typing import List, Any
-from langchain_community.retrievers import BM25Retriever
-from langchain.retrievers import EnsembleRetriever
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Optional, Tuple
+
+import numpy as np
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+from embeddings import embeddings_model_key
+from query_cache import QueryEmbeddingCache, get_query_cache
+from sparse_index import SparseIndex, build_sparse_index
+
+logger = logging.getLogger(__name__)
+
+HYBRID_FUSIONS = ("rrf", "score")
+
+
+class CachedVectorRetriever(BaseRetriever):
+    """
+    Vectorstore similarity search whose query embeddings go through a QueryEmbeddingCache.
+    Same results as vectorstore.as_retriever(search_kwargs={"k": k}).
+    """
+
+    vectorstore: Any
+    query_cache: Any
+    k: int = 3
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        embeddings = self.vectorstore.embeddings
+        vector = self.query_cache.get_or_embed(query, embeddings_model_key(embeddings), embeddings.embed_query)
+        return self.vectorstore.similarity_search_by_vector(vector, k=self.k)
+
+
+def dense_retriever(vectorstore, k: int, query_cache: QueryEmbeddingCache = None) -> BaseRetriever:
+    """
+    Top-k retriever over a vectorstore, caching query embeddings
+    (in the process-wide cache unless query_cache is given).
+    Falls back to vectorstore.as_retriever when the store exposes no embeddings.
+    """
+    if getattr(vectorstore, "embeddings", None) is None:
+        return vectorstore.as_retriever(search_kwargs={"k": k})
+    return CachedVectorRetriever(vectorstore=vectorstore, query_cache=query_cache or get_query_cache(), k=k)
+
+
+class SparseRetriever(BaseRetriever):
+    """
+    Top-k BM25 retriever over a SparseIndex (see sparse_index.py).
+    Only chunks sharing at least one term with the query are returned.
+    """
+
+    index: Any
+    k: int = 3
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        return [doc for doc, _ in self.index.search(query, k=self.k)]
+
+
+_leg_pool: Optional[ThreadPoolExecutor] = None
+_leg_pool_lock = threading.Lock()
+
+
+def _get_leg_pool() -> ThreadPoolExecutor:
+    """Threads running the sparse leg of hybrid queries (the dense leg runs in the caller)."""
+    global _leg_pool
+    with _leg_pool_lock:
+        if _leg_pool is None:
+            _leg_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="hybrid")
+        return _leg_pool
+
+
+def _rank_scores(count: int) -> np.ndarray:
+    """Stand-in scores (1, ..., 1/count) for a leg that returned no usable scores."""
+    return 1.0 / np.arange(1, count + 1, dtype=np.float64)
+
+
+def _min_max(scores) -> np.ndarray:
+    scores = np.asarray(scores, dtype=np.float64)
+    if not len(scores):
+        return scores
+    low, high = scores.min(), scores.max()
+    return np.ones_like(scores) if high == low else (scores - low) / (high - low)
+
+
+class HybridRetriever(BaseRetriever):
+    """
+    Dense + BM25 retriever that runs both legs concurrently and fuses them with NumPy.
+
+    fusion="rrf" is weighted reciprocal rank fusion, weight / (rrf_k + rank),
+    the same fusion as LangChain's EnsembleRetriever. fusion="score" min-max
+    normalizes each leg's scores (dense relevance scores, BM25 scores) and adds
+    them weighted. Each leg fetches its own depth (dense_k, sparse_k; default k)
+    and, like EnsembleRetriever, every fused candidate is returned (up to
+    dense_k + sparse_k documents) unless top_k cuts the fused list. Latencies of
+    the last query are kept in last_latency (milliseconds per leg, fusion and total).
+    """
+
+    vectorstore: Any
+    sparse_index: Any
+    query_cache: Any = None
+    k: int = 3
+    weights: List[float] = [0.6, 0.4]
+    fusion: str = "rrf"
+    rrf_k: int = 60
+    dense_k: Optional[int] = None
+    sparse_k: Optional[int] = None
+    top_k: Optional[int] = None
+    last_latency: Dict[str, float] = {}
+
+    def _dense(self, query: str) -> Tuple[List[Document], np.ndarray]:
+        """Dense leg: top dense_k documents and their relevance scores (higher is better)."""
+        k = self.dense_k or self.k
+        embeddings = getattr(self.vectorstore, "embeddings", None)
+        if embeddings is None:
+            pairs = self.vectorstore.similarity_search_with_score(query, k=k)
+        else:
+            vector = self.query_cache.get_or_embed(query, embeddings_model_key(embeddings), embeddings.embed_query)
+            pairs = self.vectorstore.similarity_search_with_score_by_vector(vector, k=k)
+        docs = [doc for doc, _ in pairs]
+        try:
+            relevance = self.vectorstore._select_relevance_score_fn()
+            scores = np.fromiter((relevance(score) for _, score in pairs), dtype=np.float64, count=len(pairs))
+        except NotImplementedError:
+            scores = _rank_scores(len(docs))
+        return docs, scores
+
+    def _sparse(self, query: str) -> Tuple[List[Document], np.ndarray]:
+        """Sparse leg: top sparse_k BM25 matches and their scores."""
+        pairs = self.sparse_index.search(query, k=self.sparse_k or self.k)
+        return [doc for doc, _ in pairs], np.array([score for _, score in pairs], dtype=np.float64)
+
+    def fuse(self, legs: List[Tuple[List[Document], np.ndarray]]) -> List[Document]:
+        """Fused candidates of several (documents, scores) legs, each sorted best first; top_k cuts the list."""
+        positions: Dict[str, int] = {}
+        candidates: List[Document] = []
+        leg_rows = []
+        for docs, _ in legs:
+            rows = []
+            for doc in docs:
+                key = doc.id or doc.page_content
+                if key not in positions:
+                    positions[key] = len(candidates)
+                    candidates.append(doc)
+                rows.append(positions[key])
+            leg_rows.append(np.array(rows, dtype=np.int64))
+
+        fused = np.zeros(len(candidates), dtype=np.float64)
+        for rows, (_, scores), weight in zip(leg_rows, legs, self.weights):
+            if self.fusion == "rrf":
+                contribution = 1.0 / (self.rrf_k + np.arange(1, len(rows) + 1, dtype=np.float64))
+            else:
+                contribution = _min_max(scores)
+            np.add.at(fused, rows, weight * contribution)
+
+        top = np.arange(len(candidates))
+        if self.top_k is not None and len(top) > self.top_k:
+            top = np.argpartition(-fused, self.top_k - 1)[:self.top_k]
+        # Ties keep first-seen order (dense first), like EnsembleRetriever
+        top = top[np.lexsort((top, -fused[top]))]
+        return [candidates[i] for i in top]
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        start = time.perf_counter()
+
+        def timed(leg):
+            leg_start = time.perf_counter()
+            result = leg(query)
+            return result, (time.perf_counter() - leg_start) * 1000
+
+        sparse_future = _get_leg_pool().submit(timed, self._sparse)
+        dense, dense_ms = timed(self._dense)
+        sparse, sparse_ms = sparse_future.result()
+
+        fusion_start = time.perf_counter()
+        docs = self.fuse([dense, sparse])
+        end = time.perf_counter()
+        self.last_latency = {
+            "dense_ms": dense_ms,
+            "sparse_ms": sparse_ms,
+            "fusion_ms": (end - fusion_start) * 1000,
+            "total_ms": (end - start) * 1000,
+        }
+        logger.debug("Hybrid query latency: %s", self.last_latency)
+        return docs
+
+
+def hybrid_retriever(
+    vectorstore,
+    sparse_index: SparseIndex,
+    k: int,
+    weights: List[float] = None,
+    query_cache: QueryEmbeddingCache = None,
+    fusion: str = "rrf",
+    rrf_k: int = 60,
+    dense_k: int = None,
+    sparse_k: int = None,
+    top_k: int = None,
+) -> HybridRetriever:
+    """
+    HybridRetriever over a vectorstore and a SparseIndex, caching query embeddings
+    (in the process-wide cache unless query_cache is given).
+    """
+    if fusion not in HYBRID_FUSIONS:
+        raise ValueError(f"Unknown hybrid fusion: {fusion} (expected one of {', '.join(HYBRID_FUSIONS)})")
+    return HybridRetriever(
+        vectorstore=vectorstore,
+        sparse_index=sparse_index,
+        query_cache=query_cache or get_query_cache(),
+        k=k,
+        weights=weights or [0.6, 0.4],
+        fusion=fusion,
+        rrf_k=rrf_k,
+        dense_k=dense_k,
+        sparse_k=sparse_k,
+        top_k=top_k,
+    )
 
 
 class Retriever:
     """
     Unified Retriever class supporting:
       - Dense retriever (vectorstore-based)
-      - Hybrid retriever (dense + BM25 sparse)
+      - Sparse retriever (BM25 inverted index over chunks)
+      - Hybrid retriever (dense + BM25 sparse, run concurrently and fused)
       - Web retriever (Serper API)
 
     All retrievers expose the same `.invoke(query)` method.
+    Dense and hybrid retrievers cache query embeddings (see query_cache.py);
+    pass query_cache to use a dedicated cache instead of the process-wide one.
+    Sparse and hybrid retrievers index docs (the chunks) with build_sparse_index,
+    configured by sparse (directory, k1, b, epsilon), or reuse a given sparse_index.
+    hybrid configures the fusion (see HybridRetriever): fusion ("rrf" or "score"),
+    rrf_k, the per-leg fetch depths dense_k and sparse_k, and top_k (fused list cut).
     """
 
     def __init__(
@@ -22,6 +250,10 @@ class Retriever:
         docs=None,
         k: int = 3,
         weights: List[float] = None,
+        query_cache: QueryEmbeddingCache = None,
+        sparse: dict = None,
+        sparse_index: SparseIndex = None,
+        hybrid: dict = None,
     ):
         self.retriever_type = retriever_type
         self.k = k
@@ -31,17 +263,20 @@ class Retriever:
         if retriever_type == "dense":
             if vectorstore is None:
                 raise ValueError("vectorstore is required for dense retriever.")
-            self.retriever = vectorstore.as_retriever(search_kwargs={"k": k})
+            self.retriever = dense_retriever(vectorstore, k, query_cache)
+
+        elif retriever_type == "sparse":
+            if docs is None and sparse_index is None:
+                raise ValueError("docs or sparse_index is required for sparse retriever.")
+            self.sparse_index = sparse_index or build_sparse_index(docs, **(sparse or {}))
+            self.retriever = SparseRetriever(index=self.sparse_index, k=k)
 
         elif retriever_type == "hybrid":
-            if vectorstore is None or docs is None:
-                raise ValueError("Both vectorstore and docs are required for hybrid retriever.")
-            dense_retriever = vectorstore.as_retriever(search_kwargs={"k": k})
-            sparse_retriever = BM25Retriever.from_documents(docs)
-            sparse_retriever.k = k
-            self.retriever = EnsembleRetriever(
-                retrievers=[dense_retriever, sparse_retriever],
-                weights=self.weights,
+            if vectorstore is None or (docs is None and sparse_index is None):
+                raise ValueError("Both vectorstore and docs (or sparse_index) are required for hybrid retriever.")
+            self.sparse_index = sparse_index or build_sparse_index(docs, **(sparse or {}))
+            self.retriever = hybrid_retriever(
+                vectorstore, self.sparse_index, k, self.weights, query_cache, **(hybrid or {})
             )
 
         elif retriever_type == "web":
@@ -54,7 +289,7 @@ class Retriever:
             raise ValueError(f"Unknown retriever_type: {retriever_type}")
 
     def invoke(self, query: str) -> List[Any]:
-        if self.retriever_type == "dense":
+        if self.retriever_type in ("dense", "sparse"):
             return self.retriever.invoke(query)
 
         elif self.retriever_type == "hybrid":
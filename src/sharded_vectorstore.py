@@ -0,0 +1,245 @@
+"""
+sharded_vectorstore.py
+
+FAISS index partitioned across N local shards with scatter-gather search.
+
+Every chunk is routed to a shard by a hash of its deterministic id, so the
+same chunk always lands in the same shard and an edit only touches (and, with
+a persist directory, only rebuilds) the shards whose chunks changed. Chunks
+are embedded once, in the calling thread, and the shards are then indexed in
+parallel, each one a regular FAISS store (same index types, snapshot files and
+memory-mapping as the "faiss" backend).
+A query is sent to all shards at once and the per-shard top-k lists are merged
+by score.
+
+Shards run on a thread pool rather than in separate processes: FAISS searches
+and BLAS release the GIL, so shards use separate cores without copying query
+vectors and results between processes, and persisted shards are memory-mapped
+files that the OS shares anyway.
+"""
+
+import hashlib
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+from local_embeddings import available_cpus
+from vectorstores import build_faiss_store, chunk_ids, faiss_held_ids, open_faiss_snapshot
+
+logger = logging.getLogger(__name__)
+
+
+def shard_of(chunk_id: str, num_shards: int) -> int:
+    """Shard of a chunk id; stable across runs and processes (unlike hash())."""
+    return int.from_bytes(hashlib.blake2b(chunk_id.encode("utf-8"), digest_size=8).digest(), "big") % num_shards
+
+
+class ShardedVectorStore(VectorStore):
+    """
+    N FAISS shards searched in parallel.
+
+    Args:
+        embedding: Embeddings model used for documents and queries.
+        shards: One LangChain FAISS store per shard (None for a shard with no chunks yet).
+        workers: Threads for building and searching shards (default: one per shard, up to the CPU count).
+    """
+
+    def __init__(self, embedding: Embeddings, shards: List[Optional[Any]], workers: Optional[int] = None):
+        if not shards:
+            raise ValueError("A sharded vectorstore needs at least one shard.")
+        self._embedding = embedding
+        self.shards = shards
+        self.workers = workers or min(len(shards), available_cpus())
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="shard")
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self._embedding
+
+    @property
+    def num_shards(self) -> int:
+        return len(self.shards)
+
+    def __len__(self) -> int:
+        return sum(shard.index.ntotal for shard in self.shards if shard is not None)
+
+    def close(self):
+        """Stop the shard worker threads."""
+        self._pool.shutdown(wait=False)
+
+    @classmethod
+    def from_chunks(
+        cls,
+        chunks: List[Document],
+        embedding: Embeddings,
+        num_shards: int = 4,
+        directory: Optional[str] = None,
+        workers: Optional[int] = None,
+        faiss_index: dict = None,
+    ) -> "ShardedVectorStore":
+        """
+        Partition chunks by id and build the shards in parallel.
+
+        With a directory, shard i is persisted in <directory>/shard-<i> and
+        reloaded (memory-mapped) on the next build if its own chunks are unchanged.
+        A reloaded shard is copied into RAM on its first write.
+        """
+        groups: List[List[Document]] = [[] for _ in range(num_shards)]
+        for chunk_id, chunk in zip(chunk_ids(chunks), chunks):
+            if not chunk.id:
+                # Shards must store the id chunks are routed by
+                chunk = Document(page_content=chunk.page_content, metadata=chunk.metadata, id=chunk_id)
+            groups[shard_of(chunk_id, num_shards)].append(chunk)
+
+        def shard_directory(shard: int) -> Optional[str]:
+            return os.path.join(directory, f"shard-{shard}") if directory else None
+
+        shards: List[Optional[Any]] = [None] * num_shards
+        if directory:
+            for shard, group in enumerate(groups):
+                if group:
+                    shards[shard] = open_faiss_snapshot(group, embedding, shard_directory(shard), faiss_index)
+        stale = [shard for shard, group in enumerate(groups) if group and shards[shard] is None]
+
+        # Embed in this thread: the shard threads must not call the (shared, possibly cached) model concurrently
+        texts = [chunk.page_content for shard in stale for chunk in groups[shard]]
+        vectors = embedding.embed_documents(texts) if texts else []
+        offsets = np.cumsum([0] + [len(groups[shard]) for shard in stale])
+
+        def build(position: int):
+            shard = stale[position]
+            return build_faiss_store(
+                groups[shard],
+                embedding,
+                faiss_index,
+                shard_directory(shard),
+                vectors=vectors[offsets[position]:offsets[position + 1]],
+            )
+
+        store = cls(embedding, shards, workers=workers)
+        for shard, built in zip(stale, store._pool.map(build, range(len(stale)))):
+            store.shards[shard] = built
+        logger.info(
+            "Built %d of %d shards (%s chunks each)", len(stale), num_shards, [len(group) for group in groups]
+        )
+        return store
+
+    # --- writes -----------------------------------------------------------
+
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[List[dict]] = None,
+        *,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        texts = list(texts)
+        if not texts:
+            return []
+        metadatas = metadatas or [{} for _ in texts]
+        if ids is None:
+            ids = chunk_ids([Document(page_content=t, metadata=m) for t, m in zip(texts, metadatas)])
+
+        groups: Dict[int, List[int]] = {}
+        for i, doc_id in enumerate(ids):
+            groups.setdefault(shard_of(doc_id, self.num_shards), []).append(i)
+        # Embed in this thread; the shard threads only index the vectors
+        vectors = self._embedding.embed_documents(texts)
+
+        def add(shard: int):
+            positions = groups[shard]
+            text_embeddings = [(texts[i], vectors[i]) for i in positions]
+            shard_metadatas = [metadatas[i] for i in positions]
+            shard_ids = [ids[i] for i in positions]
+            if self.shards[shard] is None:
+                from langchain_community.vectorstores import FAISS
+
+                # A shard that started empty gets a flat index
+                self.shards[shard] = FAISS.from_embeddings(
+                    text_embeddings, self._embedding, shard_metadatas, ids=shard_ids
+                )
+            else:
+                self.shards[shard].add_embeddings(text_embeddings, shard_metadatas, ids=shard_ids)
+
+        list(self._pool.map(add, groups))
+        return list(ids)
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        """Delete ids from their shards; unknown ids are ignored."""
+        groups: Dict[int, List[str]] = {}
+        for doc_id in ids or []:
+            groups.setdefault(shard_of(doc_id, self.num_shards), []).append(doc_id)
+        for shard, shard_ids in groups.items():
+            store = self.shards[shard]
+            if store is None:
+                continue
+            shard_ids = faiss_held_ids(store, shard_ids)
+            if shard_ids:
+                store.delete(ids=shard_ids)
+        return True
+
+    def get_by_ids(self, ids, /) -> List[Document]:
+        docs = []
+        for doc_id in ids:
+            store = self.shards[shard_of(doc_id, self.num_shards)]
+            if store is not None:
+                docs.extend(store.get_by_ids([doc_id]))
+        return docs
+
+    # --- search -----------------------------------------------------------
+
+    def similarity_search_with_score_by_vector(
+        self, embedding: List[float], k: int = 4, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        """Scatter the query to every shard, gather each shard's top k and keep the best k overall."""
+        live = [shard for shard in self.shards if shard is not None]
+        results = list(self._pool.map(
+            lambda shard: shard.similarity_search_with_score_by_vector(embedding, k, **kwargs), live
+        ))
+        candidates = [pair for shard_results in results for pair in shard_results]
+        if not candidates:
+            return []
+        # FAISS scores are distances: lower is better
+        scores = np.fromiter((score for _, score in candidates), dtype=np.float64, count=len(candidates))
+        order = np.argsort(scores, kind="stable")[:k]
+        return [candidates[i] for i in order]
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score_by_vector(embedding, k, **kwargs)]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, **kwargs: Any) -> List[Tuple[Document, float]]:
+        return self.similarity_search_with_score_by_vector(self._embedding.embed_query(query), k, **kwargs)
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, **kwargs)]
+
+    def _select_relevance_score_fn(self):
+        live = [shard for shard in self.shards if shard is not None]
+        if not live:
+            raise ValueError("No shards to search.")
+        return live[0]._select_relevance_score_fn()
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts: List[str],
+        embedding: Embeddings,
+        metadatas: Optional[List[dict]] = None,
+        *,
+        ids: Optional[List[str]] = None,
+        num_shards: int = 4,
+        **kwargs: Any,
+    ) -> "ShardedVectorStore":
+        metadatas = metadatas or [{} for _ in texts]
+        chunks = [
+            Document(page_content=text, metadata=metadata, id=ids[i] if ids else None)
+            for i, (text, metadata) in enumerate(zip(texts, metadatas))
+        ]
+        return cls.from_chunks(chunks, embedding, num_shards=num_shards, **kwargs)
@@ -0,0 +1,349 @@
+"""
+sparse_index.py
+
+BM25 inverted index over chunks, scored with scipy.sparse.
+
+The index keeps the posting lists of every term as one term-major (CSC)
+matrix of precomputed BM25 term weights: column t holds the rows of the
+chunks containing term t and their weights. A query only touches the columns
+of its own terms (one sparse mat-vec), and the top k is taken with
+np.argpartition instead of sorting every score. Scores are the BM25Okapi
+scores of rank_bm25 (and so of LangChain's BM25Retriever) for the same tokens.
+
+Chunks can be added (or replaced by id) and deleted incrementally. Every write
+(add, delete, or both at once with update) recomputes the weights before it returns, since document frequencies and the
+average chunk length change with it, so searches only read the index and can
+run on any thread (the hybrid retriever's sparse leg runs on a worker thread).
+Writes themselves are not synchronized: one writer at a time. save()/load() persist the
+postings, vocabulary and chunks, and build_sparse_index reuses a saved index
+when the corpus fingerprint matches (one subdirectory per corpus).
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from scipy import sparse
+
+from vectorstores import chunk_ids
+
+logger = logging.getLogger(__name__)
+
+POSTINGS_FILENAME = "postings.npz"
+DOCUMENTS_FILENAME = "documents.jsonl"
+META_FILENAME = "meta.json"
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens."""
+    return _TOKEN_RE.findall(text.lower())
+
+
+class SparseIndex:
+    """
+    Incremental BM25 inverted index.
+
+    Args:
+        k1: BM25 term-frequency saturation.
+        b: BM25 length normalization.
+        epsilon: Floor for negative idf values, as a fraction of the average idf (as in BM25Okapi).
+        tokenizer: text -> tokens; the default lowercases and splits on word characters.
+            A persisted index always reloads with the default tokenizer.
+    """
+
+    def __init__(
+        self,
+        k1: float = 1.5,
+        b: float = 0.75,
+        epsilon: float = 0.25,
+        tokenizer: Callable[[str], List[str]] = None,
+    ):
+        self.k1 = k1
+        self.b = b
+        self.epsilon = epsilon
+        self.tokenizer = tokenizer or tokenize
+        self.fingerprint: Optional[str] = None
+        self.vocab: Dict[str, int] = {}
+        self._ids: List[str] = []
+        self._docs: List[Document] = []
+        self._rows: Dict[str, int] = {}
+        self._tf = sparse.csr_matrix((0, 0), dtype=np.float32)  # (chunks x terms) term frequencies
+        # Chunks and their BM25 weights, swapped together by writes and read together by searches
+        self._searchable: Tuple[List[Document], sparse.csc_matrix] = ([], sparse.csc_matrix((0, 0)))
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    @property
+    def documents(self) -> List[Document]:
+        """Indexed chunks in row order."""
+        return list(self._docs)
+
+    # --- writes -----------------------------------------------------------
+
+    def add(self, documents: Sequence[Document], ids: Sequence[str] = None) -> List[str]:
+        """Index documents; an id already in the index is replaced. Returns the ids."""
+        return self.update(documents, ids)
+
+    def delete(self, ids: Sequence[str]) -> None:
+        """Remove ids from the index; unknown ids are ignored."""
+        self.update(delete_ids=ids)
+
+    def update(
+        self, documents: Sequence[Document] = (), ids: Sequence[str] = None, delete_ids: Sequence[str] = ()
+    ) -> List[str]:
+        """
+        Delete delete_ids, then add documents, recomputing the weights once.
+        Batch writes through here: each write costs a pass over the whole index.
+        Returns the ids of the added documents.
+        """
+        documents = list(documents)
+        ids = list(ids) if ids is not None else chunk_ids(documents)
+        # Repeated ids: the last document wins
+        latest = dict(zip(ids, documents))
+        # Deleted ids and replaced ids: their old rows are dropped
+        dead = sorted({self._rows[doc_id] for doc_id in [*delete_ids, *latest] if doc_id in self._rows})
+        if not latest:
+            if dead:
+                self._rebuild(self._tf, self._ids, self._docs, dead)
+            return ids
+
+        rows, cols, counts = [], [], []
+        for row, doc in enumerate(latest.values()):
+            tokens = [self.vocab.setdefault(token, len(self.vocab)) for token in self.tokenizer(doc.page_content)]
+            terms, term_counts = np.unique(np.asarray(tokens, dtype=np.int64), return_counts=True)
+            rows.append(np.full(len(terms), row, dtype=np.int64))
+            cols.append(terms)
+            counts.append(term_counts)
+
+        num_terms = len(self.vocab)
+        block = sparse.csr_matrix(
+            (np.concatenate(counts).astype(np.float32), (np.concatenate(rows), np.concatenate(cols))),
+            shape=(len(latest), num_terms),
+        )
+        old = self._tf
+        tf = sparse.vstack(
+            [sparse.csr_matrix((old.data, old.indices, old.indptr), shape=(old.shape[0], num_terms)), block],
+            format="csr",
+        )
+        docs = [
+            doc if doc.id == doc_id else Document(page_content=doc.page_content, metadata=doc.metadata, id=doc_id)
+            for doc_id, doc in latest.items()
+        ]
+        self._rebuild(tf, self._ids + list(latest), self._docs + docs, dead)
+        return ids
+
+    def get_by_ids(self, ids: Sequence[str]) -> List[Document]:
+        docs, rows = self._docs, self._rows
+        return [docs[rows[doc_id]] for doc_id in ids if doc_id in rows]
+
+    def _rebuild(self, tf: sparse.csr_matrix, ids: List[str], docs: List[Document], dead: Sequence[int] = ()):
+        """
+        Drop the dead rows, recompute the BM25 weights and swap in the new state.
+        New matrices and lists are built, never mutated in place, so a concurrent
+        search keeps reading the state it started with.
+        """
+        if len(dead):
+            live = np.ones(tf.shape[0], dtype=bool)
+            live[list(dead)] = False
+            tf = tf[live]
+            keep = np.flatnonzero(live)
+            ids = [ids[row] for row in keep]
+            docs = [docs[row] for row in keep]
+        weights = self._bm25_weights(tf)
+        self._tf, self._ids, self._docs = tf, ids, docs
+        self._rows = {doc_id: row for row, doc_id in enumerate(ids)}
+        self._searchable = (docs, weights)
+
+    def _bm25_weights(self, tf: sparse.csr_matrix) -> sparse.csc_matrix:
+        """Term-major matrix of BM25 weights for the term frequencies tf."""
+        num_docs = tf.shape[0]
+        doc_len = np.asarray(tf.sum(axis=1)).ravel()
+        avgdl = doc_len.mean() if num_docs else 1.0
+
+        df = np.bincount(tf.indices, minlength=tf.shape[1])
+        idf = np.zeros(tf.shape[1], dtype=np.float64)
+        present = df > 0
+        if present.any():
+            idf[present] = np.log(num_docs - df[present] + 0.5) - np.log(df[present] + 0.5)
+            # Same floor as BM25Okapi for terms in more than half of the chunks
+            floor = self.epsilon * idf[present].mean()
+            idf[present & (idf < 0)] = floor
+
+        rows = np.repeat(np.arange(num_docs), np.diff(tf.indptr))
+        norm = self.k1 * (1 - self.b + self.b * doc_len / max(avgdl, 1e-12))
+        data = idf[tf.indices] * tf.data * (self.k1 + 1) / (tf.data + norm[rows])
+        return sparse.csr_matrix((data, tf.indices, tf.indptr), shape=tf.shape).tocsc()
+
+    # --- search -----------------------------------------------------------
+
+    def _query_matrix(self, queries: Sequence[str], num_terms: int) -> sparse.csr_matrix:
+        """(terms x queries) counts of each query's tokens among the first num_terms of the vocabulary."""
+        rows, cols = [], []
+        for col, query in enumerate(queries):
+            # A write may be adding terms the weights being searched do not have yet
+            terms = [term for term in (self.vocab.get(t, num_terms) for t in self.tokenizer(query)) if term < num_terms]
+            rows.extend(terms)
+            cols.extend([col] * len(terms))
+        return sparse.csr_matrix(
+            (np.ones(len(rows), dtype=np.float64), (rows, cols)), shape=(num_terms, len(queries))
+        )
+
+    def scores(self, query: str) -> Tuple[np.ndarray, np.ndarray]:
+        """BM25 score of every chunk (in row order of documents) for one query, and the match mask."""
+        scores, matched = self.batch_scores([query])
+        return scores[0], matched[0]
+
+    def batch_scores(self, queries: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (queries x chunks) BM25 scores, and a mask of the chunks sharing at least
+        one term with each query. Only the posting lists of query terms are read.
+        """
+        scores, matched, _ = self._batch_scores(queries)
+        return scores, matched
+
+    def _batch_scores(self, queries: Sequence[str]) -> Tuple[np.ndarray, np.ndarray, List[Document]]:
+        """batch_scores() and the chunks its columns refer to, read from one consistent state."""
+        docs, weights = self._searchable
+        query_matrix = self._query_matrix(queries, weights.shape[1])
+        terms = np.flatnonzero(np.diff(query_matrix.indptr))
+        postings, query_terms = weights[:, terms], query_matrix[terms]
+        hits = postings.copy()
+        hits.data[:] = 1  # BM25 weights can be zero or negative (common terms)
+        return (postings @ query_terms).T.toarray(), (hits @ query_terms).T.toarray() > 0, docs
+
+    @staticmethod
+    def top_k(scores: np.ndarray, matched: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Rows and scores of the k best matched chunks, best first (partial sort)."""
+        rows = np.flatnonzero(matched)
+        if len(rows) > k:
+            rows = rows[np.argpartition(-scores[rows], k - 1)[:k]]
+        rows = rows[np.argsort(-scores[rows], kind="stable")]
+        return rows, scores[rows]
+
+    def search(self, query: str, k: int = 4) -> List[Tuple[Document, float]]:
+        """Top-k chunks sharing at least one term with the query, with their BM25 scores."""
+        return self.batch_search([query], k)[0]
+
+    def batch_search(self, queries: Sequence[str], k: int = 4) -> List[List[Tuple[Document, float]]]:
+        """search() for several queries in one sparse product."""
+        scores, matched, docs = self._batch_scores(queries)
+        results = []
+        for query_scores, query_matched in zip(scores, matched):
+            rows, top_scores = self.top_k(query_scores, query_matched, k)
+            results.append([(docs[row], float(score)) for row, score in zip(rows, top_scores)])
+        return results
+
+    # --- persistence ------------------------------------------------------
+
+    @staticmethod
+    def stored(directory: str) -> bool:
+        """Whether directory holds a complete index written by save()."""
+        return os.path.exists(os.path.join(directory, META_FILENAME))
+
+    @staticmethod
+    def stored_fingerprint(directory: str) -> Optional[str]:
+        """Fingerprint recorded by the last save() in directory, if any."""
+        try:
+            with open(os.path.join(directory, META_FILENAME), "r", encoding="utf-8") as f:
+                return json.load(f).get("fingerprint")
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def save(self, directory: str, fingerprint: Optional[str] = None):
+        """Write postings, chunks and vocabulary; meta.json is written last."""
+        os.makedirs(directory, exist_ok=True)
+        meta_path = os.path.join(directory, META_FILENAME)
+        if os.path.exists(meta_path):
+            # Invalidate first so a crash never pairs old metadata with new postings
+            os.remove(meta_path)
+        self.fingerprint = fingerprint
+
+        postings_path = os.path.join(directory, POSTINGS_FILENAME)
+        sparse.save_npz(f"{postings_path}.tmp.npz", self._tf.astype(np.float32))
+        os.replace(f"{postings_path}.tmp.npz", postings_path)
+        docs_path = os.path.join(directory, DOCUMENTS_FILENAME)
+        with open(f"{docs_path}.tmp", "w", encoding="utf-8") as f:
+            for doc_id, doc in zip(self._ids, self._docs):
+                f.write(json.dumps({"id": doc_id, "text": doc.page_content, "metadata": doc.metadata}, default=str))
+                f.write("\n")
+        os.replace(f"{docs_path}.tmp", docs_path)
+
+        meta = {
+            "k1": self.k1,
+            "b": self.b,
+            "epsilon": self.epsilon,
+            "vocab": sorted(self.vocab, key=self.vocab.get),
+            "count": len(self._ids),
+            "fingerprint": fingerprint,
+        }
+        with open(f"{meta_path}.tmp", "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(f"{meta_path}.tmp", meta_path)
+
+    @classmethod
+    def load(cls, directory: str, **params) -> "SparseIndex":
+        """
+        Reopen an index written by save(). params (k1, b, epsilon) override the
+        saved ones; they only enter the weights, which are computed from the term frequencies.
+        """
+        with open(os.path.join(directory, META_FILENAME), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        index = cls(**{**{param: meta[param] for param in ("k1", "b", "epsilon")}, **params})
+        index.fingerprint = meta.get("fingerprint")
+        index.vocab = {term: col for col, term in enumerate(meta["vocab"])}
+        tf = sparse.load_npz(os.path.join(directory, POSTINGS_FILENAME)).tocsr()
+        ids, docs = [], []
+        with open(os.path.join(directory, DOCUMENTS_FILENAME), "r", encoding="utf-8") as f:
+            for line in f:
+                record = json.loads(line)
+                ids.append(record["id"])
+                docs.append(Document(page_content=record["text"], metadata=record["metadata"], id=record["id"]))
+        index._rebuild(tf, ids, docs)
+        logger.info("Loaded sparse index (%d chunks, %d terms) from %s", len(index), len(index.vocab), directory)
+        return index
+
+
+def sparse_fingerprint(chunks, params: dict = None) -> str:
+    """Hash of the BM25 parameters and every chunk (id, text, metadata), in order."""
+    digest = hashlib.sha256(json.dumps(params or {}, sort_keys=True).encode("utf-8"))
+    for chunk_id, chunk in zip(chunk_ids(chunks), chunks):
+        record = json.dumps([chunk_id, chunk.page_content, chunk.metadata], sort_keys=True, default=str)
+        digest.update(hashlib.sha256(record.encode("utf-8")).digest())
+    return digest.hexdigest()
+
+
+def sparse_snapshot_directory(directory: str, fingerprint: str) -> str:
+    """Directory of one corpus's index under directory, so corpora do not overwrite each other."""
+    return os.path.join(directory, fingerprint[:16])
+
+
+def build_sparse_index(chunks, directory: str = None, k1: float = 1.5, b: float = 0.75, epsilon: float = 0.25) -> SparseIndex:
+    """
+    Build a SparseIndex over chunks.
+
+    With a directory, the index is saved in a subdirectory named by the corpus
+    fingerprint (see sparse_snapshot_directory), and a later build over the
+    same chunks and parameters loads it instead of re-tokenizing the corpus.
+    """
+    chunks = list(chunks)
+    params = {"k1": k1, "b": b, "epsilon": epsilon}
+    fingerprint = sparse_fingerprint(chunks, params) if directory else None
+    if directory:
+        directory = sparse_snapshot_directory(directory, fingerprint)
+        if SparseIndex.stored_fingerprint(directory) == fingerprint:
+            return SparseIndex.load(directory)
+
+    index = SparseIndex(**params)
+    index.add(chunks)
+    if directory:
+        index.save(directory, fingerprint)
+        logger.info("Saved sparse index (%d chunks, %d terms) to %s", len(index), len(index.vocab), directory)
+    return index
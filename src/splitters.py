@@ -5,38 +5,137 @@ Utility function to split documents into smaller chunks for embeddings and vecto
 Supports multiple splitting strategies.
 """
 
-from typing import List
+import copy
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import repeat
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
 from langchain.schema import Document
+from langchain.text_splitter import TextSplitter
 
+from chunk_cache import ChunkCache
+from data_loader import iter_batches
 
-def split_documents(
-    documents: List[Document],
+# Internal metadata key used to map chunks back to their source document
+_DOC_INDEX_KEY = "_split_doc_index"
+
+
+@lru_cache(maxsize=None)
+def _get_encoding(encoding_name: str):
+    """Load a tiktoken encoding once per process."""
+    import tiktoken
+
+    return tiktoken.get_encoding(encoding_name)
+
+
+@lru_cache(maxsize=None)
+def _token_byte_lengths(encoding) -> np.ndarray:
+    """UTF-8 byte length of every token id of an encoding (0 for unused ids)."""
+    lengths = np.zeros(encoding.max_token_value + 1, dtype=np.int64)
+    for token in range(len(lengths)):
+        try:
+            lengths[token] = len(encoding.decode_single_token_bytes(token))
+        except KeyError:
+            pass
+    return lengths
+
+
+class FastTokenTextSplitter(TextSplitter):
+    """
+    Token splitter with the same windows as LangChain's TokenTextSplitter, but
+    faster on large corpora:
+      - all texts of a split call are encoded in one multi-threaded encode_batch
+        (num_threads defaults to the number of CPU cores),
+      - windows are sliced on the token-id array,
+      - chunks are cut from the original text via token byte offsets instead of
+        decoding every window, which also yields exact start offsets.
+    """
+
+    def __init__(self, encoding_name: str = "gpt2", encoding=None, num_threads: int = None, **kwargs):
+        super().__init__(**kwargs)
+        if self._chunk_overlap >= self._chunk_size:
+            raise ValueError("chunk_overlap must be smaller than chunk_size for token splitting.")
+        self._encoding = encoding or _get_encoding(encoding_name)
+        self._num_threads = num_threads or os.cpu_count() or 1
+
+    def _split_with_offsets(self, texts: List[str], with_offsets: bool = True) -> List[List[Tuple[str, int]]]:
+        """Return (chunk, start character offset or -1) pairs for every text."""
+        byte_lengths = _token_byte_lengths(self._encoding)
+        encode_kwargs = {"allowed_special": set(), "disallowed_special": "all"}
+        if self._num_threads > 1 and len(texts) > 1:
+            token_ids = self._encoding.encode_batch(texts, num_threads=self._num_threads, **encode_kwargs)
+        else:
+            token_ids = [self._encoding.encode(text, **encode_kwargs) for text in texts]
+        step = self._chunk_size - self._chunk_overlap
+
+        results = []
+        for text, ids in zip(texts, token_ids):
+            n_tokens = len(ids)
+            if n_tokens == 0:
+                results.append([])
+                continue
+
+            # Byte offset where each window starts/stops, straight from token byte lengths
+            byte_ends = np.cumsum(byte_lengths[np.array(ids, dtype=np.int64)])
+            starts = np.arange(0, max(n_tokens - self._chunk_overlap, 1), step)
+            starts = starts[: np.searchsorted(starts + self._chunk_size, n_tokens) + 1]
+            stops = np.minimum(starts + self._chunk_size, n_tokens)
+            byte_starts = np.where(starts > 0, byte_ends[starts - 1], 0).tolist()
+            byte_stops = byte_ends[stops - 1].tolist()
+
+            if text.isascii():
+                results.append([(text[b0:b1], b0) for b0, b1 in zip(byte_starts, byte_stops)])
+                continue
+
+            # Slicing the UTF-8 bytes is equivalent to decoding the window's tokens,
+            # including U+FFFD where a window boundary splits a multi-byte character
+            raw = text.encode("utf-8")
+            chunks = [raw[b0:b1].decode("utf-8", errors="replace") for b0, b1 in zip(byte_starts, byte_stops)]
+            if with_offsets:
+                codepoints = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32)
+                char_bytes = 1 + (codepoints >= 0x80) + (codepoints >= 0x800) + (codepoints >= 0x10000)
+                char_offsets = np.concatenate(([0], np.cumsum(char_bytes)))
+                offsets = np.searchsorted(char_offsets, byte_starts).tolist()
+            else:
+                offsets = [-1] * len(chunks)
+            results.append(list(zip(chunks, offsets)))
+        return results
+
+    def split_text(self, text: str) -> List[str]:
+        return [chunk for chunk, _ in self._split_with_offsets([text], with_offsets=False)[0]]
+
+    def create_documents(self, texts: List[str], metadatas: Optional[List[dict]] = None) -> List[Document]:
+        metadatas = metadatas or [{}] * len(texts)
+        documents = []
+        pieces_per_text = self._split_with_offsets(list(texts), with_offsets=self._add_start_index)
+        for metadata, pieces in zip(metadatas, pieces_per_text):
+            for chunk, start in pieces:
+                chunk_metadata = copy.deepcopy(metadata)
+                if self._add_start_index:
+                    chunk_metadata["start_index"] = start
+                documents.append(Document(page_content=chunk, metadata=chunk_metadata))
+        return documents
+
+
+def get_splitter(
     splitter_name: str = "recursive",
     chunk_size: int = None,
     chunk_overlap: int = None,
     separator: str = None,
     token_chunk_size: int = None,
     token_chunk_overlap: int = None,
-) -> List[Document]:
+    add_start_index: bool = False,
+):
     """
-    Split documents using the selected splitter.
+    Build the LangChain text splitter selected by name.
 
-    Args:
-        documents: List of Document objects to split.
-        splitter_name: Which splitter to use: "recursive", "character", "token".
-        chunk_size: Maximum chunk size (characters or tokens depending on splitter).
-        chunk_overlap: Number of overlapping characters/tokens (recursive & character).
-        separator: Separator string for "character" splitter.
-            Common options:
-              - "\n\n" (paragraphs) recommended default
-              - "\n"   (single line)
-              - " "    (spaces, word-level split)
-              - ""     (character-level split)
-        token_chunk_size: Maximum number of tokens per chunk (only for "token").
-        token_chunk_overlap: Overlap in tokens between chunks (only for "token").
-
-    Returns:
-        List[Document]: Split documents.
+    See split_documents for the meaning of each argument. With add_start_index
+    each chunk records its character offset in metadata["start_index"].
     """
     splitter_name = splitter_name.lower()
 
@@ -45,9 +144,10 @@ def split_documents(
 
         chunk_size = chunk_size or 1000
         chunk_overlap = chunk_overlap or 200
-        splitter = RecursiveCharacterTextSplitter(
+        return RecursiveCharacterTextSplitter(
             chunk_size=chunk_size,
             chunk_overlap=chunk_overlap,
+            add_start_index=add_start_index,
         )
 
     elif splitter_name == "character":
@@ -56,10 +156,11 @@ def split_documents(
         chunk_size = chunk_size or 1000
         chunk_overlap = chunk_overlap or 0
         separator = separator or "\n\n"
-        splitter = CharacterTextSplitter(
+        return CharacterTextSplitter(
             separator=separator,
             chunk_size=chunk_size,
             chunk_overlap=chunk_overlap,
+            add_start_index=add_start_index,
         )
 
     elif splitter_name == "token":
@@ -67,12 +168,181 @@ def split_documents(
 
         token_chunk_size = token_chunk_size or 256
         token_chunk_overlap = token_chunk_overlap or 20
-        splitter = TokenTextSplitter(
+        return TokenTextSplitter(
             chunk_size=token_chunk_size,
             chunk_overlap=token_chunk_overlap,
+            add_start_index=add_start_index,
+        )
+
+    elif splitter_name == "fast_token":
+        token_chunk_size = token_chunk_size or 256
+        token_chunk_overlap = token_chunk_overlap or 20
+        return FastTokenTextSplitter(
+            chunk_size=token_chunk_size,
+            chunk_overlap=token_chunk_overlap,
+            add_start_index=add_start_index,
         )
 
     else:
         raise ValueError(f"Unsupported splitter: {splitter_name}")
 
-    return splitter.split_documents(documents)
+
+def document_id(document: Document) -> str:
+    """
+    Deterministic id of a source document.
+    Uses metadata["doc_id"] when set, otherwise a hash of source, page and content.
+    """
+    if "doc_id" in document.metadata:
+        return str(document.metadata["doc_id"])
+    key = json.dumps(
+        [document.metadata.get("source"), document.metadata.get("page"), document.page_content],
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:16]
+
+
+def _split_with_ids(documents: List[Document], splitter_kwargs: dict) -> List[List[Document]]:
+    """
+    Split documents and give every chunk the id "<doc_id>:<start offset>".
+    Returns one list of chunks per input document.
+    Top-level so it can run in worker processes.
+    """
+    splitter = get_splitter(add_start_index=True, **splitter_kwargs)
+    tagged = [
+        Document(
+            page_content=doc.page_content,
+            metadata={**doc.metadata, "doc_id": document_id(doc), _DOC_INDEX_KEY: i},
+        )
+        for i, doc in enumerate(documents)
+    ]
+    # One call per shard so batching splitters (e.g. "fast_token") see every text at once
+    grouped = [[] for _ in documents]
+    for chunk in splitter.split_documents(tagged):
+        grouped[chunk.metadata.pop(_DOC_INDEX_KEY)].append(chunk)
+        chunk.id = f"{chunk.metadata['doc_id']}:{chunk.metadata['start_index']}"
+    return grouped
+
+
+def _split_grouped(documents: List[Document], splitter_kwargs: dict, num_workers: int) -> List[List[Document]]:
+    """Split documents, in shards across processes when num_workers > 1."""
+    if num_workers > 1 and len(documents) > 1:
+        # A few shards per worker keeps the pool busy when document sizes vary
+        shard_size = -(-len(documents) // (num_workers * 4))
+        shards = [documents[i:i + shard_size] for i in range(0, len(documents), shard_size)]
+        with ProcessPoolExecutor(max_workers=min(num_workers, len(shards))) as executor:
+            results = executor.map(_split_with_ids, shards, repeat(splitter_kwargs))
+            return [group for shard_groups in results for group in shard_groups]
+    return _split_with_ids(documents, splitter_kwargs)
+
+
+def _chunks_from_cache(document: Document, cached: List[tuple]) -> List[Document]:
+    """Rebuild the chunks of a document from cached (text, start_index) pairs."""
+    doc_id = document_id(document)
+    chunks = []
+    for text, start in cached:
+        metadata = copy.deepcopy(document.metadata)
+        metadata.update(doc_id=doc_id, start_index=start)
+        chunks.append(Document(page_content=text, metadata=metadata, id=f"{doc_id}:{start}"))
+    return chunks
+
+
+def _make_ids_unique(chunks: List[Document]) -> List[Document]:
+    """Suffix repeated ids (identical source documents) with ~1, ~2, ... in order."""
+    seen = {}
+    for chunk in chunks:
+        count = seen.get(chunk.id, 0)
+        seen[chunk.id] = count + 1
+        if count:
+            chunk.id = f"{chunk.id}~{count}"
+    return chunks
+
+
+def split_documents(
+    documents: List[Document],
+    splitter_name: str = "recursive",
+    chunk_size: int = None,
+    chunk_overlap: int = None,
+    separator: str = None,
+    token_chunk_size: int = None,
+    token_chunk_overlap: int = None,
+    num_workers: int = 1,
+    cache: Optional[ChunkCache] = None,
+) -> List[Document]:
+    """
+    Split documents using the selected splitter.
+
+    Args:
+        documents: List of Document objects to split.
+        splitter_name: Which splitter to use: "recursive", "character", "token",
+            "fast_token" (same chunks as "token", batch-encoded).
+        chunk_size: Maximum chunk size (characters or tokens depending on splitter).
+        chunk_overlap: Number of overlapping characters/tokens (recursive & character).
+        separator: Separator string for "character" splitter.
+            Common options:
+              - "\n\n" (paragraphs) recommended default
+              - "\n"   (single line)
+              - " "    (spaces, word-level split)
+              - ""     (character-level split)
+        token_chunk_size: Maximum number of tokens per chunk ("token" and "fast_token").
+        token_chunk_overlap: Overlap in tokens between chunks ("token" and "fast_token").
+        num_workers: Number of worker processes that split contiguous shards of
+            documents. 1 splits in-process, None uses all available CPU cores.
+        cache: Optional ChunkCache. Documents whose content was already split with
+            the same splitter settings are served from it; only misses are split.
+
+    Returns:
+        List[Document]: Split documents, in input order. Each chunk has a
+            deterministic id "<doc_id>:<start offset>" (Document.id) and carries
+            metadata["doc_id"] and metadata["start_index"].
+    """
+    splitter_kwargs = dict(
+        splitter_name=splitter_name,
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        separator=separator,
+        token_chunk_size=token_chunk_size,
+        token_chunk_overlap=token_chunk_overlap,
+    )
+    num_workers = num_workers or os.cpu_count() or 1
+
+    if cache is None:
+        chunks = [chunk for group in _split_grouped(documents, splitter_kwargs, num_workers) for chunk in group]
+        return _make_ids_unique(chunks)
+
+    keys = [cache.key(doc.page_content, splitter_kwargs) for doc in documents]
+    cached = [cache.get(key) for key in keys]
+    misses = [doc for doc, hit in zip(documents, cached) if hit is None]
+    new_groups = iter(_split_grouped(misses, splitter_kwargs, num_workers))
+
+    chunks = []
+    for doc, key, hit in zip(documents, keys, cached):
+        if hit is not None:
+            chunks.extend(_chunks_from_cache(doc, hit))
+        else:
+            group = next(new_groups)
+            cache.put(key, [(chunk.page_content, chunk.metadata["start_index"]) for chunk in group])
+            chunks.extend(group)
+    cache.flush()
+
+    return _make_ids_unique(chunks)
+
+
+def iter_split_documents(
+    documents: Iterable[Document],
+    batch_size: int = 100,
+    **splitter_kwargs,
+) -> Iterator[Document]:
+    """
+    Lazily split a stream of documents, batch_size documents at a time.
+
+    Accepts any iterable (e.g. data_loader.iter_directory) so only one batch of
+    source documents and its chunks are held in memory at once.
+    splitter_kwargs are the same as for split_documents.
+
+    Yields:
+        Document: Chunks in the same order (and with the same ids) split_documents
+            would return them; repeated ids are only disambiguated within a batch.
+    """
+    for batch in iter_batches(documents, batch_size):
+        yield from split_documents(batch, **splitter_kwargs)
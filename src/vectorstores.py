@@ -2,56 +2,700 @@
 vectorstores.py
 
 Build and manage vectorstores from pre-split chunks and pre-initialized embeddings.
-Supports: FAISS, Chroma, Weaviate, Pinecone
+Supports: FAISS, Chroma, Weaviate, Pinecone, a built-in NumPy store (numpy_vectorstore.py)
+and sharded FAISS (sharded_vectorstore.py)
+
+upsert_chunks/delete_chunks update any of them in place by deterministic chunk id.
 """
 
+import hashlib
+import json
+import logging
 import os
+import pickle
+import sys
+import time
+import uuid
+from functools import lru_cache
+from itertools import islice
+from typing import List
 from dotenv import load_dotenv
-import os
+
+import numpy as np
+from langchain_core.documents import Document
+
+from data_loader import iter_batches
+from embedding_cache import flush_embeddings_cache
+from embeddings import embeddings_model_key
+
+logger = logging.getLogger(__name__)
+
+FAISS_FINGERPRINT_FILENAME = "fingerprint.json"
+
+# FAISS index types and their defaults (config.yaml: vectorstore.faiss_index)
+FAISS_INDEX_TYPES = ("flat", "ivf_flat", "ivf_pq", "hnsw")
+FAISS_INDEX_DEFAULTS = {
+    "type": "flat",
+    "nlist": 1024,            # IVF: number of clusters (inverted lists)
+    "nprobe": 16,             # IVF: clusters scanned per query
+    "pq_m": 48,               # IVF-PQ: sub-quantizers; code size = pq_m * pq_nbits / 8 bytes per vector
+    "pq_nbits": 8,            # IVF-PQ: bits per sub-quantizer code
+    "hnsw_m": 32,             # HNSW: neighbours per node
+    "ef_construction": 200,   # HNSW: candidate list size while building
+    "ef_search": 64,          # HNSW: candidate list size while searching
+    "train_sample": 100_000,  # IVF: vectors sampled for training
+    "seed": 1,
+}
+# Query-time parameters; changing them does not invalidate a persisted index
+_FAISS_SEARCH_PARAMS = ("nprobe", "ef_search")
+
+# Backend name -> (module, class) of its vectorstore, for upsert_chunks/delete_chunks
+_BACKEND_CLASSES = {
+    "faiss": ("langchain_community.vectorstores.faiss", "FAISS"),
+    "chroma": ("langchain_community.vectorstores.chroma", "Chroma"),
+    "weaviate": ("langchain_weaviate.vectorstores", "WeaviateVectorStore"),
+    "pinecone": ("langchain_pinecone.vectorstores", "PineconeVectorStore"),
+    "numpy": ("numpy_vectorstore", "NumpyVectorStore"),
+    "sharded": ("sharded_vectorstore", "ShardedVectorStore"),
+}
+# Weaviate object ids must be UUIDs; chunk ids map to them deterministically
+WEAVIATE_ID_NAMESPACE = uuid.UUID("6f1c3a52-5b1e-4f4e-9d0a-3c7b8e2f1d64")
 
 # Load environment variables (PINECONE_API_KEY etc.)
 load_dotenv()
 
-def build_vectorstore(name: str, chunks, embeddings_model, **kwargs):
-    name = name.lower()
 
-    if name == "faiss":
-        from langchain_community.vectorstores import FAISS
-        return FAISS.from_documents(chunks, embeddings_model)
+def faiss_index_config(index_cfg: dict = None) -> dict:
+    """FAISS_INDEX_DEFAULTS overridden by index_cfg, with the type validated."""
+    cfg = {**FAISS_INDEX_DEFAULTS, **{k: v for k, v in (index_cfg or {}).items() if v is not None}}
+    cfg["type"] = cfg["type"].lower()
+    if cfg["type"] not in FAISS_INDEX_TYPES:
+        raise ValueError(f"Unsupported FAISS index type: {cfg['type']} (options: {', '.join(FAISS_INDEX_TYPES)})")
+    return cfg
 
-    elif name == "chroma":
+
+def make_faiss_index(dim: int, index_cfg: dict = None, num_vectors: int = None):
+    """
+    Create an empty (untrained for IVF) L2 FAISS index as described by index_cfg.
+
+    With num_vectors, nlist is capped so that every cluster gets at least 39
+    training points (FAISS's own minimum), which keeps small corpora working.
+    """
+    import faiss
+
+    cfg = faiss_index_config(index_cfg)
+    index_type = cfg["type"]
+    if index_type == "flat":
+        return faiss.IndexFlatL2(dim)
+    if index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, cfg["hnsw_m"])
+        index.hnsw.efConstruction = cfg["ef_construction"]
+        index.hnsw.efSearch = cfg["ef_search"]
+        return index
+
+    nlist = cfg["nlist"]
+    if num_vectors is not None:
+        max_nlist = max(1, min(num_vectors, cfg["train_sample"]) // 39)
+        if nlist > max_nlist:
+            logger.warning("nlist=%d is too large for %d vectors; using %d", nlist, num_vectors, max_nlist)
+            nlist = max_nlist
+    quantizer = faiss.IndexFlatL2(dim)
+    if index_type == "ivf_flat":
+        index = faiss.IndexIVFFlat(quantizer, dim, nlist)
+    else:
+        if dim % cfg["pq_m"]:
+            raise ValueError(f"pq_m={cfg['pq_m']} must divide the embedding dimension {dim}")
+        index = faiss.IndexIVFPQ(quantizer, dim, nlist, cfg["pq_m"], cfg["pq_nbits"])
+    index.nprobe = min(cfg["nprobe"], nlist)
+    return index
+
+
+def set_faiss_search_params(index, index_cfg: dict = None):
+    """Apply the query-time parameters (nprobe, ef_search) to a built or loaded index."""
+    import faiss
+
+    cfg = faiss_index_config(index_cfg)
+    if cfg["type"] in ("ivf_flat", "ivf_pq"):
+        ivf = faiss.extract_index_ivf(index)
+        ivf.nprobe = min(cfg["nprobe"], ivf.nlist)
+    elif cfg["type"] == "hnsw":
+        index.hnsw.efSearch = cfg["ef_search"]
+
+
+def train_faiss_index(index, vectors: np.ndarray, index_cfg: dict = None):
+    """Train an IVF index on a random sample of at most train_sample vectors."""
+    if index.is_trained:
+        return
+    cfg = faiss_index_config(index_cfg)
+    sample = vectors
+    if len(vectors) > cfg["train_sample"]:
+        rng = np.random.default_rng(cfg["seed"])
+        sample = vectors[rng.choice(len(vectors), cfg["train_sample"], replace=False)]
+    if cfg["type"] == "ivf_pq" and len(sample) < 2 ** cfg["pq_nbits"]:
+        raise ValueError(
+            f"IVF-PQ with pq_nbits={cfg['pq_nbits']} needs at least {2 ** cfg['pq_nbits']} training vectors, "
+            f"got {len(sample)}"
+        )
+    start = time.perf_counter()
+    index.train(np.ascontiguousarray(sample, dtype=np.float32))
+    logger.info("Trained FAISS %s index on %d vectors in %.2fs", cfg["type"], len(sample), time.perf_counter() - start)
+
+
+def _build_faiss_index_store(chunks, embeddings_model, index_cfg: dict, vectors=None):
+    """Embed chunks (unless vectors are given) and index them in the configured FAISS index type, training it first."""
+    from langchain_community.docstore.in_memory import InMemoryDocstore
+    from langchain_community.vectorstores import FAISS
+
+    texts = [chunk.page_content for chunk in chunks]
+    if vectors is None:
+        vectors = embeddings_model.embed_documents(texts)
+    vectors = np.asarray(vectors, dtype=np.float32)
+    index = make_faiss_index(vectors.shape[1], index_cfg, num_vectors=len(vectors))
+    train_faiss_index(index, vectors, index_cfg)
+
+    vector_store = FAISS(
+        embedding_function=embeddings_model,
+        index=index,
+        docstore=InMemoryDocstore(),
+        index_to_docstore_id={},
+    )
+    # Same id handling as VectorStore.from_documents
+    ids = [chunk.id for chunk in chunks]
+    vector_store.add_embeddings(
+        zip(texts, vectors.tolist()),
+        metadatas=[chunk.metadata for chunk in chunks],
+        ids=ids if any(ids) else None,
+    )
+    return vector_store
+
+
+def measure_faiss_recall(index, exact_index, queries: np.ndarray, k: int) -> dict:
+    """
+    Recall@k of an approximate index against an exact (flat) index over the same
+    vectors, with the mean per-query search latency of both.
+    """
+    queries = np.ascontiguousarray(queries, dtype=np.float32)
+
+    start = time.perf_counter()
+    _, expected = exact_index.search(queries, k)
+    exact_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    _, found = index.search(queries, k)
+    seconds = time.perf_counter() - start
+
+    hits = sum(len(set(f[f >= 0]) & set(e[e >= 0])) for f, e in zip(found, expected))
+    total = int((expected >= 0).sum())
+    return {
+        "recall": hits / total if total else 0.0,
+        "latency_ms": 1000 * seconds / len(queries),
+        "exact_latency_ms": 1000 * exact_seconds / len(queries),
+    }
+
+
+def corpus_fingerprint(chunks, embeddings_model, index_cfg: dict = None) -> str:
+    """
+    Hash of the embedding model, the FAISS index build parameters and every chunk
+    (id, text, metadata), in order. A persisted index is only reused when this matches.
+    """
+    digest = hashlib.sha256(embeddings_model_key(embeddings_model).encode("utf-8"))
+    if index_cfg and faiss_index_config(index_cfg)["type"] != "flat":
+        build_params = {k: v for k, v in faiss_index_config(index_cfg).items() if k not in _FAISS_SEARCH_PARAMS}
+        digest.update(json.dumps(build_params, sort_keys=True).encode("utf-8"))
+    for chunk in chunks:
+        record = json.dumps([chunk.id, chunk.page_content, chunk.metadata], sort_keys=True, default=str)
+        digest.update(hashlib.sha256(record.encode("utf-8")).digest())
+    return digest.hexdigest()
+
+
+def faiss_snapshot_directory(persist_dir: str, fingerprint: str) -> str:
+    """
+    Snapshot directory of one corpus under persist_dir. Every corpus (architecture,
+    uploaded file, index type) gets its own, so switching corpora does not
+    overwrite the others; unused snapshot directories can be deleted at any time.
+    """
+    return os.path.join(persist_dir, fingerprint[:16])
+
+
+@lru_cache(maxsize=None)
+def _mapped_faiss_class():
+    """FAISS store over a memory-mapped index that switches to an in-RAM copy on its first write."""
+    import faiss
+    from langchain_community.vectorstores import FAISS
+
+    class MappedFAISS(FAISS):
+        def __init__(self, *args, index_path: str, index_cfg: dict = None, **kwargs):
+            super().__init__(*args, **kwargs)
+            self._index_path = index_path
+            self._index_cfg = index_cfg
+
+        def _materialize(self):
+            # Mapped codes and lists are read-only: IVF lists reject writes, flat/HNSW codes abort on them
+            if self._index_path is None:
+                return
+            self.index = faiss.read_index(self._index_path)
+            set_faiss_search_params(self.index, self._index_cfg)
+            self._index_path = None
+            logger.info("Copied memory-mapped FAISS index (%d vectors) into RAM for writing", self.index.ntotal)
+
+        def add_texts(self, *args, **kwargs):
+            self._materialize()
+            return super().add_texts(*args, **kwargs)
+
+        def add_embeddings(self, *args, **kwargs):
+            self._materialize()
+            return super().add_embeddings(*args, **kwargs)
+
+        def delete(self, *args, **kwargs):
+            self._materialize()
+            return super().delete(*args, **kwargs)
+
+        def merge_from(self, *args, **kwargs):
+            self._materialize()
+            return super().merge_from(*args, **kwargs)
+
+    return MappedFAISS
+
+
+def _faiss_mmap_flags(index_type: str) -> int:
+    """
+    faiss.read_index flags that memory-map a saved index of index_type, or 0.
+    IO_FLAG_MMAP maps only IVF inverted lists; the flat codes of "flat" and
+    "hnsw" indexes need IO_FLAG_MMAP_IFC, which older FAISS builds lack.
+    """
+    import faiss
+
+    if index_type.startswith("ivf"):
+        return faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY
+    return getattr(faiss, "IO_FLAG_MMAP_IFC", 0)
+
+
+def _load_faiss_snapshot(
+    directory: str, embeddings_model, fingerprint: str, mmap: bool = True, index_cfg: dict = None
+):
+    """
+    Return the FAISS store persisted in directory if its fingerprint matches, else None.
+    A memory-mapped index is copied into RAM before its first write.
+    """
+    import faiss
+    from langchain_community.vectorstores import FAISS
+
+    try:
+        with open(os.path.join(directory, FAISS_FINGERPRINT_FILENAME), "r", encoding="utf-8") as f:
+            if json.load(f).get("fingerprint") != fingerprint:
+                return None
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+    # Memory-mapping serves queries without reading the whole index into RAM first
+    index_path = os.path.join(directory, "index.faiss")
+    flags = _faiss_mmap_flags(faiss_index_config(index_cfg)["type"]) if mmap else 0
+    index = faiss.read_index(index_path, flags)
+    set_faiss_search_params(index, index_cfg)
+    with open(os.path.join(directory, "index.pkl"), "rb") as f:
+        docstore, index_to_docstore_id = pickle.load(f)
+    logger.info("Loaded %s FAISS index (%d vectors) from %s", "mapped" if flags else "in-RAM", index.ntotal, directory)
+    if not flags:
+        return FAISS(embeddings_model, index, docstore, index_to_docstore_id)
+    return _mapped_faiss_class()(
+        embeddings_model, index, docstore, index_to_docstore_id, index_path=index_path, index_cfg=index_cfg
+    )
+
+
+def _save_faiss_snapshot(vector_store, directory: str, fingerprint: str):
+    """
+    Persist a FAISS store with its fingerprint; the fingerprint is written last.
+    The index files are written aside and moved into place, so stores still
+    mapping the previous files keep reading them instead of a truncated file.
+    """
+    os.makedirs(directory, exist_ok=True)
+    fingerprint_path = os.path.join(directory, FAISS_FINGERPRINT_FILENAME)
+    if os.path.exists(fingerprint_path):
+        # Invalidate first so a crash mid-save never pairs an old fingerprint with new files
+        os.remove(fingerprint_path)
+    tmp_dir = os.path.join(directory, "tmp")
+    vector_store.save_local(tmp_dir)
+    for filename in ("index.faiss", "index.pkl"):
+        os.replace(os.path.join(tmp_dir, filename), os.path.join(directory, filename))
+    os.rmdir(tmp_dir)
+    tmp_path = f"{fingerprint_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"fingerprint": fingerprint, "vectors": vector_store.index.ntotal}, f)
+    os.replace(tmp_path, fingerprint_path)
+
+
+def open_faiss_snapshot(chunks, embeddings_model, persist_dir: str, index_cfg: dict = None, mmap: bool = True):
+    """The FAISS store persisted under persist_dir for exactly these chunks, model and index build, or None."""
+    index_cfg = faiss_index_config(index_cfg)
+    fingerprint = corpus_fingerprint(chunks, embeddings_model, index_cfg)
+    return _load_faiss_snapshot(
+        faiss_snapshot_directory(persist_dir, fingerprint), embeddings_model, fingerprint, mmap=mmap, index_cfg=index_cfg
+    )
+
+
+def build_faiss_store(chunks, embeddings_model, index_cfg: dict = None, persist_dir: str = None, vectors=None):
+    """
+    Index chunks in a new FAISS store of the configured index type, persisted
+    under persist_dir if given. vectors are the chunks' embeddings, if already
+    computed; otherwise embeddings_model embeds them.
+    """
+    from langchain_community.vectorstores import FAISS
+
+    index_cfg = faiss_index_config(index_cfg)
+    if index_cfg["type"] == "flat" and vectors is None:
+        vector_store = FAISS.from_documents(chunks, embeddings_model)
+    else:
+        vector_store = _build_faiss_index_store(chunks, embeddings_model, index_cfg, vectors)
+    if persist_dir:
+        fingerprint = corpus_fingerprint(chunks, embeddings_model, index_cfg)
+        _save_faiss_snapshot(vector_store, faiss_snapshot_directory(persist_dir, fingerprint), fingerprint)
+    return vector_store
+
+
+def vectorstore_backend(vectorstore) -> str:
+    """Backend name ("faiss", "chroma", "weaviate", "pinecone", "numpy", "sharded") of a LangChain vectorstore."""
+    for backend, (module_name, class_name) in _BACKEND_CLASSES.items():
+        # A backend whose module was never imported cannot have produced this store
+        module = sys.modules.get(module_name)
+        if module is not None and isinstance(vectorstore, getattr(module, class_name)):
+            return backend
+    raise ValueError(f"Unsupported vectorstore: {type(vectorstore).__name__}")
+
+
+def chunk_ids(chunks) -> List[str]:
+    """
+    Deterministic ids of chunks: Document.id (set by splitters.split_documents),
+    or else a hash of text and metadata.
+    """
+    ids = []
+    for chunk in chunks:
+        if chunk.id:
+            ids.append(chunk.id)
+        else:
+            record = json.dumps([chunk.page_content, chunk.metadata], sort_keys=True, default=str)
+            ids.append(hashlib.sha256(record.encode("utf-8")).hexdigest()[:32])
+    return ids
+
+
+def _backend_ids(backend: str, ids: List[str]) -> List[str]:
+    if backend == "weaviate":
+        return [str(uuid.uuid5(WEAVIATE_ID_NAMESPACE, chunk_id)) for chunk_id in ids]
+    return list(ids)
+
+
+def faiss_held_ids(vectorstore, ids: List[str]) -> List[str]:
+    """The ids a FAISS store holds, looked up one by one in its docstore (FAISS.delete keeps the two in step)."""
+    stored = vectorstore.docstore._dict
+    return [chunk_id for chunk_id in ids if chunk_id in stored]
+
+
+def _stored_chunks(backend: str, vectorstore, ids: List[str]) -> dict:
+    """
+    id -> Document for the given ids already in the store. Only the local stores
+    can be read back cheaply; for the remote backends every upsert is a write.
+    """
+    if backend in ("numpy", "sharded"):
+        return {doc.id: doc for doc in vectorstore.get_by_ids(ids)}
+    if backend == "faiss":
+        return {chunk_id: vectorstore.docstore.search(chunk_id) for chunk_id in faiss_held_ids(vectorstore, ids)}
+    if backend == "chroma":
+        found = vectorstore.get(ids=ids, include=["documents", "metadatas"])
+        return {
+            chunk_id: Document(page_content=text, metadata=metadata or {})
+            for chunk_id, text, metadata in zip(found["ids"], found["documents"], found["metadatas"])
+        }
+    return {}
+
+
+def upsert_chunks(vectorstore, chunks) -> List[str]:
+    """
+    Insert chunks, replacing any stored chunk with the same id.
+
+    Works the same for every backend. Re-running it with the same chunks never
+    duplicates vectors. On the local stores (FAISS, Chroma, NumPy, sharded),
+    chunks that are already stored with identical text and metadata are not
+    re-embedded. Only the given ids are looked up, so the cost of a call does
+    not grow with the size of the store.
+    Within chunks, the last chunk with a given id wins.
+
+    Returns:
+        Ids of the chunks that were (re-)embedded and written.
+    """
+    backend = vectorstore_backend(vectorstore)
+    latest = dict(zip(chunk_ids(chunks), chunks))
+    stored = _stored_chunks(backend, vectorstore, list(latest))
+
+    changed = {
+        chunk_id: chunk
+        for chunk_id, chunk in latest.items()
+        if chunk_id not in stored
+        or (stored[chunk_id].page_content, stored[chunk_id].metadata) != (chunk.page_content, chunk.metadata)
+    }
+    if changed:
+        replaced = [chunk_id for chunk_id in changed if chunk_id in stored]
+        if backend in ("faiss", "sharded") and replaced:
+            # FAISS refuses ids it already holds; Chroma, Weaviate and Pinecone overwrite by id
+            vectorstore.delete(ids=replaced)
+        documents = [
+            Document(page_content=chunk.page_content, metadata=chunk.metadata, id=chunk_id)
+            for chunk_id, chunk in changed.items()
+        ]
+        vectorstore.add_documents(documents, ids=_backend_ids(backend, list(changed)))
+    logger.info("Upserted %d of %d chunks into %s", len(changed), len(latest), backend)
+    return list(changed)
+
+
+def delete_chunks(vectorstore, ids: List[str]) -> List[str]:
+    """
+    Delete chunks by id from any backend. Unknown ids
+    are ignored. (FAISS HNSW indexes do not support removal.)
+
+    Returns:
+        The ids that were deleted (for FAISS, only those it held).
+    """
+    backend = vectorstore_backend(vectorstore)
+    ids = list(dict.fromkeys(ids))
+    if backend == "faiss":
+        ids = faiss_held_ids(vectorstore, ids)
+    if ids:
+        vectorstore.delete(ids=_backend_ids(backend, ids))
+    return ids
+
+
+def _open_remote_vectorstore(name: str, embeddings_model, **kwargs):
+    """Open (creating if needed) the Chroma collection, Weaviate collection or Pinecone index to ingest into."""
+    if name == "chroma":
         from langchain_community.vectorstores import Chroma
         persist_dir = kwargs.get("persist_directory")
-        return Chroma.from_documents(chunks, embeddings_model, persist_directory=persist_dir)
+        return Chroma(persist_directory=persist_dir, embedding_function=embeddings_model)
 
     elif name == "weaviate":
-        import weaviate
         from langchain_weaviate.vectorstores import WeaviateVectorStore
-        client = weaviate.connect_to_local()
+        from client_pool import acquire_weaviate_client
+        client = acquire_weaviate_client(**(kwargs.get("weaviate") or {}))  # pooled per endpoint
         index_name = kwargs.get("index_name", "LangChain")
-        return WeaviateVectorStore.from_documents(chunks, embeddings_model, client=client, index_name=index_name)
+        return WeaviateVectorStore(client=client, index_name=index_name, text_key="text", embedding=embeddings_model)
 
     elif name == "pinecone":
         from langchain_pinecone import PineconeVectorStore
-        from pinecone import Pinecone, ServerlessSpec
+        from pinecone import ServerlessSpec
+        from client_pool import acquire_pinecone_index
 
         index_name = kwargs.get("index_name", "default-index")
         embeddings_dimension = kwargs.get("ebeddings_dim", 384)
         similarity_metric = kwargs.get("similarity_metric", "cosine")
 
-        pc = Pinecone(api_key=os.getenv("PINECONE_API_KEY"))
-        if not pc.has_index(index_name):
-            pc.create_index(
-                name=index_name,
-                dimension=embeddings_dimension,
-                metric=similarity_metric,
-                spec=ServerlessSpec(cloud="aws", region="us-east-1"),
+        def create_index(pc):
+            if not pc.has_index(index_name):
+                pc.create_index(
+                    name=index_name,
+                    dimension=embeddings_dimension,
+                    metric=similarity_metric,
+                    spec=ServerlessSpec(cloud="aws", region="us-east-1"),
+                )
+
+        # Client and index handle are pooled per (API key, index)
+        index = acquire_pinecone_index(index_name, os.getenv("PINECONE_API_KEY"), create=create_index)
+        return PineconeVectorStore(index=index, embedding=embeddings_model)
+
+    raise ValueError(f"Unsupported backend: {name}")
+
+
+def release_vectorstore(vectorstore):
+    """
+    Return the pooled client of a Weaviate or Pinecone vectorstore to the client
+    pool (see client_pool.py) and stop the worker threads of a sharded store;
+    a no-op for the other backends.
+    """
+    if vectorstore is None:
+        return
+    from client_pool import get_client_pool
+
+    backend = vectorstore_backend(vectorstore)
+    if backend == "weaviate":
+        get_client_pool().release(vectorstore._client)
+    elif backend == "pinecone":
+        get_client_pool().release(vectorstore._index)
+    elif backend == "sharded":
+        vectorstore.close()
+
+
+def build_vectorstore(name: str, chunks, embeddings_model, batch_size: int = 256, **kwargs):
+    """
+    Build a vectorstore from chunks.
+
+    chunks may be a list or any lazy iterable (e.g. splitters.iter_split_documents).
+    Iterables are indexed batch_size chunks at a time, so peak memory is bounded
+    by the batch rather than the corpus.
+
+    For "faiss", kwargs["faiss_index"] selects the index type and its parameters
+    (see FAISS_INDEX_DEFAULTS): "flat" (exact, the default), "ivf_flat", "ivf_pq"
+    or "hnsw". IVF indexes are trained on a sample of the corpus vectors; for an
+    iterable the first train_sample chunks form the training set.
+
+    kwargs["faiss_persist_directory"] persists the index (vectors,
+    docstore, id map) with a fingerprint of the corpus and embedding model, in a
+    subdirectory per fingerprint (see faiss_snapshot_directory). A later build
+    with the same fingerprint memory-maps the saved index instead of
+    re-embedding (IVF inverted lists, or flat/HNSW codes on FAISS builds with
+    IO_FLAG_MMAP_IFC; older builds read flat/HNSW indexes into RAM); the first
+    write (upsert_chunks, add_documents, delete) copies a mapped index into
+    RAM. Pass faiss_mmap=False to load it into RAM upfront.
+    Only list input is persisted, since an iterable cannot be fingerprinted upfront.
+
+    Chroma, Weaviate and Pinecone (list or iterable input) go through
+    bulk_ingest.bulk_ingest: embedding overlaps parallel uploads, failed batches
+    are retried individually, and kwargs["bulk_ingest"] sets batch_size,
+    upload_workers and max_retries. Writes are upserts by chunk id, so building
+    against an existing collection or index replaces chunks instead of duplicating them.
+
+    "sharded" partitions chunks by id across kwargs["sharded"]["num_shards"]
+    FAISS shards (each with the faiss_index type, persisted under
+    kwargs["sharded"]["directory"]) built and searched in parallel; see
+    sharded_vectorstore.py.
+
+    "numpy" is the dependency-free exact store (see numpy_vectorstore.py);
+    kwargs["numpy_store"] sets its dtype ("float32"/"float16") and directory.
+    With a directory, list input is persisted with a corpus fingerprint and a
+    later build with the same fingerprint memory-maps it instead of re-embedding.
+    """
+    try:
+        return _build_vectorstore(name.lower(), chunks, embeddings_model, batch_size, **kwargs)
+    finally:
+        # Save the embedding cache index once per build rather than once per batch
+        flush_embeddings_cache(embeddings_model)
+
+
+def _build_vectorstore(name: str, chunks, embeddings_model, batch_size: int, **kwargs):
+    if name in ("chroma", "weaviate", "pinecone"):
+        from bulk_ingest import bulk_ingest
+
+        vector_store = _open_remote_vectorstore(name, embeddings_model, **kwargs)
+        bulk_cfg = {"batch_size": batch_size, **(kwargs.get("bulk_ingest") or {})}
+        bulk_ingest(vector_store, chunks, embeddings_model, **bulk_cfg)
+        return vector_store
+
+    if not isinstance(chunks, (list, tuple)):
+        kwargs.pop("faiss_persist_directory", None)
+        if name == "sharded":
+            kwargs["sharded"] = {**(kwargs.get("sharded") or {}), "directory": None}
+        chunks = iter(chunks)
+        first_size = batch_size
+        if name in ("faiss", "sharded"):
+            index_cfg = faiss_index_config(kwargs.get("faiss_index"))
+            if index_cfg["type"].startswith("ivf"):
+                # IVF needs its training sample (per shard) before anything can be added
+                num_shards = (kwargs.get("sharded") or {}).get("num_shards", 4) if name == "sharded" else 1
+                first_size = max(batch_size, index_cfg["train_sample"] * num_shards)
+        first_batch = list(islice(chunks, first_size))
+        if not first_batch:
+            raise ValueError("No chunks to index.")
+        batches = iter_batches(chunks, batch_size)
+        vector_store = build_vectorstore(name, first_batch, embeddings_model, **kwargs)
+        for batch in batches:
+            upsert_chunks(vector_store, batch)
+        if name == "numpy" and vector_store.directory:
+            vector_store.save()  # without a fingerprint: a stream is never reused as is
+        return vector_store
+
+    if name == "faiss":
+        index_cfg = kwargs.get("faiss_index")
+        persist_dir = kwargs.get("faiss_persist_directory")
+        if persist_dir:
+            vector_store = open_faiss_snapshot(
+                chunks, embeddings_model, persist_dir, index_cfg, mmap=kwargs.get("faiss_mmap", True)
             )
-        index = pc.Index(index_name)
-        vector_store = PineconeVectorStore(index=index, embedding=embeddings_model)
-        vector_store.add_documents(chunks)
+            if vector_store is not None:
+                return vector_store
+        return build_faiss_store(chunks, embeddings_model, index_cfg, persist_dir)
+
+    elif name == "numpy":
+        from numpy_vectorstore import NumpyVectorStore
+
+        store_cfg = kwargs.get("numpy_store") or {}
+        directory = store_cfg.get("directory")
+        dtype = store_cfg.get("dtype") or "float32"
+        fingerprint = None
+        if directory:
+            fingerprint = f"{dtype}:{corpus_fingerprint(chunks, embeddings_model)}"
+            if NumpyVectorStore.stored_fingerprint(directory) == fingerprint:
+                return NumpyVectorStore.load(directory, embeddings_model)
+
+        vector_store = NumpyVectorStore(embeddings_model, directory=directory, dtype=dtype)
+        upsert_chunks(vector_store, chunks)
+        if directory:
+            vector_store.save(fingerprint)
         return vector_store
 
+    elif name == "sharded":
+        from sharded_vectorstore import ShardedVectorStore
+
+        shard_cfg = kwargs.get("sharded") or {}
+        return ShardedVectorStore.from_chunks(
+            chunks,
+            embeddings_model,
+            num_shards=shard_cfg.get("num_shards", 4),
+            directory=shard_cfg.get("directory"),
+            workers=shard_cfg.get("workers"),
+            faiss_index=kwargs.get("faiss_index"),
+        )
+
     else:
         raise ValueError(f"Unsupported backend: {name}")
 
+
+def load_vectorstore(name: str, embeddings_model, reset: bool = False, **kwargs):
+    """
+    Open a persisted vectorstore for incremental indexing, or an empty one if
+    nothing has been persisted yet. With reset=True any persisted data is dropped.
+
+    Supports: FAISS, Chroma, NumPy (all need persist_directory).
+    """
+    name = name.lower()
+    persist_dir = kwargs.get("persist_directory")
+    if not persist_dir:
+        raise ValueError("persist_directory is required for incremental indexing.")
+
+    if name == "faiss":
+        import faiss
+        from langchain_community.docstore.in_memory import InMemoryDocstore
+        from langchain_community.vectorstores import FAISS
+
+        if not reset and os.path.exists(os.path.join(persist_dir, "index.faiss")):
+            return FAISS.load_local(
+                persist_dir, embeddings_model, allow_dangerous_deserialization=True
+            )
+        dim = len(embeddings_model.embed_query("dimension probe"))
+        return FAISS(
+            embedding_function=embeddings_model,
+            index=faiss.IndexFlatL2(dim),
+            docstore=InMemoryDocstore(),
+            index_to_docstore_id={},
+        )
+
+    elif name == "numpy":
+        from numpy_vectorstore import META_FILENAME, NumpyVectorStore
+
+        if not reset and os.path.exists(os.path.join(persist_dir, META_FILENAME)):
+            return NumpyVectorStore.load(persist_dir, embeddings_model)
+        dtype = (kwargs.get("numpy_store") or {}).get("dtype") or "float32"
+        return NumpyVectorStore(embeddings_model, directory=persist_dir, dtype=dtype)
+
+    elif name == "chroma":
+        from langchain_community.vectorstores import Chroma
+        vector_store = Chroma(persist_directory=persist_dir, embedding_function=embeddings_model)
+        if reset:
+            vector_store.delete_collection()
+            vector_store = Chroma(persist_directory=persist_dir, embedding_function=embeddings_model)
+        return vector_store
+
+    else:
+        raise ValueError(f"Incremental indexing is not supported for backend: {name}")
+
+
+def save_vectorstore(name: str, vectorstore, **kwargs):
+    """Persist a vectorstore opened with load_vectorstore (Chroma persists on write)."""
+    if name.lower() == "faiss":
+        vectorstore.save_local(kwargs["persist_directory"])
+    elif name.lower() == "numpy":
+        vectorstore.save()
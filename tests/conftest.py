@@ -0,0 +1,50 @@
+"""
+conftest.py
+
+Fixtures shared by the test modules.
+"""
+
+import pytest
+from langchain.schema import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+
+class CountingEmbedding(DeterministicFakeEmbedding):
+    """Fake embeddings that record every batch of texts and every query that reached the provider."""
+
+    batches: list = []
+    queries: list = []
+
+    @property
+    def calls(self) -> int:
+        return len(self.batches)
+
+    @property
+    def texts(self) -> list:
+        return [text for batch in self.batches for text in batch]
+
+    def embed_documents(self, texts):
+        self.batches.append(list(texts))
+        return super().embed_documents(texts)
+
+    def embed_query(self, text):
+        self.queries.append(text)
+        return super().embed_query(text)
+
+
+@pytest.fixture
+def counting_embedding():
+    return CountingEmbedding(size=16, batches=[], queries=[])
+
+
+@pytest.fixture
+def make_chunks():
+    """make_chunks(n, text=None): n chunks with ids doc:0..doc:n-1; text(i) overrides "chunk number {i}"."""
+
+    def make(n, text=None):
+        return [
+            Document(page_content=text(i) if text else f"chunk number {i}", metadata={"i": i}, id=f"doc:{i}")
+            for i in range(n)
+        ]
+
+    return make
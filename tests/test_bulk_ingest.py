@@ -0,0 +1,198 @@
+"""
+test_bulk_ingest.py
+
+Tests for concurrent bulk ingestion against local stand-ins of the Chroma,
+Weaviate and Pinecone clients.
+
+Run with:
+    pytest -v tests/test_bulk_ingest.py
+"""
+
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+import pytest
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from langchain_pinecone import PineconeVectorStore
+from langchain_weaviate.vectorstores import WeaviateVectorStore
+from pydantic import ConfigDict
+
+from bulk_ingest import bulk_ingest
+from vectorstores import build_vectorstore
+
+
+class FlakyBackend:
+    """Shared state of a stand-in: stored objects, failures to inject and upload concurrency."""
+
+    def __init__(self, fail_first=0, delay=0.01):
+        self.objects = {}
+        self.fail_first = fail_first
+        self.delay = delay
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    def write(self, records):
+        with self.lock:
+            self.calls += 1
+            failing = self.calls <= self.fail_first
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(self.delay)
+            if failing:
+                raise ConnectionError("stand-in timeout")
+            with self.lock:
+                self.objects.update(records)
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+
+class PineconeIndex:
+    config = SimpleNamespace(host="stand-in", api_key="stand-in")
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def upsert(self, vectors, namespace=None):
+        self.backend.write({v["id"]: v for v in vectors})
+
+
+class WeaviateCollection:
+    def __init__(self, backend):
+        self.backend = backend
+        self.batch = self
+        self.failed_objects = []
+        self.config = SimpleNamespace(get=lambda simple: SimpleNamespace(multi_tenancy_config=SimpleNamespace(enabled=False)))
+
+    @contextmanager
+    def fixed_size(self, batch_size):
+        records = {}
+        self.add_object = lambda properties, uuid, vector: records.update({uuid: properties})
+        yield self
+        try:
+            self.backend.write(records)
+        except ConnectionError as e:
+            # The Weaviate client reports per-object errors instead of raising
+            self.failed_objects = [SimpleNamespace(message=str(e))] * len(records)
+
+
+class WeaviateClient:
+    def __init__(self, backend):
+        self.collections = SimpleNamespace(exists=lambda name: True, get=lambda name: WeaviateCollection(backend))
+
+
+class ChromaClient:
+    def __init__(self, backend):
+        collection = SimpleNamespace(
+            upsert=lambda ids, embeddings, documents, metadatas: backend.write(dict(zip(ids, documents)))
+        )
+        self.get_or_create_collection = lambda name, embedding_function, metadata: collection
+
+
+def _store(name, backend, index=None):
+    """A real LangChain vectorstore of the given backend on top of a stand-in client."""
+    emb = DeterministicFakeEmbedding(size=8)
+    if name == "pinecone":
+        return PineconeVectorStore(index=index or PineconeIndex(backend), embedding=emb)
+    if name == "weaviate":
+        return WeaviateVectorStore(client=WeaviateClient(backend), index_name="TestIndex", text_key="text", embedding=emb)
+    pytest.importorskip("chromadb")
+    from langchain_community.vectorstores import Chroma
+
+    return Chroma(client=ChromaClient(backend), embedding_function=emb)
+
+
+@pytest.mark.parametrize("name", ["pinecone", "weaviate", "chroma"])
+def test_parallel_upload_with_retries(name, make_chunks):
+    backend = FlakyBackend(fail_first=2)
+    reports = []
+    report = bulk_ingest(
+        _store(name, backend),
+        make_chunks(100),
+        DeterministicFakeEmbedding(size=8),
+        batch_size=10,
+        upload_workers=4,
+        backoff_base=0.001,
+        progress=lambda r: reports.append(r.chunks),
+    )
+
+    assert len(backend.objects) == 100
+    assert report.chunks == 100 and report.batches == 10 and report.total == 100
+    assert report.retries == 2 and not report.failed_ids
+    assert backend.calls == 12  # only the two failed batches were resent
+    assert backend.max_in_flight > 1
+    assert reports == sorted(reports) and reports[-1] == 100
+    if name == "weaviate":
+        assert all(uuid.UUID(object_id) for object_id in backend.objects)
+
+
+def test_rerun_upserts_instead_of_duplicating(make_chunks):
+    backend = FlakyBackend()
+    store = _store("pinecone", backend)
+    emb = DeterministicFakeEmbedding(size=8)
+    bulk_ingest(store, make_chunks(30), emb, batch_size=7)
+    bulk_ingest(store, iter(make_chunks(30)), emb, batch_size=7)
+    assert len(backend.objects) == 30
+    assert backend.objects["doc:3"]["metadata"] == {"i": 3, "text": "chunk number 3"}
+
+
+def test_failed_batches_are_reported(make_chunks):
+    backend = FlakyBackend(fail_first=100)
+    with pytest.raises(RuntimeError, match="gave up on 3 batches"):
+        bulk_ingest(_store("pinecone", backend), make_chunks(25), DeterministicFakeEmbedding(size=8),
+                    batch_size=10, max_retries=1, backoff_base=0.001)
+
+    report = bulk_ingest(_store("pinecone", FlakyBackend(fail_first=2)), make_chunks(25),
+                         DeterministicFakeEmbedding(size=8), batch_size=10, upload_workers=1,
+                         max_retries=0, raise_on_failure=False)
+    assert report.failed_ids == [[f"doc:{i}" for i in range(10)], [f"doc:{i}" for i in range(10, 20)]]
+    assert report.chunks == 5
+
+
+class GatedEmbedding(DeterministicFakeEmbedding):
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+    second_batch_started: threading.Event
+    calls: int = 0
+
+    def embed_documents(self, texts):
+        self.calls += 1
+        if self.calls == 2:
+            self.second_batch_started.set()
+        return super().embed_documents(texts)
+
+
+class SlowIndex(PineconeIndex):
+    def __init__(self, second_batch_started):
+        super().__init__(FlakyBackend())
+        self.second_batch_started = second_batch_started
+        self.overlapped = []
+
+    def upsert(self, vectors, namespace=None):
+        if vectors[0]["id"] == "doc:0":
+            # The first upload only finishes once the next batch is being embedded
+            self.overlapped.append(self.second_batch_started.wait(5))
+
+
+@pytest.fixture
+def second_batch_started():
+    return threading.Event()
+
+
+def test_embedding_overlaps_upload(make_chunks, second_batch_started):
+    index = SlowIndex(second_batch_started)
+    emb = GatedEmbedding(size=8, second_batch_started=second_batch_started)
+    bulk_ingest(_store("pinecone", None, index), make_chunks(20), emb, batch_size=10, upload_workers=1)
+    assert index.overlapped == [True]
+
+
+def test_unsupported_backend(make_chunks):
+    emb = DeterministicFakeEmbedding(size=8)
+    with pytest.raises(ValueError, match="Bulk ingestion supports"):
+        bulk_ingest(build_vectorstore("faiss", make_chunks(1), emb), make_chunks(1), emb)
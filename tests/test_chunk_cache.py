@@ -0,0 +1,90 @@
+"""
+test_chunk_cache.py
+
+Tests for the on-disk ChunkCache used by splitters.split_documents.
+
+Run with:
+    pytest -v tests/test_chunk_cache.py
+"""
+
+from langchain.schema import Document
+
+from chunk_cache import ChunkCache
+from splitters import split_documents
+
+SPLITTER_KWARGS = {"splitter_name": "recursive", "chunk_size": 60, "chunk_overlap": 10}
+
+
+def _docs():
+    return [
+        Document(page_content=f"Document {i}. " + "word " * (30 * (i + 1)), metadata={"source": f"doc{i}", "page": i})
+        for i in range(4)
+    ]
+
+
+def test_cached_split_matches_uncached(tmp_path):
+    docs = _docs()
+    expected = split_documents(docs, **SPLITTER_KWARGS)
+
+    cache = ChunkCache(str(tmp_path / "chunks"))
+    first = split_documents(docs, cache=cache, **SPLITTER_KWARGS)
+    assert cache.stats()["misses"] == len(docs) and cache.hits == 0
+
+    # A new instance (e.g. the next run, or another architecture) reuses the entries
+    cache = ChunkCache(str(tmp_path / "chunks"))
+    second = split_documents(docs, cache=cache, **SPLITTER_KWARGS)
+    assert cache.hits == len(docs) and cache.misses == 0
+
+    for chunks in (first, second):
+        assert [c.page_content for c in chunks] == [c.page_content for c in expected]
+        assert [c.metadata for c in chunks] == [c.metadata for c in expected]
+        assert [c.id for c in chunks] == [c.id for c in expected]
+
+
+def test_cache_key_covers_content_and_splitter_params(tmp_path):
+    cache = ChunkCache(str(tmp_path / "chunks"))
+    docs = _docs()
+    split_documents(docs, cache=cache, **SPLITTER_KWARGS)
+
+    # Different chunk_size: every document misses
+    split_documents(docs, cache=cache, **{**SPLITTER_KWARGS, "chunk_size": 80})
+    assert cache.hits == 0
+
+    # One edited document: only that one misses
+    docs[2] = Document(page_content="edited " * 40, metadata=docs[2].metadata)
+    split_documents(docs, cache=cache, **SPLITTER_KWARGS)
+    assert (cache.hits, cache.misses) == (3, 2 * len(docs) + 1)
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cache = ChunkCache(str(tmp_path / "chunks"), max_bytes=None)
+    keys = [ChunkCache.key(f"text {i}", SPLITTER_KWARGS) for i in range(5)]
+    for key in keys:
+        cache.put(key, [("x" * 100, 0)])
+    entry_size = cache.stats()["size_bytes"] // len(keys)
+
+    cache.max_bytes = entry_size * 5
+    for key in keys[:2]:  # touched recently: must survive
+        cache.get(key)
+    cache.put(ChunkCache.key("text 5", SPLITTER_KWARGS), [("x" * 100, 0)])
+
+    assert cache.stats()["size_bytes"] <= cache.max_bytes
+    assert cache.evictions > 0
+    assert cache.get(keys[0]) is not None and cache.get(keys[1]) is not None
+    assert cache.get(keys[2]) is None
+
+
+def test_access_order_survives_restart(tmp_path):
+    cache = ChunkCache(str(tmp_path / "chunks"), max_bytes=None)
+    keys = [ChunkCache.key(f"text {i}", SPLITTER_KWARGS) for i in range(4)]
+    for key in keys:
+        cache.put(key, [("x" * 100, 0)])
+    cache.get(keys[0])
+    cache.flush()
+    entry_size = cache.stats()["size_bytes"] // len(keys)
+
+    # The next run evicts by the saved access order, not by file times or paths
+    cache = ChunkCache(str(tmp_path / "chunks"), max_bytes=entry_size * 4)
+    cache.put(ChunkCache.key("text 4", SPLITTER_KWARGS), [("x" * 100, 0)])
+    assert cache.get(keys[0]) is not None
+    assert cache.get(keys[1]) is None
@@ -0,0 +1,133 @@
+"""
+test_client_pool.py
+
+Tests for the pooled, health-checked vector database clients.
+
+Run with:
+    pytest -v tests/test_client_pool.py
+"""
+
+import threading
+import time
+
+from client_pool import ClientPool
+
+
+class FakeClient:
+    instances = 0
+
+    def __init__(self):
+        FakeClient.instances += 1
+        self.ready = True
+        self.closed = False
+
+    def is_ready(self):
+        return self.ready
+
+    def close(self):
+        self.closed = True
+
+
+def _acquire(pool, key="weaviate"):
+    return pool.acquire(key, FakeClient, health_check=FakeClient.is_ready, close=FakeClient.close)
+
+
+def test_clients_are_reused_per_endpoint():
+    pool = ClientPool()
+    a, b = _acquire(pool), _acquire(pool)
+    other = _acquire(pool, key="weaviate-2")
+    assert a is b and a is not other
+
+    stats = pool.stats()
+    assert stats["open"] == 2 and stats["connects"] == 2
+    assert stats["clients"] == {"weaviate": 2, "weaviate-2": 1}
+
+    pool.release(a)
+    pool.release(b, close=True)
+    assert a.closed and pool.stats()["open"] == 1
+
+
+def test_concurrent_acquires_connect_once():
+    pool = ClientPool()
+    created = []
+
+    def slow_connect():
+        time.sleep(0.05)
+        created.append(FakeClient())
+        return created[-1]
+
+    clients = []
+    threads = [threading.Thread(target=lambda: clients.append(pool.acquire("k", slow_connect))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(created) == 1 and all(client is created[0] for client in clients)
+
+
+def test_unhealthy_client_is_replaced():
+    pool = ClientPool(health_check_interval=0)
+    first = _acquire(pool)
+    first.ready = False
+
+    second = _acquire(pool)
+    assert second is not first
+    assert pool.stats()["reconnects"] == 1 and pool.stats()["clients"] == {"weaviate": 1}
+
+    # The replaced client is still held, so it is only closed when its holder releases it
+    assert not first.closed and pool.stats()["stale"] == 1
+    pool.release(first)
+    assert first.closed and pool.stats()["stale"] == 0
+    pool.release(first)  # no longer pooled: ignored
+    assert pool.stats()["clients"] == {"weaviate": 1}
+    pool.release(second)
+    assert pool.stats()["clients"] == {"weaviate": 0} and not second.closed
+
+
+def test_unused_client_is_closed_on_reconnect():
+    pool = ClientPool()
+    client = _acquire(pool)
+    pool.release(client)
+    client.ready = False
+    assert pool.check_health() == {"weaviate": False}
+    assert client.closed and pool.stats()["open"] == 1
+
+
+def test_release_ignores_clients_the_pool_does_not_hold():
+    pool = ClientPool()
+    client = _acquire(pool)
+    pool.release(client, close=True)
+    assert client.closed and pool.stats()["open"] == 0
+
+    # Only the clients the pool hands out and still holds are counted
+    other = _acquire(pool)
+    pool.release(FakeClient())
+    assert pool.stats()["clients"] == {"weaviate": 1}
+    pool.release(other)
+
+
+def test_health_checks_are_rate_limited_and_forced_on_demand():
+    pool = ClientPool(health_check_interval=60)
+    client = _acquire(pool)
+    client.ready = False
+    assert _acquire(pool) is client  # checked less than a minute ago
+
+    assert pool.check_health() == {"weaviate": False}
+    assert _acquire(pool) is not client and not client.closed
+
+
+def test_close_all():
+    pool = ClientPool()
+    clients = [_acquire(pool, key=i) for i in range(3)]
+    pool.close_all()
+    assert all(client.closed for client in clients)
+    assert pool.stats()["open"] == 0 and pool.stats()["closes"] == 3
+
+
+def test_close_all_closes_replaced_clients_still_held():
+    pool = ClientPool(health_check_interval=0)
+    first = _acquire(pool)
+    first.ready = False
+    second = _acquire(pool)
+    pool.close_all()
+    assert first.closed and second.closed
@@ -2,7 +2,19 @@
 
 import pytest
 from pathlib import Path
-from data_loader import load_file, load_directory, load_hf_dataset
+from data_loader import (
+    load_file,
+    load_directory,
+    load_hf_dataset,
+    iter_directory,
+    iter_hf_dataset,
+    iter_json,
+    load_jsonl,
+    load_pdf,
+    _iter_json_values,
+)
+import io
+import json
 from langchain.schema import Document
 
 # -------------------------------
@@ -53,6 +65,142 @@ def test_directory_loader():
     print(f"[PASS] Loaded {len(docs)} docs from directory")
 
 
+def _write_text_tree(root: Path):
+    (root / "sub").mkdir()
+    (root / "b.txt").write_text("second file", encoding="utf-8")
+    (root / "a.txt").write_text("first file", encoding="utf-8")
+    (root / "sub" / "c.txt").write_text("nested file", encoding="utf-8")
+    (root / "notes.xyz").write_text("unsupported", encoding="utf-8")
+
+
+def test_directory_loader_parallel_matches_sequential(tmp_path):
+    """
+    Parallel loading must return the same documents in the same order.
+    """
+    _write_text_tree(tmp_path)
+    sequential = load_directory(str(tmp_path), num_workers=1)
+    parallel = load_directory(str(tmp_path), num_workers=2)
+
+    assert [d.page_content for d in sequential] == ["first file", "second file", "nested file"]
+    assert [d.page_content for d in parallel] == [d.page_content for d in sequential]
+
+
+def test_directory_loader_non_recursive(tmp_path):
+    _write_text_tree(tmp_path)
+    docs = load_directory(str(tmp_path), recursive=False, num_workers=2)
+    assert [d.page_content for d in docs] == ["first file", "second file"]
+
+
+def test_directory_loader_reports_failures(tmp_path, caplog):
+    _write_text_tree(tmp_path)
+    (tmp_path / "broken.json").write_text("{not json", encoding="utf-8")
+
+    docs = load_directory(str(tmp_path))
+    assert len(docs) == 3
+    assert "broken.json" in caplog.text
+
+    with pytest.raises(RuntimeError, match="broken.json"):
+        load_directory(str(tmp_path), raise_on_error=True)
+
+
+def test_iter_directory_batches(tmp_path):
+    _write_text_tree(tmp_path)
+    batches = list(iter_directory(str(tmp_path), batch_size=2))
+    assert [len(b) for b in batches] == [2, 1]
+    assert [d.page_content for b in batches for d in b] == [
+        d.page_content for d in load_directory(str(tmp_path))
+    ]
+
+
+def test_iter_json_is_lazy(tmp_path):
+    path = tmp_path / "entries.json"
+    path.write_text('[{"text": "one"}, {"text": "two"}]', encoding="utf-8")
+    docs = iter_json(str(path), text_field="text")
+    assert next(docs).page_content == "one"
+    assert next(docs).page_content == "two"
+
+
+@pytest.mark.parametrize("read_size", [1, 7, 4096])
+def test_incremental_json_array_parser(read_size):
+    """
+    Items split across read boundaries (including numbers) are parsed intact.
+    """
+    entries = [{"text": "a, [b]", "n": 12345}, 678, "x\"y", [1, 2], {"nested": {"k": None}}]
+    raw = "  [ " + ", ".join(json.dumps(e) for e in entries) + " ]\n"
+    assert list(_iter_json_values(io.StringIO(raw), read_size=read_size)) == entries
+
+
+def test_json_metadata_fields(tmp_path):
+    path = tmp_path / "entries.json"
+    path.write_text('[{"title": "T", "year": 2020, "body": "x"}]', encoding="utf-8")
+
+    doc = next(iter_json(str(path), metadata_fields=["title", "year"]))
+    assert doc.page_content == '{"body": "x"}'
+    assert doc.metadata == {"source": str(path), "title": "T", "year": 2020}
+
+
+def test_jsonl_dispatch(tmp_path):
+    path = tmp_path / "entries.jsonl"
+    path.write_text('{"text": "one", "id": 1}\n\n{"text": "two", "id": 2}\n', encoding="utf-8")
+
+    docs = load_file(str(path))
+    assert [d.page_content for d in docs] == ['{"text": "one", "id": 1}', '{"text": "two", "id": 2}']
+
+    docs = load_jsonl(str(path), text_field="text", metadata_fields=["id"])
+    assert [(d.page_content, d.metadata["id"]) for d in docs] == [("one", 1), ("two", 2)]
+
+
+def test_pdf_page_parallel_and_cache(tmp_path):
+    """
+    Page-parallel and cached loading match PyPDFLoader page for page.
+    """
+    from langchain_community.document_loaders import PyPDFLoader
+
+    path = "data/eu.pdf"
+    expected = PyPDFLoader(path).load()
+    cache_dir = tmp_path / "pages"
+
+    for _ in range(2):  # second pass is served from the cache
+        docs = load_pdf(path, num_workers=2, cache_dir=str(cache_dir))
+        assert [d.page_content for d in docs] == [d.page_content for d in expected]
+        assert [d.metadata for d in docs] == [d.metadata for d in expected]
+
+    assert len(list(cache_dir.rglob("*.json"))) == len(expected) + 1
+    assert not list(cache_dir.rglob("*.tmp"))
+
+
+def test_pdf_without_pages(tmp_path):
+    from langchain_community.document_loaders import PyPDFLoader
+    from pypdf import PdfWriter
+
+    path = str(tmp_path / "empty.pdf")
+    with open(path, "wb") as f:
+        PdfWriter().write(f)
+
+    assert PyPDFLoader(path).load() == []
+    assert load_pdf(path, num_workers=2, cache_dir=str(tmp_path / "pages")) == []
+
+
+def test_directory_loader_gives_spare_workers_to_pdf_pages(tmp_path, monkeypatch):
+    """
+    A directory with fewer files than workers extracts PDF pages in parallel.
+    """
+    import shutil
+    import data_loader
+
+    shutil.copy("data/eu.pdf", tmp_path / "eu.pdf")
+    calls = []
+    load_pdf_orig = data_loader.load_pdf
+    monkeypatch.setattr(
+        data_loader, "load_pdf", lambda path, num_workers=1, cache_dir=None: calls.append(num_workers)
+        or load_pdf_orig(path, num_workers=num_workers, cache_dir=cache_dir)
+    )
+
+    docs = load_directory(str(tmp_path), num_workers=2)
+    assert calls == [2]
+    assert [d.page_content for d in docs] == [d.page_content for d in load_pdf_orig("data/eu.pdf")]
+
+
 # -------------------------------
 # Test HuggingFace dataset loader
 # -------------------------------
@@ -76,6 +224,44 @@ def test_hf_dataset_loader():
     print("[PASS] HuggingFace dataset loaded successfully")
 
 
+@pytest.fixture
+def local_hf_dataset(tmp_path):
+    path = tmp_path / "rows.jsonl"
+    path.write_text(
+        "\n".join(f'{{"text": "row {i}", "extra": {i}}}' for i in range(10)),
+        encoding="utf-8",
+    )
+    return {"dataset_name": "json", "data_files": str(path)}
+
+
+@pytest.mark.parametrize("streaming", [False, True])
+def test_hf_dataset_batches_and_shards(local_hf_dataset, streaming):
+    """
+    Shards cover disjoint contiguous index ranges and together cover the split.
+    """
+    shards = [
+        list(
+            iter_hf_dataset(
+                **local_hf_dataset,
+                limit=10,
+                batch_size=2,
+                streaming=streaming,
+                num_shards=3,
+                shard_index=i,
+            )
+        )
+        for i in range(3)
+    ]
+    texts = [[d.page_content for batch in shard for d in batch] for shard in shards]
+    assert texts == [
+        ["row 0", "row 1", "row 2", "row 3"],
+        ["row 4", "row 5", "row 6"],
+        ["row 7", "row 8", "row 9"],
+    ]
+    assert all(len(batch) <= 2 for shard in shards for batch in shard)
+    assert shards[1][0][0].metadata == {"id": "json_train_4"}
+
+
 # -------------------------------
 # Main block to run manually
 # -------------------------------
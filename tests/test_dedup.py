@@ -0,0 +1,63 @@
+"""
+test_dedup.py
+
+Tests for exact and MinHash/LSH near-duplicate chunk removal.
+
+Run with:
+    pytest -v tests/test_dedup.py
+"""
+
+import json
+
+from langchain.schema import Document
+
+from dedup import apply_dedup, deduplicate_chunks
+
+CLAUSE = (
+    "The provider shall not be liable for any indirect, incidental or consequential damages "
+    "arising out of the use of this service, including loss of data or profits, even if advised "
+    "of the possibility of such damages, to the maximum extent permitted by applicable law."
+)
+
+
+def _chunk(text, chunk_id, source):
+    return Document(page_content=text, metadata={"source": source}, id=chunk_id)
+
+
+def test_exact_and_near_duplicates_are_dropped_with_provenance():
+    chunks = [
+        _chunk(CLAUSE, "a:0", "a.pdf"),
+        _chunk("The European Parliament is the legislative branch of the European Union.", "a:1", "a.pdf"),
+        _chunk("  " + CLAUSE.upper() + "\n", "b:0", "b.pdf"),            # exact after normalization
+        _chunk(CLAUSE.replace("profits", "revenue"), "c:0", "c.pdf"),    # near-duplicate
+        _chunk("Python is a popular programming language for AI and data science.", "c:1", "c.pdf"),
+    ]
+
+    result = deduplicate_chunks(chunks, threshold=0.7)
+
+    assert [c.id for c in result.chunks] == ["a:0", "a:1", "c:1"]
+    assert (result.exact_dropped, result.near_dropped, result.dropped) == (1, 1, 2)
+    provenance = result.provenance()
+    assert [d["id"] for d in provenance["a:0"]] == ["b:0", "c:0"]
+    assert [d["metadata"]["source"] for d in provenance["a:0"]] == ["b.pdf", "c.pdf"]
+
+
+def test_exact_only_keeps_near_duplicates():
+    chunks = [_chunk(CLAUSE, "a:0", "a"), _chunk(CLAUSE.replace("profits", "revenue"), "b:0", "b")]
+    result = deduplicate_chunks(chunks, near=False)
+    assert len(result.chunks) == 2 and result.dropped == 0
+
+
+def test_distinct_chunks_are_kept():
+    chunks = [_chunk(f"Section {i}: " + " ".join(f"term{i * 50 + j}" for j in range(40)), str(i), "x") for i in range(50)]
+    assert deduplicate_chunks(chunks).chunks == chunks
+
+
+def test_apply_dedup_uses_config(tmp_path):
+    chunks = [_chunk(CLAUSE, "a:0", "a"), _chunk(CLAUSE, "b:0", "b")]
+    assert apply_dedup(chunks, {"enabled": False}) == chunks
+
+    path = tmp_path / "provenance.json"
+    kept = apply_dedup(chunks, {"enabled": True, "provenance_path": str(path)})
+    assert [c.id for c in kept] == ["a:0"]
+    assert json.loads(path.read_text())["a:0"][0]["id"] == "b:0"
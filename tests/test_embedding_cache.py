@@ -0,0 +1,117 @@
+"""
+test_embedding_cache.py
+
+Tests for the persistent CachedEmbeddings wrapper.
+
+Run with:
+    pytest -v tests/test_embedding_cache.py
+"""
+
+import numpy as np
+import pytest
+from langchain.schema import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from embedding_cache import CachedEmbeddings
+from vectorstores import build_vectorstore
+
+
+@pytest.fixture
+def base(counting_embedding):
+    return counting_embedding
+
+
+def test_cache_is_reused_across_instances(tmp_path, base):
+    texts = ["alpha", "bravo", "alpha", "charlie"]
+    cache = CachedEmbeddings(base, str(tmp_path), provider="fake", model_name="m")
+    first = cache.embed_documents(texts)
+    assert base.batches == [["alpha", "bravo", "charlie"]]
+    assert (cache.hits, cache.misses) == (0, 4)
+    cache.flush()
+
+    # Next run: a fresh wrapper over the same directory serves everything from disk
+    cache = CachedEmbeddings(base, str(tmp_path), provider="fake", model_name="m")
+    second = cache.embed_documents(texts + ["delta"])
+    assert base.batches[-1] == ["delta"]
+    assert cache.stats()["hit_rate"] == pytest.approx(4 / 5)
+    np.testing.assert_allclose(second[:4], first, rtol=1e-6)
+
+
+def test_cache_is_keyed_by_model(tmp_path, base):
+    cache = CachedEmbeddings(base, str(tmp_path), provider="fake", model_name="a")
+    cache.embed_documents(["alpha"])
+    cache.flush()
+    other = CachedEmbeddings(base, str(tmp_path), provider="fake", model_name="b")
+    other.embed_documents(["alpha"])
+    assert other.misses == 1
+
+
+def test_float16_storage(tmp_path, base):
+    cache = CachedEmbeddings(base, str(tmp_path), provider="fake", dtype="float16")
+    cache.embed_documents(["alpha"])
+    cache.flush()
+    cache = CachedEmbeddings(base, str(tmp_path), provider="fake", dtype="float16")
+    vector = cache.embed_documents(["alpha"])[0]
+    assert cache.hits == 1
+    np.testing.assert_allclose(vector, base.embed_query("alpha"), atol=1e-2)
+
+
+def test_lru_eviction(tmp_path, base):
+    row_bytes = 16 * 4
+    cache = CachedEmbeddings(base, str(tmp_path), provider="fake", max_bytes=3 * row_bytes)
+    cache.embed_documents(["a", "b", "c"])
+    cache.embed_documents(["a"])          # "b" is now least recently used
+    cache.embed_documents(["d"])
+
+    assert cache.evictions == 1 and cache.stats()["entries"] == 3
+    base.batches.clear()
+    cache.embed_documents(["a", "c", "d"])
+    assert base.batches == []
+    cache.embed_documents(["b"])
+    assert base.batches == [["b"]]
+
+
+def test_build_vectorstore_uses_cache_transparently(tmp_path, base):
+    chunks = [Document(page_content=f"chunk {i}") for i in range(5)]
+    cache = CachedEmbeddings(base, str(tmp_path), provider="fake")
+    build_vectorstore("faiss", chunks, cache)
+    store = build_vectorstore("faiss", chunks, CachedEmbeddings(base, str(tmp_path), provider="fake"))
+    assert base.calls == 1
+    assert store.similarity_search("chunk 3", k=1)[0].page_content == "chunk 3"
+
+
+def test_index_is_saved_per_build_not_per_call(tmp_path, base):
+    cache = CachedEmbeddings(base, str(tmp_path), provider="fake")
+    cache.embed_documents(["alpha"])
+    cache.embed_documents(["bravo"])
+    assert not (tmp_path / "fake__default" / "index.npz").exists()
+
+    # build_vectorstore saves the index once, when the build is done
+    build_vectorstore("faiss", [Document(page_content="charlie")], cache)
+    reopened = CachedEmbeddings(base, str(tmp_path), provider="fake")
+    assert reopened.stats()["entries"] == 3
+
+
+def test_flush_interval_bounds_unsaved_work(tmp_path, base):
+    cache = CachedEmbeddings(base, str(tmp_path), provider="fake", flush_interval=0)
+    cache.embed_documents(["alpha"])
+    assert CachedEmbeddings(base, str(tmp_path), provider="fake").stats()["entries"] == 1
+
+
+def test_concurrent_callers_get_their_own_vectors(tmp_path):
+    from concurrent.futures import ThreadPoolExecutor
+
+    base = DeterministicFakeEmbedding(size=16)
+    # Small initial capacity and a bound: threads race through growth and eviction
+    cache = CachedEmbeddings(base, str(tmp_path), provider="fake", max_bytes=300 * 16 * 4)
+    batches = [[f"text {t} {i}" for i in range(40)] + ["shared"] for t in range(16)]
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(cache.embed_documents, batches * 2))
+
+    for texts, vectors in zip(batches * 2, results):
+        np.testing.assert_allclose(vectors, base.embed_documents(texts), rtol=1e-6)
+    cache.flush()
+    reopened = CachedEmbeddings(base, str(tmp_path), provider="fake")
+    for texts in batches:
+        np.testing.assert_allclose(reopened.embed_documents(texts), base.embed_documents(texts), rtol=1e-6)
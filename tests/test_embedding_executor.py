@@ -0,0 +1,133 @@
+"""
+test_embedding_executor.py
+
+Tests for concurrent, rate-limit-aware API embedding against a local stand-in
+of the OpenAI and Cohere embedding endpoints.
+
+Run with:
+    pytest -v tests/test_embedding_executor.py
+"""
+
+import asyncio
+import threading
+
+import pytest
+from aiohttp import web
+
+from embedding_executor import ConcurrentAPIEmbeddings, make_batches
+
+
+def _vector(text):
+    return [float(len(text)), float(sum(map(ord, text)) % 997)]
+
+
+class StandInServer:
+    """aiohttp server on a background loop that fakes both embedding APIs."""
+
+    def __init__(self, fail_first=0, delay=0.01):
+        self.fail_first = fail_first
+        self.delay = delay
+        self.batches = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.requests = 0
+
+    async def _handle(self, request):
+        self.requests += 1
+        if self.requests <= self.fail_first:
+            return web.json_response({"error": "rate limited"}, status=429, headers={"Retry-After": "0"})
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            body = await request.json()
+            await asyncio.sleep(self.delay * (1 + len(self.batches) % 3))  # out-of-order completion
+        finally:
+            self.in_flight -= 1
+        if "input" in body:
+            texts = body["input"]
+            self.batches.append(texts)
+            data = [{"index": i, "embedding": _vector(t)} for i, t in enumerate(texts)]
+            return web.json_response({"data": data[::-1]})
+        self.batches.append(body["texts"])
+        return web.json_response({"embeddings": [_vector(t) for t in body["texts"]]})
+
+    def __enter__(self):
+        self.loop = asyncio.new_event_loop()
+        started = threading.Event()
+
+        async def start():
+            app = web.Application()
+            app.router.add_post("/v1/embeddings", self._handle)
+            app.router.add_post("/v1/embed", self._handle)
+            self.runner = web.AppRunner(app)
+            await self.runner.setup()
+            site = web.TCPSite(self.runner, "127.0.0.1", 0)
+            await site.start()
+            self.port = site._server.sockets[0].getsockname()[1]
+            started.set()
+
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+        asyncio.run_coroutine_threadsafe(start(), self.loop)
+        started.wait(5)
+        return self
+
+    def __exit__(self, *exc):
+        asyncio.run_coroutine_threadsafe(self.runner.cleanup(), self.loop).result(5)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(5)
+
+
+def test_make_batches_respects_token_and_size_bounds():
+    assert make_batches([3, 3, 3, 3, 3], max_batch_tokens=7, max_batch_size=10) == [(0, 2), (2, 4), (4, 5)]
+    assert make_batches([1] * 5, max_batch_tokens=100, max_batch_size=2) == [(0, 2), (2, 4), (4, 5)]
+    assert make_batches([50, 1], max_batch_tokens=10, max_batch_size=10) == [(0, 1), (1, 2)]
+    assert make_batches([], max_batch_tokens=10, max_batch_size=10) == []
+
+
+@pytest.mark.parametrize("provider", ["openai", "cohere"])
+def test_vectors_are_reassembled_in_order(provider):
+    texts = [f"text number {i} " * (i % 5 + 1) for i in range(200)]
+    with StandInServer() as server:
+        model = ConcurrentAPIEmbeddings(
+            provider,
+            "stand-in",
+            api_key="test",
+            base_url=f"http://127.0.0.1:{server.port}" + ("/v1" if provider == "openai" else ""),
+            max_concurrency=4,
+            max_batch_tokens=60,
+        )
+        vectors = model.embed_documents(texts)
+
+    assert vectors == [_vector(t) for t in texts]
+    assert len(server.batches) > 4
+    assert 1 < server.max_in_flight <= 4
+
+
+def test_rate_limited_batches_are_retried():
+    texts = [f"doc {i}" for i in range(20)]
+    with StandInServer(fail_first=3) as server:
+        model = ConcurrentAPIEmbeddings(
+            "openai",
+            "stand-in",
+            api_key="test",
+            base_url=f"http://127.0.0.1:{server.port}/v1",
+            max_batch_size=5,
+            backoff_base=0.01,
+            requests_per_minute=6000,
+        )
+        vectors = model.embed_documents(texts)
+        query = model.embed_query("doc 3")
+
+    assert vectors == [_vector(t) for t in texts]
+    assert query == _vector("doc 3")
+    assert model.retries == 3
+
+
+def test_gives_up_after_max_retries():
+    with StandInServer(fail_first=100) as server:
+        model = ConcurrentAPIEmbeddings(
+            "cohere", "stand-in", base_url=f"http://127.0.0.1:{server.port}", max_retries=2, backoff_base=0.01
+        )
+        with pytest.raises(RuntimeError, match="after 3 attempts"):
+            model.embed_documents(["a"])
@@ -0,0 +1,150 @@
+"""
+test_local_embeddings.py
+
+Tests for the local CPU embedding backends: length-bucketed batching, and parity
+of the bucketed and ONNX backends with PyTorch on a tiny local model.
+
+Run with:
+    pytest -v tests/test_local_embeddings.py
+"""
+
+import numpy as np
+import pytest
+from langchain_core.embeddings import DeterministicFakeEmbedding, Embeddings
+
+from local_embeddings import check_parity, cosine_parity, length_bucketed_batches
+
+
+def test_batches_cover_every_input_once():
+    rng = np.random.default_rng(0)
+    lengths = rng.integers(1, 256, size=500)
+    batches = length_bucketed_batches(lengths, max_batch_tokens=2048)
+    assert sorted(np.concatenate(batches).tolist()) == list(range(500))
+
+
+def test_batches_respect_padded_token_budget():
+    lengths = [10, 200, 12, 50, 11, 190, 9]
+    batches = length_bucketed_batches(lengths, max_batch_tokens=400)
+    for batch in batches:
+        assert len(batch) * max(lengths[i] for i in batch) <= 400 or len(batch) == 1
+    # Longest first: the two long texts share a small batch, the short ones a large one
+    assert [b.tolist() for b in batches] == [[1, 5], [3, 2, 4, 0, 6]]
+
+
+def test_max_batch_size_and_oversized_inputs():
+    batches = length_bucketed_batches([5] * 10, max_batch_tokens=1000, max_batch_size=4)
+    assert [len(b) for b in batches] == [4, 4, 2]
+    assert [b.tolist() for b in length_bucketed_batches([5000, 3], max_batch_tokens=100)] == [[0], [1]]
+
+
+class _Scaled(Embeddings):
+    """Rescales and perturbs the vectors of a model, standing in for a quantized copy."""
+
+    def __init__(self, base, noise):
+        self.base, self.noise = base, noise
+
+    def embed_documents(self, texts):
+        vectors = np.asarray(self.base.embed_documents(texts))
+        return (vectors * 3 + self.noise * np.random.default_rng(0).normal(size=vectors.shape)).tolist()
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+def test_parity_check():
+    texts = [f"text {i}" for i in range(20)]
+    reference = DeterministicFakeEmbedding(size=64)
+
+    parity = cosine_parity(reference, _Scaled(reference, noise=0.0), texts)
+    assert parity["min_cosine"] == pytest.approx(1.0)
+    check_parity(reference, _Scaled(reference, noise=0.01), texts, min_cosine=0.99)
+    with pytest.raises(ValueError, match="parity check failed"):
+        check_parity(reference, _Scaled(reference, noise=5.0), texts)
+
+
+
+@pytest.fixture(scope="module")
+def tiny_sentence_transformer(tmp_path_factory):
+    """A small randomly initialized sentence-transformers model saved locally (no download)."""
+    pytest.importorskip("torch")
+    pytest.importorskip("sentence_transformers")
+    from sentence_transformers import SentenceTransformer, models
+    from transformers import BertConfig, BertModel, BertTokenizer
+
+    directory = tmp_path_factory.mktemp("tiny_model")
+    words = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]", *"abcdefghijklmnopqrstuvwxyz", "short", "text", "about"]
+    (directory / "vocab.txt").write_text("\n".join(words), encoding="utf-8")
+    BertTokenizer(str(directory / "vocab.txt")).save_pretrained(directory)
+    config = BertConfig(
+        vocab_size=len(words), hidden_size=32, num_hidden_layers=2, num_attention_heads=2,
+        intermediate_size=64, max_position_embeddings=128,
+    )
+    BertModel(config).save_pretrained(directory)
+    model = SentenceTransformer(modules=[models.Transformer(str(directory), max_seq_length=128), models.Pooling(32)])
+    model.save(str(directory / "st"))
+    return str(directory / "st")
+
+
+PARITY_TEXTS = ["short", "short text about a b c", "x y " * 50, "text about\nnew lines", "q"]
+
+
+def test_bucketed_huggingface_matches_huggingface_embeddings(tiny_sentence_transformer):
+    from langchain_huggingface import HuggingFaceEmbeddings
+
+    from local_embeddings import BucketedHuggingFaceEmbeddings
+
+    parity = check_parity(
+        HuggingFaceEmbeddings(model_name=tiny_sentence_transformer, model_kwargs={"device": "cpu"}),
+        BucketedHuggingFaceEmbeddings(tiny_sentence_transformer, max_batch_tokens=64, num_threads=2),
+        PARITY_TEXTS,
+        min_cosine=0.9999,
+    )
+    assert parity["mean_cosine"] == pytest.approx(1.0, abs=1e-5)
+
+
+def test_bucketed_huggingface_restores_torch_threads(tiny_sentence_transformer):
+    import torch
+
+    from local_embeddings import BucketedHuggingFaceEmbeddings
+
+    before = torch.get_num_threads()
+    model = BucketedHuggingFaceEmbeddings(tiny_sentence_transformer, num_threads=1)
+    assert torch.get_num_threads() == before
+    model.embed_documents(["short text"])
+    assert torch.get_num_threads() == before
+
+
+@pytest.mark.parametrize("quantize", [False, True])
+def test_onnx_export_matches_pytorch(tiny_sentence_transformer, tmp_path, quantize):
+    pytest.importorskip("onnxruntime")
+    pytest.importorskip("optimum.onnxruntime")
+    from langchain_huggingface import HuggingFaceEmbeddings
+
+    from local_embeddings import OnnxEmbeddings
+
+    onnx = OnnxEmbeddings(tiny_sentence_transformer, export_dir=str(tmp_path), quantize=quantize, num_threads=1)
+    parity = check_parity(
+        HuggingFaceEmbeddings(model_name=tiny_sentence_transformer, model_kwargs={"device": "cpu"}),
+        onnx,
+        PARITY_TEXTS,
+        min_cosine=0.95 if quantize else 0.9999,
+    )
+    assert parity["mean_cosine"] > (0.95 if quantize else 0.9999)
+
+
+def test_quantized_onnx_model_has_its_own_cache_key(tiny_sentence_transformer, tmp_path):
+    pytest.importorskip("onnxruntime")
+    pytest.importorskip("optimum.onnxruntime")
+    from embeddings import embeddings_model_key, load_embeddings_model
+
+    models = [
+        load_embeddings_model(
+            "onnx", tiny_sentence_transformer, cache_dir=str(tmp_path / "cache"),
+            onnx={"export_dir": str(tmp_path / "onnx"), "quantize": quantize},
+        )
+        for quantize in (False, True)
+    ]
+    # Embedding cache, query cache and index fingerprints all tell the two models apart
+    assert models[0].directory != models[1].directory
+    assert embeddings_model_key(models[0]) != embeddings_model_key(models[1])
+    assert embeddings_model_key(models[0].embeddings) != embeddings_model_key(models[1].embeddings)
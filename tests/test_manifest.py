@@ -0,0 +1,188 @@
+"""
+test_manifest.py
+
+Tests for incremental re-indexing with IngestionManifest.
+
+Run with:
+    pytest -v tests/test_manifest.py
+"""
+
+import os
+
+import pytest
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from manifest import IngestionManifest, build_incremental_vectorstore, hash_file
+from sparse_index import SparseIndex, build_sparse_index
+
+SPLITTER_KWARGS = {"splitter_name": "recursive", "chunk_size": 50, "chunk_overlap": 5}
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    data = tmp_path / "data"
+    data.mkdir()
+    (data / "a.txt").write_text("alpha " * 20, encoding="utf-8")
+    (data / "b.txt").write_text("bravo " * 20, encoding="utf-8")
+    return data
+
+
+def _sync(data_dir, persist_dir, embeddings, config=None, sparse=None):
+    vectorstore, sparse_index, diff = build_incremental_vectorstore(
+        directory=str(data_dir),
+        name="faiss",
+        embeddings_model=embeddings,
+        splitter_kwargs=SPLITTER_KWARGS,
+        config=config,
+        sparse=sparse,
+        persist_directory=str(persist_dir),
+    )
+    return (vectorstore, sparse_index, diff) if sparse is not None else (vectorstore, diff)
+
+
+def _contents(vectorstore):
+    return sorted(doc.page_content for doc in vectorstore.docstore._dict.values())
+
+
+def test_first_sync_indexes_everything(data_dir, tmp_path):
+    vs, diff = _sync(data_dir, tmp_path / "index", DeterministicFakeEmbedding(size=8))
+    assert len(diff.added) == 2
+    assert vs.index.ntotal > 0
+    assert os.path.exists(tmp_path / "index" / "ingestion_manifest.json")
+
+
+def test_no_change_restart_embeds_nothing(data_dir, tmp_path):
+    emb = DeterministicFakeEmbedding(size=8)
+    vs1, _ = _sync(data_dir, tmp_path / "index", emb)
+
+    vs2, diff = _sync(data_dir, tmp_path / "index", emb)
+    assert diff.changed == [] and diff.removed == []
+    assert len(diff.unchanged) == 2
+    assert _contents(vs2) == _contents(vs1)
+
+
+def test_modified_and_removed_files(data_dir, tmp_path):
+    emb = DeterministicFakeEmbedding(size=8)
+    _sync(data_dir, tmp_path / "index", emb)
+
+    (data_dir / "a.txt").write_text("charlie " * 20, encoding="utf-8")
+    os.remove(data_dir / "b.txt")
+
+    vs, diff = _sync(data_dir, tmp_path / "index", emb)
+    assert [os.path.basename(p) for p in diff.modified] == ["a.txt"]
+    assert [os.path.basename(p) for p in diff.removed] == ["b.txt"]
+    contents = " ".join(_contents(vs))
+    assert "charlie" in contents
+    assert "alpha" not in contents and "bravo" not in contents
+
+
+def test_edit_reembeds_only_changed_chunks(data_dir, tmp_path, counting_embedding):
+    emb = counting_embedding
+    (data_dir / "a.txt").write_text("".join(f"line {i:02d} of file a\n" for i in range(20)), encoding="utf-8")
+    vs, _ = _sync(data_dir, tmp_path / "index", emb)
+    total = vs.index.ntotal
+    emb.batches.clear()
+
+    # Edit the end of the file without shifting earlier offsets
+    (data_dir / "a.txt").write_text(
+        "".join(f"line {i:02d} of file a\n" for i in range(19)) + "line 19 of file A\n", encoding="utf-8"
+    )
+    vs, diff = _sync(data_dir, tmp_path / "index", emb)
+    assert [os.path.basename(p) for p in diff.modified] == ["a.txt"]
+    assert 0 < len(emb.texts) < total / 2
+    assert all("file A" in text for text in emb.texts)
+    assert vs.index.ntotal == total
+
+
+def test_config_change_rebuilds_index(data_dir, tmp_path):
+    emb = DeterministicFakeEmbedding(size=8)
+    vs1, _ = _sync(data_dir, tmp_path / "index", emb, config={"model": "a"})
+
+    vs2, diff = _sync(data_dir, tmp_path / "index", emb, config={"model": "b"})
+    assert len(diff.added) == 2
+    assert vs2.index.ntotal == vs1.index.ntotal
+
+
+def test_touched_file_is_unchanged(data_dir, tmp_path):
+    manifest = IngestionManifest(str(tmp_path / "manifest.json"))
+    path = str(data_dir / "a.txt")
+    manifest.record(path, hash_file(path), [])
+    os.utime(path, (0, 0))
+
+    assert manifest.diff([path]).unchanged == [path]
+
+
+def test_touched_file_is_rehashed_once(data_dir, tmp_path, monkeypatch):
+    emb = DeterministicFakeEmbedding(size=8)
+    _sync(data_dir, tmp_path / "index", emb)
+    os.utime(data_dir / "a.txt", (0, 0))
+
+    _, diff = _sync(data_dir, tmp_path / "index", emb)
+    assert [os.path.basename(p) for p in diff.refreshed] == ["a.txt"]
+
+    # The refreshed stat info was saved, so the next start does not hash the file again
+    hashed = []
+    monkeypatch.setattr("manifest.hash_file", lambda path: hashed.append(path) or hash_file(path))
+    _, diff = _sync(data_dir, tmp_path / "index", emb)
+    assert diff.refreshed == [] and hashed == []
+
+
+def test_failed_files_are_not_loaded(data_dir, tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        "manifest._iter_loaded_files", lambda paths, *args: iter([([], "parse error")] * len(paths))
+    )
+    _, diff = _sync(data_dir, tmp_path / "index", DeterministicFakeEmbedding(size=8))
+    assert len(diff.failed) == 2
+    assert diff.loaded == [] and diff.unchanged == []
+
+
+def test_sparse_index_follows_incremental_syncs(data_dir, tmp_path, monkeypatch):
+    emb = DeterministicFakeEmbedding(size=8)
+    rebuilds = []
+    rebuild = SparseIndex._rebuild
+    monkeypatch.setattr(SparseIndex, "_rebuild", lambda self, *args: rebuilds.append(1) or rebuild(self, *args))
+
+    # Switching sparse retrieval on re-indexes everything once, in one write
+    _sync(data_dir, tmp_path / "index", emb)
+    vs, sparse_index, diff = _sync(data_dir, tmp_path / "index", emb, sparse={"k1": 1.2})
+    assert len(diff.added) == 2 and len(rebuilds) == 1
+    assert len(sparse_index) == vs.index.ntotal > 0
+
+    (data_dir / "a.txt").write_text("charlie " * 20, encoding="utf-8")
+    os.remove(data_dir / "b.txt")
+    vs, sparse_index, diff = _sync(data_dir, tmp_path / "index", emb, sparse={"k1": 1.2})
+    assert len(diff.modified) == 1 and len(diff.removed) == 1
+    assert sparse_index.k1 == 1.2
+    assert sorted(doc.id for doc in sparse_index.documents) == sorted(vs.index_to_docstore_id.values())
+    assert sparse_index.search("alpha bravo", k=3) == []
+    assert sparse_index.search("charlie", k=1)[0][0].page_content.startswith("charlie")
+
+    # Reloaded from disk on the next start, with nothing to re-index
+    _, reloaded, diff = _sync(data_dir, tmp_path / "index", emb, sparse={"k1": 1.2})
+    assert diff.changed == [] and reloaded is not sparse_index
+    assert [doc.id for doc in reloaded.documents] == [doc.id for doc in sparse_index.documents]
+
+    # New BM25 parameters apply to a reloaded index without any write
+    _, reloaded, _ = _sync(data_dir, tmp_path / "index", emb, sparse={"k1": 2.0})
+    expected = build_sparse_index(reloaded.documents, k1=2.0)
+    assert reloaded.search("charlie", k=1)[0][1] == pytest.approx(expected.search("charlie", k=1)[0][1])
+
+
+def test_numpy_sync_cut_short_reindexes(data_dir, tmp_path):
+    def sync():
+        return build_incremental_vectorstore(
+            directory=str(data_dir),
+            name="numpy",
+            embeddings_model=DeterministicFakeEmbedding(size=8),
+            splitter_kwargs=SPLITTER_KWARGS,
+            persist_directory=str(tmp_path / "index"),
+        )
+
+    vs, _, _ = sync()
+    total = len(vs)
+    # A write that is never saved (the process dies mid-sync) invalidates the store on disk
+    vs.delete([vs._ids[0]])
+
+    vs, _, diff = sync()
+    assert len(diff.added) == 2
+    assert len(vs) == total
@@ -0,0 +1,78 @@
+"""
+test_model_registry.py
+
+Tests for the process-wide, reference-counted model registry.
+
+Run with:
+    pytest -v tests/test_model_registry.py
+"""
+
+import threading
+import time
+
+from embeddings import acquire_embeddings_model
+from model_registry import ModelRegistry, get_model_registry
+
+
+def test_concurrent_acquires_load_once():
+    registry = ModelRegistry()
+    loads = []
+
+    def loader():
+        time.sleep(0.05)
+        loads.append(1)
+        return object()
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(registry.acquire("k", loader))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(loads) == 1
+    assert len({id(r) for r in results}) == 1
+    assert registry.stats() == {"models": {"k": 8}, "loads": 1}
+
+
+def test_release_and_unload():
+    registry = ModelRegistry()
+    model = registry.acquire(("embeddings", "hf", "m", "cpu"), object)
+    assert registry.acquire(("embeddings", "hf", "m", "cpu"), object) is model
+    other = registry.acquire(("embeddings", "hf", "m", "cuda"), object)
+    assert other is not model
+
+    registry.release(model)
+    assert not registry.unload(("embeddings", "hf", "m", "cpu"))  # still referenced
+    registry.release(model)
+    assert registry.unload(("embeddings", "hf", "m", "cpu"))
+
+    registry.release(other, unload=True)
+    assert registry.stats()["models"] == {}
+    assert registry.acquire(("embeddings", "hf", "m", "cpu"), object) is not model
+
+
+def test_acquire_embeddings_model_is_shared():
+    registry = get_model_registry()
+    first = acquire_embeddings_model("openai", "text-embedding-3-small", batching={"max_concurrency": 2})
+    second = acquire_embeddings_model("OpenAI", batching={"max_concurrency": 2})
+    different = acquire_embeddings_model("openai", batching={"max_concurrency": 4})
+    try:
+        assert first is second
+        assert different is not first
+    finally:
+        for model in (first, second, different):
+            registry.release(model, unload=True)
+
+
+def test_release_pipeline_drops_model_references():
+    from model_registry import release_pipeline
+
+    registry = get_model_registry()
+    model = registry.acquire(("embeddings", "test", "release_pipeline"), object)
+    registry.acquire(("embeddings", "test", "release_pipeline"), object)
+    try:
+        release_pipeline(model, model, vectorstore=None)
+        assert registry.stats()["models"][("embeddings", "test", "release_pipeline")] == 0
+    finally:
+        registry.unload(("embeddings", "test", "release_pipeline"), force=True)
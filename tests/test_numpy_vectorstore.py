@@ -0,0 +1,115 @@
+"""
+test_numpy_vectorstore.py
+
+Tests for the built-in NumPy/memmap vectorstore.
+
+Run with:
+    pytest -v tests/test_numpy_vectorstore.py
+"""
+
+import faiss
+import numpy as np
+import pytest
+from langchain.schema import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from numpy_vectorstore import NumpyVectorStore
+from retrievers import Retriever
+from vectorstores import build_vectorstore, delete_chunks, load_vectorstore, save_vectorstore, upsert_chunks
+
+
+@pytest.mark.parametrize("dtype", ["float32", "float16"])
+def test_top_k_matches_faiss_flat(dtype):
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((3000, 32)).astype(np.float32)
+    queries = rng.standard_normal((20, 32)).astype(np.float32)
+    store = NumpyVectorStore(DeterministicFakeEmbedding(size=32), dtype=dtype)
+    store.add_embeddings([str(i) for i in range(len(vectors))], vectors)
+
+    normed = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    flat = faiss.IndexFlatIP(32)
+    flat.add(normed)
+    for k in (1, 10, 200, 5000):
+        expected_scores, expected_rows = flat.search(queries / np.linalg.norm(queries, axis=1, keepdims=True), k)
+        rows, scores = store.search_vectors(queries, k)
+        assert rows.shape == (20, min(k, 3000))
+        if dtype == "float32":
+            assert np.mean(rows == expected_rows[:, :rows.shape[1]]) > 0.99
+        assert np.allclose(scores, expected_scores[:, :rows.shape[1]], atol=1e-5 if dtype == "float32" else 3e-3)
+        assert np.all(np.diff(scores, axis=1) <= 0)
+
+
+def test_build_retrieve_and_batch(make_chunks):
+    vs = build_vectorstore("numpy", make_chunks(50), DeterministicFakeEmbedding(size=16))
+    assert vs.similarity_search("chunk number 7", k=1)[0].id == "doc:7"
+    assert Retriever(retriever_type="dense", vectorstore=vs, k=3).invoke("chunk number 7")[0].id == "doc:7"
+    assert vs.as_retriever(search_kwargs={"k": 2}).invoke("chunk number 9")[0].id == "doc:9"
+    assert [docs[0].id for docs in vs.batch_similarity_search(["chunk number 1", "chunk number 2"], k=4)] == [
+        "doc:1",
+        "doc:2",
+    ]
+    doc, score = vs.similarity_search_with_relevance_scores("chunk number 3", k=1)[0]
+    assert doc.id == "doc:3" and score == pytest.approx(1.0, abs=1e-5)
+
+
+def test_upsert_and_delete_keep_rows_consistent(make_chunks):
+    vs = NumpyVectorStore(DeterministicFakeEmbedding(size=16))
+    upsert_chunks(vs, make_chunks(10))
+    assert upsert_chunks(vs, make_chunks(10)) == []
+    upsert_chunks(vs, [Document(page_content="edited chunk", id="doc:4")])
+    assert len(vs) == 10
+
+    delete_chunks(vs, ["doc:0", "doc:5", "missing"])
+    assert len(vs) == 8
+    assert vs.similarity_search("edited chunk", k=1)[0].id == "doc:4"
+    for i in (1, 2, 3, 6, 7, 8, 9):
+        assert vs.similarity_search(f"chunk number {i}", k=1)[0].id == f"doc:{i}"
+
+
+def test_persisted_store_is_memory_mapped_on_rebuild(tmp_path, make_chunks, counting_embedding):
+    emb = counting_embedding
+    store_cfg = {"directory": str(tmp_path / "numpy"), "dtype": "float16"}
+    built = build_vectorstore("numpy", make_chunks(2000), emb, numpy_store=store_cfg)
+    loaded = build_vectorstore("numpy", make_chunks(2000), emb, numpy_store=store_cfg)
+
+    assert emb.calls == 1
+    assert isinstance(loaded._matrix, np.memmap)
+    assert loaded.similarity_search("chunk number 1500", k=3) == built.similarity_search("chunk number 1500", k=3)
+
+    build_vectorstore("numpy", make_chunks(2001), emb, numpy_store=store_cfg)
+    assert emb.calls == 2
+
+
+def test_unsaved_writes_invalidate_the_snapshot(tmp_path, make_chunks, counting_embedding):
+    emb = counting_embedding
+    store_cfg = {"directory": str(tmp_path / "numpy")}
+    chunks = make_chunks(10)
+    build_vectorstore("numpy", chunks, emb, numpy_store=store_cfg)
+
+    # Mutate a reloaded store without saving: its writes reached vectors.mmap
+    store = build_vectorstore("numpy", chunks, emb, numpy_store=store_cfg)
+    delete_chunks(store, ["doc:0"])
+    assert NumpyVectorStore.stored_fingerprint(store_cfg["directory"]) is None
+
+    rebuilt = build_vectorstore("numpy", chunks, emb, numpy_store=store_cfg)
+    assert emb.calls == 2
+    for i in range(10):
+        assert rebuilt.similarity_search(f"chunk number {i}", k=1)[0].id == f"doc:{i}"
+
+    # Read-only use of a reloaded store keeps the snapshot
+    build_vectorstore("numpy", chunks, emb, numpy_store=store_cfg).similarity_search("chunk number 1")
+    build_vectorstore("numpy", chunks, emb, numpy_store=store_cfg)
+    assert emb.calls == 2
+
+
+def test_incremental_load_and_save(tmp_path, make_chunks):
+    emb = DeterministicFakeEmbedding(size=16)
+    persist = str(tmp_path / "numpy")
+    vs = load_vectorstore("numpy", emb, persist_directory=persist)
+    upsert_chunks(vs, make_chunks(5))
+    save_vectorstore("numpy", vs, persist_directory=persist)
+
+    reopened = load_vectorstore("numpy", emb, persist_directory=persist)
+    assert len(reopened) == 5
+    assert reopened.get_by_ids(["doc:3"])[0].metadata == {"i": 3}
+    assert len(load_vectorstore("numpy", emb, reset=True, persist_directory=persist)) == 0
@@ -0,0 +1,78 @@
+"""
+test_query_cache.py
+
+Tests for the query-embedding LRU used by dense and hybrid retrievers.
+
+Run with:
+    pytest -v tests/test_query_cache.py
+"""
+
+import time
+
+from langchain.schema import Document
+
+from query_cache import QueryEmbeddingCache
+from retrievers import Retriever
+from vectorstores import build_vectorstore
+
+
+def _embed(text):
+    time.sleep(0.001)
+    return [float(len(text))]
+
+
+def test_lru_normalizes_queries_and_tracks_savings():
+    cache = QueryEmbeddingCache(max_size=2)
+    cache.get_or_embed("What is RAG?", "m", _embed)
+    cache.get_or_embed("  What   is\tRAG? ", "m", _embed)
+    cache.get_or_embed("What is RAG?", "other-model", _embed)
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 2)
+    assert stats["saved_seconds"] > 0
+
+    cache.get_or_embed("third", "m", _embed)  # evicts the least recently used entry
+    assert cache.stats()["entries"] == 2
+    cache.get_or_embed("What is RAG?", "m", _embed)
+    assert cache.misses == 4
+
+
+def test_case_is_part_of_the_key():
+    cache = QueryEmbeddingCache()
+    cache.get_or_embed("What is RAG?", "m", _embed)
+    cache.get_or_embed("what is rag?", "m", _embed)
+    assert cache.hits == 0 and cache.misses == 2
+
+
+def test_hits_return_a_copy():
+    cache = QueryEmbeddingCache()
+    cache.get_or_embed("q", "m", _embed).append(99.0)
+    assert cache.get_or_embed("q", "m", _embed) == [1.0]
+    assert cache.hits == 1
+
+
+def test_ttl_expires_entries():
+    cache = QueryEmbeddingCache(ttl_seconds=0.01)
+    cache.get_or_embed("q", "m", _embed)
+    time.sleep(0.02)
+    cache.get_or_embed("q", "m", _embed)
+    assert cache.hits == 0 and cache.misses == 2
+
+
+def test_dense_and_hybrid_retrievers_reuse_query_embeddings(counting_embedding):
+    emb = counting_embedding
+    docs = [Document(page_content=f"chunk about topic {i}") for i in range(10)]
+    store = build_vectorstore("faiss", docs, emb)
+    cache = QueryEmbeddingCache()
+
+    dense = Retriever("dense", vectorstore=store, k=3, query_cache=cache)
+    expected = store.as_retriever(search_kwargs={"k": 3}).invoke("topic 4")
+    emb.queries.clear()
+
+    assert dense.invoke("topic 4") == expected
+    assert dense.invoke("  topic   4 ") == expected
+    hybrid = Retriever("hybrid", vectorstore=store, docs=docs, k=3, query_cache=cache)
+    hybrid.invoke("topic 4")
+
+    assert emb.queries == ["topic 4"]
+    assert cache.stats()["hit_rate"] == 2 / 3
@@ -0,0 +1,60 @@
+"""
+test_rag_architectures.py
+
+Tests for how the RAG architectures index the data directory (no LLM calls).
+
+Run with:
+    pytest -v tests/test_rag_architectures.py
+"""
+
+import pytest
+import yaml
+
+import rag_architectures.hybrid_RAG as hybrid_RAG
+
+
+@pytest.fixture
+def hybrid_config(tmp_path, monkeypatch, counting_embedding):
+    data = tmp_path / "data"
+    data.mkdir()
+    (data / "a.txt").write_text("alpha retrieval " * 20, encoding="utf-8")
+    (data / "b.txt").write_text("bravo generation " * 20, encoding="utf-8")
+    config = {
+        "data": {"path": str(data)},
+        "ingestion": {"incremental": True},
+        "splitter": {"name": "recursive", "chunk_size": 60, "chunk_overlap": 5},
+        "embeddings": {"provider": "test", "model_name": "counting"},
+        "vectorstore": {"name": "faiss", "persist_directory": str(tmp_path / "index")},
+        "retriever": {"type": "hybrid", "k": 3, "sparse": {"k1": 1.5, "b": 0.75}},
+        "generator": {"provider": "openai"},
+    }
+    config_path = tmp_path / "config.yaml"
+    config_path.write_text(yaml.safe_dump(config), encoding="utf-8")
+
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    monkeypatch.setattr(hybrid_RAG, "acquire_embeddings_model", lambda **kwargs: counting_embedding)
+    return str(config_path), data
+
+
+def test_hybrid_rag_indexes_incrementally(hybrid_config, counting_embedding):
+    config_path, data = hybrid_config
+    rag = hybrid_RAG.HybridRAG(config_path=config_path)
+    rag.close()
+    assert counting_embedding.calls > 0
+
+    # A restart with no changes embeds nothing and reuses the persisted BM25 index
+    counting_embedding.batches.clear()
+    rag = hybrid_RAG.HybridRAG(config_path=config_path)
+    assert counting_embedding.calls == 0
+    sparse_index = rag.retriever.sparse_index
+    assert len(sparse_index) == rag.vectorstore.index.ntotal > 0
+    assert "bravo" in rag.retriever.invoke("bravo generation")[0].page_content
+    rag.close()
+
+    # Only the modified file is embedded again; the BM25 index follows it
+    (data / "b.txt").write_text("charlie " * 20, encoding="utf-8")
+    rag = hybrid_RAG.HybridRAG(config_path=config_path)
+    assert counting_embedding.texts and all("charlie" in text for text in counting_embedding.texts)
+    assert rag.retriever.sparse_index.search("bravo", k=3) == []
+    assert rag.retriever.sparse_index.search("charlie", k=1)
+    rag.close()
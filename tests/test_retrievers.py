@@ -0,0 +1,123 @@
+"""
+test_retrievers.py
+
+Tests for the native hybrid retriever (concurrent legs, RRF and score fusion).
+
+Run with:
+    pytest -v tests/test_retrievers.py
+"""
+
+import threading
+import time
+
+import pytest
+from langchain.retrievers import EnsembleRetriever
+from langchain.schema import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from pydantic import ConfigDict
+
+from query_cache import QueryEmbeddingCache
+from retrievers import HybridRetriever, Retriever, SparseRetriever, dense_retriever
+from sparse_index import build_sparse_index
+from vectorstores import build_vectorstore
+
+class SlowEmbedding(DeterministicFakeEmbedding):
+    """Query embedding that waits for the sparse leg to have started, so the legs must overlap."""
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+    sparse_started: threading.Event
+
+    def embed_query(self, text):
+        assert self.sparse_started.wait(timeout=5), "sparse leg did not start while the dense leg was running"
+        time.sleep(0.05)
+        return super().embed_query(text)
+
+
+class SlowIndex:
+    def __init__(self, index, sparse_started):
+        self.index = index
+        self.sparse_started = sparse_started
+
+    def search(self, query, k=4):
+        self.sparse_started.set()
+        time.sleep(0.05)
+        return self.index.search(query, k=k)
+
+
+@pytest.fixture
+def sparse_started():
+    return threading.Event()
+
+
+def _topic_text(i):
+    return f"chunk {i} about {'retrieval' if i % 3 else 'generation'} topic {i % 7}"
+
+
+def _setup(chunks, emb=None):
+    emb = emb or DeterministicFakeEmbedding(size=16)
+    return chunks, build_vectorstore("faiss", chunks, emb), build_sparse_index(chunks)
+
+
+@pytest.mark.parametrize("query", ["generation topic 3", "chunk 12", "retrieval"])
+def test_rrf_matches_ensemble_retriever(query, make_chunks):
+    chunks, vs, index = _setup(make_chunks(60, _topic_text))
+    cache = QueryEmbeddingCache()
+    ensemble = EnsembleRetriever(
+        retrievers=[dense_retriever(vs, 5, cache), SparseRetriever(index=index, k=5)],
+        weights=[0.6, 0.4],
+    )
+    expected = [doc.id for doc in ensemble.invoke(query)]
+    hybrid = Retriever("hybrid", vectorstore=vs, sparse_index=index, k=5, query_cache=cache)
+    assert [doc.id for doc in hybrid.invoke(query)] == expected
+    hybrid = Retriever("hybrid", vectorstore=vs, sparse_index=index, k=5, query_cache=cache, hybrid={"top_k": 5})
+    assert [doc.id for doc in hybrid.invoke(query)] == expected[:5]
+
+
+def test_score_fusion_and_per_leg_depth(make_chunks):
+    _, vs, index = _setup(make_chunks(60, _topic_text))
+    hybrid = Retriever(
+        "hybrid", vectorstore=vs, sparse_index=index, k=4,
+        hybrid={"fusion": "score", "dense_k": 2, "sparse_k": 10, "top_k": 4},
+    ).retriever
+    dense_docs, dense_scores = hybrid._dense("chunk 12")
+    sparse_docs, sparse_scores = hybrid._sparse("chunk 12")
+    assert len(dense_docs) == 2 and len(sparse_docs) == 10
+    assert list(dense_scores) == sorted(dense_scores, reverse=True)
+
+    docs = hybrid.invoke("chunk 12")
+    assert len(docs) == 4
+    # The best sparse match (exact term "12") and the best dense match both make the cut
+    assert sparse_docs[0].id in [doc.id for doc in docs]
+    assert dense_docs[0].id in [doc.id for doc in docs]
+
+    with pytest.raises(ValueError):
+        Retriever("hybrid", vectorstore=vs, sparse_index=index, hybrid={"fusion": "max"})
+
+
+def test_fuse_weights_ranks_and_deduplicates():
+    a, b, c = (Document(page_content=text, id=text) for text in "abc")
+    hybrid = HybridRetriever(vectorstore=None, sparse_index=None, k=3, weights=[0.5, 0.5])
+    assert [doc.id for doc in hybrid.fuse([([a, b], [0.9, 0.1]), ([b, c], [5.0, 1.0])])] == ["b", "a", "c"]
+
+    hybrid = HybridRetriever(vectorstore=None, sparse_index=None, k=2, weights=[0.1, 0.9], fusion="score")
+    assert [doc.id for doc in hybrid.fuse([([a, b], [0.9, 0.1]), ([c, b], [5.0, 1.0])])] == ["c", "a", "b"]
+    hybrid.top_k = 2
+    assert [doc.id for doc in hybrid.fuse([([a, b], [0.9, 0.1]), ([c, b], [5.0, 1.0])])] == ["c", "a"]
+    assert hybrid.fuse([([], []), ([], [])]) == []
+
+
+def test_legs_run_concurrently_and_report_latency(make_chunks, sparse_started):
+    _, vs, index = _setup(make_chunks(60, _topic_text), emb=SlowEmbedding(size=16, sparse_started=sparse_started))
+    hybrid = Retriever(
+        "hybrid", vectorstore=vs, sparse_index=SlowIndex(index, sparse_started), k=3, query_cache=QueryEmbeddingCache()
+    )
+
+    start = time.perf_counter()
+    assert 3 <= len(hybrid.invoke("retrieval topic 1")) <= 6
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    latency = hybrid.retriever.last_latency
+    assert set(latency) == {"dense_ms", "sparse_ms", "fusion_ms", "total_ms"}
+    assert latency["dense_ms"] >= 50 and latency["sparse_ms"] >= 50
+    assert latency["total_ms"] <= elapsed_ms
+    assert latency["total_ms"] < latency["dense_ms"] + latency["sparse_ms"]
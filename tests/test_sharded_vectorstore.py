@@ -0,0 +1,127 @@
+"""
+test_sharded_vectorstore.py
+
+Tests for the sharded FAISS vectorstore.
+
+Run with:
+    pytest -v tests/test_sharded_vectorstore.py
+"""
+
+import threading
+
+import pytest
+from langchain.schema import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from retrievers import Retriever
+from sharded_vectorstore import ShardedVectorStore, shard_of
+from vectorstores import build_vectorstore, delete_chunks, release_vectorstore, upsert_chunks
+
+
+def test_results_match_single_faiss_index(make_chunks):
+    emb = DeterministicFakeEmbedding(size=16)
+    chunks = make_chunks(200)
+    single = build_vectorstore("faiss", chunks, emb)
+    sharded = build_vectorstore("sharded", chunks, emb, sharded={"num_shards": 4})
+    assert isinstance(sharded, ShardedVectorStore)
+    assert len(sharded) == 200
+    assert all(shard.index.ntotal for shard in sharded.shards)
+
+    for query in ("chunk number 7", "chunk number 150", "something else"):
+        expected = single.similarity_search_with_score(query, k=10)
+        got = sharded.similarity_search_with_score(query, k=10)
+        assert [doc.id for doc, _ in got] == [doc.id for doc, _ in expected]
+        assert [round(score, 4) for _, score in got] == [round(score, 4) for _, score in expected]
+
+
+def test_chunks_are_routed_to_stable_shards(make_chunks):
+    sharded = ShardedVectorStore.from_chunks(make_chunks(100), DeterministicFakeEmbedding(size=16), num_shards=3)
+    for shard, store in enumerate(sharded.shards):
+        for doc_id in store.index_to_docstore_id.values():
+            assert shard_of(doc_id, 3) == shard
+
+
+def test_upsert_delete_and_retrievers(make_chunks):
+    vs = build_vectorstore("sharded", make_chunks(40), DeterministicFakeEmbedding(size=16), sharded={"num_shards": 4})
+    changed = upsert_chunks(vs, [Document(page_content="edited text", metadata={"i": 5}, id="doc:5")] + make_chunks(3))
+    assert changed == ["doc:5"]
+    assert len(vs) == 40
+    assert vs.get_by_ids(["doc:5"])[0].page_content == "edited text"
+
+    delete_chunks(vs, ["doc:1", "doc:2", "missing"])
+    assert len(vs) == 38
+    assert vs.get_by_ids(["doc:1"]) == []
+
+    assert Retriever(retriever_type="dense", vectorstore=vs, k=3).invoke("edited text")[0].id == "doc:5"
+    assert vs.as_retriever(search_kwargs={"k": 2}).invoke("chunk number 9")[0].id == "doc:9"
+    doc, score = vs.similarity_search_with_relevance_scores("chunk number 3", k=1)[0]
+    assert doc.id == "doc:3" and score > 0.99
+
+
+def test_persisted_shards_rebuild_only_when_their_chunks_change(tmp_path, make_chunks, counting_embedding):
+    emb = counting_embedding
+    cfg = {"num_shards": 4, "directory": str(tmp_path)}
+    chunks = make_chunks(80)
+    build_vectorstore("sharded", chunks, emb, sharded=cfg)
+    assert len(emb.texts) == 80
+
+    emb.batches.clear()
+    vs = build_vectorstore("sharded", chunks, emb, sharded=cfg)
+    assert emb.texts == []
+    assert vs.similarity_search("chunk number 11", k=1)[0].id == "doc:11"
+
+    chunks[11] = Document(page_content="edited text", metadata={"i": 11}, id="doc:11")
+    build_vectorstore("sharded", chunks, emb, sharded=cfg)
+    rebuilt = [chunk.id for chunk in chunks if shard_of(chunk.id, 4) == shard_of("doc:11", 4)]
+    assert sorted(emb.texts) == sorted(chunk.page_content for chunk in chunks if chunk.id in rebuilt)
+
+
+def test_streamed_chunks_and_empty_shards(make_chunks):
+    emb = DeterministicFakeEmbedding(size=16)
+    vs = build_vectorstore("sharded", iter(make_chunks(30)), emb, batch_size=7, sharded={"num_shards": 3})
+    assert len(vs) == 30
+
+    vs = ShardedVectorStore.from_chunks(make_chunks(1), emb, num_shards=4)
+    assert sum(shard is None for shard in vs.shards) == 3
+    vs.add_documents(make_chunks(20)[1:], ids=[f"doc:{i}" for i in range(1, 20)])
+    assert len(vs) == 20
+    assert vs.similarity_search("chunk number 17", k=1)[0].id == "doc:17"
+
+
+class ThreadRecordingEmbedding(DeterministicFakeEmbedding):
+    threads: list = []
+
+    def embed_documents(self, texts):
+        self.threads.append(threading.current_thread())
+        return super().embed_documents(texts)
+
+
+def test_chunks_are_embedded_once_in_the_calling_thread(make_chunks):
+    emb = ThreadRecordingEmbedding(size=16, threads=[])
+    vs = ShardedVectorStore.from_chunks(make_chunks(40), emb, num_shards=4)
+    vs.add_documents(make_chunks(60)[40:], ids=[f"doc:{i}" for i in range(40, 60)])
+    assert emb.threads == [threading.current_thread()] * 2
+    assert len(vs) == 60
+
+
+@pytest.mark.parametrize("index_type", ["flat", "ivf_flat"])
+def test_reloaded_shards_accept_writes(index_type, tmp_path, make_chunks):
+    emb = DeterministicFakeEmbedding(size=16)
+    kwargs = {"sharded": {"num_shards": 2, "directory": str(tmp_path)}, "faiss_index": {"type": index_type, "nlist": 2}}
+    build_vectorstore("sharded", make_chunks(100), emb, **kwargs)
+
+    # As after a restart: every shard is reloaded from its memory-mapped snapshot
+    vs = build_vectorstore("sharded", make_chunks(100), emb, **kwargs)
+    upsert_chunks(vs, [Document(page_content="upserted chunk", id="doc:upserted")])
+    vs.add_documents([Document(page_content="added chunk", id="doc:added")], ids=["doc:added"])
+    assert vs.similarity_search("upserted chunk", k=1)[0].id == "doc:upserted"
+    assert vs.similarity_search("added chunk", k=1)[0].id == "doc:added"
+    delete_chunks(vs, ["doc:7"])
+    assert len(vs) == 101
+
+
+def test_release_vectorstore_stops_shard_threads(make_chunks):
+    vs = build_vectorstore("sharded", make_chunks(10), DeterministicFakeEmbedding(size=16), sharded={"num_shards": 2})
+    release_vectorstore(vs)
+    with pytest.raises(RuntimeError):
+        vs._pool.submit(len, [])
@@ -0,0 +1,131 @@
+"""
+test_sparse_index.py
+
+Tests for the BM25 inverted index and the sparse retriever.
+
+Run with:
+    pytest -v tests/test_sparse_index.py
+"""
+
+import os
+import random
+
+import numpy as np
+import pytest
+from langchain.schema import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from rank_bm25 import BM25Okapi
+
+from retrievers import Retriever
+from sparse_index import SparseIndex, build_sparse_index, sparse_snapshot_directory, tokenize
+from vectorstores import build_vectorstore
+
+WORDS = "retrieval augmented generation dense sparse vector index query chunk score rank token".split()
+
+
+def _random_words(seed=0):
+    """Chunk text for make_chunks: 3 to 40 words drawn from WORDS."""
+    rng = random.Random(seed)
+    return lambda i: " ".join(rng.choices(WORDS, k=rng.randint(3, 40)))
+
+
+def _rare_chunks():
+    return [
+        Document(page_content="The EU AI act regulates high-risk systems.", id="a"),
+        Document(page_content="FAISS builds IVF and HNSW indexes.", id="b"),
+        Document(page_content="BM25 ranks documents by term frequency.", id="c"),
+        Document(page_content="Dense retrievers embed the query.", id="d"),
+    ]
+
+
+@pytest.mark.parametrize("query", ["dense vector", "token token rank", "unknown words only", "Query, CHUNK!"])
+def test_scores_match_rank_bm25(query, make_chunks):
+    chunks = make_chunks(300, _random_words())
+    index = SparseIndex()
+    index.add(chunks)
+    expected = BM25Okapi([tokenize(chunk.page_content) for chunk in chunks]).get_scores(tokenize(query))
+    scores, matched = index.scores(query)
+    assert np.allclose(scores, expected)
+    assert np.array_equal(matched, [any(t in tokenize(c.page_content) for t in tokenize(query)) for c in chunks])
+
+
+def test_top_k_is_sorted_and_only_matches(make_chunks):
+    index = build_sparse_index(make_chunks(200, _random_words()))
+    results = index.search("sparse index", k=7)
+    assert len(results) == 7
+    assert [score for _, score in results] == sorted((score for _, score in results), reverse=True)
+    scores, matched = index.scores("sparse index")
+    assert results[0][1] == pytest.approx(scores[matched].max())
+    assert index.search("nothing matches", k=3) == []
+    assert [doc.id for doc, _ in build_sparse_index(_rare_chunks()).search("hnsw index", k=3)] == ["b"]
+
+
+def test_incremental_writes_match_a_full_rebuild(make_chunks):
+    chunks = make_chunks(120, _random_words())
+    index = SparseIndex()
+    index.add(chunks[:50])
+    searchable = index._searchable
+    index.search("dense", k=3)
+    assert index._searchable is searchable  # searches only read; writes rebuild the weights
+    index.add(chunks[50:])
+    index.add([Document(page_content="edited dense chunk", id="doc:7")])
+    index.delete(["doc:3", "missing"])
+
+    expected_chunks = [
+        Document(page_content="edited dense chunk", id="doc:7") if c.id == "doc:7" else c
+        for c in chunks if c.id != "doc:3"
+    ]
+    rebuilt = build_sparse_index(expected_chunks)
+    assert len(index) == len(rebuilt) == 119
+    for query in ("dense", "edited chunk", "rank score token"):
+        # Row order differs after writes, so compare scores by id
+        got = dict(zip((doc.id for doc in index.documents), index.scores(query)[0]))
+        expected = dict(zip((doc.id for doc in rebuilt.documents), rebuilt.scores(query)[0]))
+        assert got.keys() == expected.keys()
+        assert np.allclose([got[doc_id] for doc_id in expected], list(expected.values()))
+    assert index.get_by_ids(["doc:7", "doc:3"])[0].page_content == "edited dense chunk"
+
+    # The same writes batched into one update
+    batched = SparseIndex()
+    batched.add(chunks)
+    batched.update([Document(page_content="edited dense chunk", id="doc:7")], delete_ids=["doc:3", "missing"])
+    got = dict(zip((doc.id for doc in batched.documents), batched.scores("edited chunk")[0]))
+    expected = dict(zip((doc.id for doc in rebuilt.documents), rebuilt.scores("edited chunk")[0]))
+    assert got.keys() == expected.keys()
+    assert np.allclose([got[doc_id] for doc_id in expected], list(expected.values()))
+
+
+def test_persistence_and_fingerprint_reuse(tmp_path, make_chunks):
+    chunks = make_chunks(80, _random_words())
+    index = build_sparse_index(chunks, directory=str(tmp_path))
+    reloaded = build_sparse_index(chunks, directory=str(tmp_path))
+    assert reloaded is not index and reloaded.fingerprint == index.fingerprint
+    assert [doc.id for doc, _ in reloaded.search("vector query", k=5)] == [
+        doc.id for doc, _ in index.search("vector query", k=5)
+    ]
+
+    reloaded.add([Document(page_content="brand new words", id="new")])
+    assert reloaded.search("brand", k=1)[0][0].id == "new"
+
+    # A different corpus gets its own snapshot next to the first one
+    changed = build_sparse_index(chunks[:-1], directory=str(tmp_path))
+    assert changed.fingerprint != index.fingerprint and len(changed) == 79
+    for built in (index, changed):
+        assert SparseIndex.stored_fingerprint(sparse_snapshot_directory(str(tmp_path), built.fingerprint)) == (
+            built.fingerprint
+        )
+    assert len(os.listdir(tmp_path)) == 2
+
+
+def test_sparse_and_hybrid_retrievers_index_chunks(tmp_path):
+    chunks = _rare_chunks()
+    sparse = Retriever(retriever_type="sparse", docs=chunks, k=2, sparse={"directory": str(tmp_path)})
+    assert [doc.id for doc in sparse.invoke("Which act regulates AI?")] == ["a"]
+    assert SparseIndex.stored_fingerprint(sparse_snapshot_directory(str(tmp_path), sparse.sparse_index.fingerprint))
+
+    vs = build_vectorstore("faiss", chunks, DeterministicFakeEmbedding(size=16))
+    hybrid = Retriever(retriever_type="hybrid", vectorstore=vs, sparse_index=sparse.sparse_index, k=2)
+    assert "c" in [doc.id for doc in hybrid.invoke("BM25 term frequency")]
+
+    with pytest.raises(ValueError):
+        Retriever(retriever_type="sparse")
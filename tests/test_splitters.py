@@ -4,8 +4,10 @@ test_splitters.py
 Test file for splitter.py to ensure all splitting strategies work correctly.
 """
 
+import pytest
 from langchain.schema import Document
-from splitters import split_documents
+from langchain_text_splitters.base import Tokenizer, split_text_on_tokens
+from splitters import split_documents, iter_split_documents, FastTokenTextSplitter
 
 def main():
     # ------------------------------
@@ -39,5 +41,81 @@ def main():
             print(f"❌ {splitter_name} splitter failed: {e}")
 
 
+def test_iter_split_documents_matches_split_documents():
+    docs = [Document(page_content=f"Paragraph {i}. " * 40) for i in range(7)]
+    kwargs = {"splitter_name": "recursive", "chunk_size": 100, "chunk_overlap": 10}
+
+    expected = split_documents(docs, **kwargs)
+    streamed = list(iter_split_documents(iter(docs), batch_size=3, **kwargs))
+
+    assert [c.page_content for c in streamed] == [c.page_content for c in expected]
+
+
+def test_parallel_split_is_stable_with_deterministic_ids():
+    docs = [
+        Document(page_content=f"Document {i}. " + "word " * (50 * (i + 1)), metadata={"source": f"doc{i}"})
+        for i in range(9)
+    ]
+    kwargs = {"splitter_name": "recursive", "chunk_size": 80, "chunk_overlap": 10}
+
+    sequential = split_documents(docs, **kwargs)
+    parallel = split_documents(docs, num_workers=3, **kwargs)
+
+    assert [c.page_content for c in parallel] == [c.page_content for c in sequential]
+    assert [c.metadata for c in parallel] == [c.metadata for c in sequential]
+    assert [c.id for c in parallel] == [c.id for c in sequential]
+    assert len({c.id for c in sequential}) == len(sequential)
+
+    first = sequential[1]
+    doc_id, offset = first.id.split(":")
+    assert first.metadata["doc_id"] == doc_id
+    assert docs[0].page_content[int(offset):].startswith(first.page_content)
+
+
+def test_identical_documents_get_unique_ids():
+    docs = [Document(page_content="same text", metadata={"source": "x"})] * 2
+    ids = [c.id for c in split_documents(docs, chunk_size=100, chunk_overlap=10)]
+    assert ids[1] == ids[0] + "~1"
+
+
+@pytest.fixture(scope="module")
+def toy_encoding():
+    """Offline byte-level BPE with a few merges (tiktoken's gpt2 files need network)."""
+    import tiktoken
+
+    ranks = {bytes([i]): i for i in range(256)}
+    for merge in [b"th", b"the", b"in", b"ing", b" t", b" the", b"\xc3\xa9"]:
+        ranks[merge] = len(ranks)
+    return tiktoken.Encoding(
+        name="toy", pat_str=r"\s?\S+|\s+", mergeable_ranks=ranks, special_tokens={}
+    )
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "the thing in the thing " * 40,
+        "café résumé naïve — the thing 東京 😀 " * 15,
+        "",
+    ],
+)
+def test_fast_token_splitter_matches_token_splitter(toy_encoding, text):
+    splitter = FastTokenTextSplitter(encoding=toy_encoding, chunk_size=17, chunk_overlap=4, add_start_index=True)
+    reference = split_text_on_tokens(
+        text=text,
+        tokenizer=Tokenizer(
+            chunk_overlap=4, tokens_per_chunk=17, decode=toy_encoding.decode, encode=toy_encoding.encode
+        ),
+    )
+    assert splitter.split_text(text) == reference
+
+    docs = splitter.create_documents([text, text])
+    assert [d.page_content for d in docs] == reference * 2
+    for doc in docs:
+        if "\ufffd" not in doc.page_content:
+            start = doc.metadata["start_index"]
+            assert text[start:start + len(doc.page_content)] == doc.page_content
+
+
 if __name__ == "__main__":
     main()
@@ -6,10 +6,26 @@ Builds small indexes and checks retrieval.
 """
 
 import os
+from contextlib import contextmanager
+from types import SimpleNamespace
+from uuid import UUID
+
+import numpy as np
+import pytest
 from dotenv import load_dotenv
 from langchain.schema import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
 from langchain_huggingface import HuggingFaceEmbeddings
-from vectorstores import build_vectorstore
+from langchain_pinecone import PineconeVectorStore
+from langchain_weaviate.vectorstores import WeaviateVectorStore
+from vectorstores import (
+    build_vectorstore,
+    delete_chunks,
+    make_faiss_index,
+    measure_faiss_recall,
+    train_faiss_index,
+    upsert_chunks,
+)
 
 # Load environment variables (PINECONE_API_KEY etc.)
 load_dotenv()
@@ -56,5 +72,251 @@ def main():
         except Exception as e:
             print(f"❌ {name} failed: {e}")
 
+def test_build_vectorstore_from_iterable():
+    """Lazy chunk streams are indexed batch by batch into a single store."""
+    chunks = (Document(page_content=f"chunk number {i}") for i in range(10))
+    vs = build_vectorstore(
+        name="faiss",
+        chunks=chunks,
+        embeddings_model=DeterministicFakeEmbedding(size=16),
+        batch_size=3,
+    )
+    assert vs.index.ntotal == 10
+    assert vs.similarity_search("chunk number 4", k=1)[0].page_content == "chunk number 4"
+
+
+def test_faiss_snapshot_is_reloaded_when_fingerprint_matches(tmp_path, counting_embedding):
+    persist = str(tmp_path / "faiss")
+    emb = counting_embedding
+    chunks = [Document(page_content=f"chunk number {i}", id=f"doc:{i}") for i in range(10)]
+
+    built = build_vectorstore("faiss", chunks, emb, faiss_persist_directory=persist)
+    loaded = build_vectorstore("faiss", chunks, emb, faiss_persist_directory=persist)
+    assert emb.calls == 1
+    assert loaded._index_path is not None  # flat codes are memory-mapped, not read
+    assert loaded.index.ntotal == 10
+    assert loaded.similarity_search("chunk number 4", k=3) == built.similarity_search("chunk number 4", k=3)
+
+    # Changed corpus: rebuilt and re-persisted
+    chunks[3] = Document(page_content="edited chunk", id="doc:3")
+    build_vectorstore("faiss", chunks, emb, faiss_persist_directory=persist)
+    assert emb.calls == 2
+    build_vectorstore("faiss", chunks, emb, faiss_persist_directory=persist, faiss_mmap=False)
+    assert emb.calls == 2
+
+
+@pytest.mark.parametrize("index_type", ["ivf_flat", "ivf_pq", "hnsw"])
+def test_approximate_faiss_index_types(index_type, tmp_path, counting_embedding):
+    emb = counting_embedding
+    chunks = [Document(page_content=f"chunk number {i}", id=f"doc:{i}") for i in range(600)]
+    index_cfg = {"type": index_type, "nlist": 8, "nprobe": 8, "pq_m": 4}
+    persist = str(tmp_path / "faiss")
+
+    vs = build_vectorstore("faiss", chunks, emb, faiss_index=index_cfg, faiss_persist_directory=persist)
+    assert vs.index.is_trained and vs.index.ntotal == 600
+    assert vs.similarity_search("chunk number 42", k=1)[0].id == "doc:42"
+
+    # A different build parameter invalidates the snapshot, a search parameter does not
+    build_vectorstore("faiss", chunks, emb, faiss_index={**index_cfg, "nprobe": 4, "ef_search": 32},
+                      faiss_persist_directory=persist)
+    assert emb.calls == 1
+    build_vectorstore("faiss", chunks, emb, faiss_index={**index_cfg, "seed": 2}, faiss_persist_directory=persist)
+    assert emb.calls == 2
+
+
+def test_ivf_index_from_iterable_is_trained_on_first_sample():
+    chunks = (Document(page_content=f"chunk number {i}") for i in range(300))
+    vs = build_vectorstore(
+        "faiss",
+        chunks,
+        DeterministicFakeEmbedding(size=16),
+        batch_size=50,
+        faiss_index={"type": "ivf_flat", "nlist": 4, "train_sample": 200},
+    )
+    assert vs.index.ntotal == 300
+
+
+def test_measure_faiss_recall_against_flat():
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((2000, 32)).astype(np.float32)
+    exact = make_faiss_index(32)
+    exact.add(vectors)
+
+    recalls = []
+    for nprobe in (1, 16):
+        index = make_faiss_index(32, {"type": "ivf_flat", "nlist": 16, "nprobe": nprobe}, num_vectors=len(vectors))
+        train_faiss_index(index, vectors, {"type": "ivf_flat"})
+        index.add(vectors)
+        report = measure_faiss_recall(index, exact, vectors[:50], k=10)
+        recalls.append(report["recall"])
+        assert report["latency_ms"] >= 0 and report["exact_latency_ms"] >= 0
+    assert recalls[0] < recalls[1] == 1.0
+
+
+def test_invalid_faiss_index_config():
+    with pytest.raises(ValueError, match="Unsupported FAISS index type"):
+        make_faiss_index(16, {"type": "lsh"})
+    with pytest.raises(ValueError, match="must divide"):
+        make_faiss_index(16, {"type": "ivf_pq", "pq_m": 5})
+
+
+def test_faiss_upsert_and_delete_by_chunk_id(counting_embedding):
+    emb = counting_embedding
+    chunks = [Document(page_content=f"chunk number {i}", id=f"doc:{i}") for i in range(5)]
+    vs = build_vectorstore("faiss", chunks, emb)
+
+    # Unchanged chunks are skipped, edited ones replaced in place, new ones added
+    edited = Document(page_content="edited chunk", id="doc:2")
+    written = upsert_chunks(vs, chunks[:2] + [edited, Document(page_content="new chunk", id="doc:9")])
+    assert written == ["doc:2", "doc:9"]
+    assert vs.index.ntotal == 6
+    assert vs.docstore.search("doc:2").page_content == "edited chunk"
+    assert upsert_chunks(vs, [edited]) == []
+
+    assert delete_chunks(vs, ["doc:0", "doc:0", "missing"]) == ["doc:0"]
+    assert vs.index.ntotal == 5
+    assert "doc:0" not in vs.index_to_docstore_id.values()
+
+
+def test_faiss_upsert_looks_up_only_the_given_ids(make_chunks):
+    class IdMap(dict):
+        def values(self):
+            raise AssertionError("scanned every stored id")
+
+    vs = build_vectorstore("faiss", make_chunks(20), DeterministicFakeEmbedding(size=16))
+    vs.index_to_docstore_id = IdMap(vs.index_to_docstore_id)
+    assert upsert_chunks(vs, make_chunks(25)[18:]) == [f"doc:{i}" for i in range(20, 25)]
+    assert delete_chunks(vs, ["missing"]) == []
+    assert vs.index.ntotal == 25
+
+
+class PineconeIndex:
+    """In-memory stand-in for a pinecone Index: upserts overwrite by id."""
+
+    config = SimpleNamespace(host="stand-in", api_key="stand-in")
+
+    def __init__(self):
+        self.objects = {}
+        self.writes = 0
+
+    def upsert(self, vectors, namespace=None, async_req=False, **kwargs):
+        for object_id, _, metadata in vectors:
+            self.objects[object_id] = metadata
+            self.writes += 1
+        return SimpleNamespace(get=lambda: None)
+
+    def delete(self, ids, namespace=None, **kwargs):
+        for object_id in ids:
+            self.objects.pop(object_id, None)
+
+
+class WeaviateClient:
+    """In-memory stand-in for a weaviate client with one collection: writes overwrite by UUID."""
+
+    def __init__(self):
+        self.objects = {}
+        self.writes = 0
+        self.collections = self
+        self.batch = self
+        self.data = self
+        self.failed_objects = []
+        self.config = SimpleNamespace(get=lambda simple: SimpleNamespace(multi_tenancy_config=SimpleNamespace(enabled=False)))
+
+    # client.collections
+    def exists(self, name):
+        return True
+
+    def get(self, name):
+        return self
+
+    # client.batch
+    @contextmanager
+    def dynamic(self):
+        yield self
+
+    def add_object(self, collection, properties, uuid, vector, tenant=None):
+        self.objects[str(UUID(str(uuid)))] = properties  # Weaviate rejects non-UUID object ids
+        self.writes += 1
+
+    # collection.with_tenant(None).data
+    def with_tenant(self, tenant):
+        return self
+
+    def delete_many(self, where):
+        for object_id in where.value:
+            self.objects.pop(str(object_id), None)
+
+
+def _pinecone_store(emb):
+    index = PineconeIndex()
+    return PineconeVectorStore(index=index, embedding=emb), index
+
+
+def _weaviate_store(emb):
+    client = WeaviateClient()
+    return WeaviateVectorStore(client=client, index_name="TestIndex", text_key="text", embedding=emb), client
+
+
+@pytest.mark.parametrize("make_store", [_pinecone_store, _weaviate_store])
+def test_remote_upsert_does_not_duplicate(make_store):
+    store, remote = make_store(DeterministicFakeEmbedding(size=16))
+    chunks = [Document(page_content=f"chunk number {i}", id=f"doc:{i}") for i in range(5)]
+
+    upsert_chunks(store, chunks)
+    upsert_chunks(store, chunks)
+    assert len(remote.objects) == 5 and remote.writes == 10
+
+    # Ids map deterministically, so deletes by chunk id hit the stored objects
+    delete_chunks(store, ["doc:1", "doc:3"])
+    assert sorted(obj["text"] for obj in remote.objects.values()) == [f"chunk number {i}" for i in (0, 2, 4)]
+
+
+def test_upsert_without_ids_uses_content_hash():
+    store, index = _pinecone_store(DeterministicFakeEmbedding(size=16))
+    upsert_chunks(store, [Document(page_content="same text", metadata={"source": "a"})])
+    upsert_chunks(store, [Document(page_content="same text", metadata={"source": "a"})])
+    upsert_chunks(store, [Document(page_content="same text", metadata={"source": "b"})])
+    assert len(index.objects) == 2
+
+
+def test_unsupported_vectorstore():
+    class FAISS:
+        pass
+
+    for store in (object(), FAISS()):
+        with pytest.raises(ValueError, match="Unsupported vectorstore"):
+            upsert_chunks(store, [])
+
+
 if __name__ == "__main__":
     main()
+
+
+@pytest.mark.parametrize("index_type", ["flat", "ivf_flat"])
+def test_reloaded_faiss_snapshot_accepts_writes(index_type, tmp_path):
+    emb = DeterministicFakeEmbedding(size=16)
+    chunks = [Document(page_content=f"chunk number {i}", id=f"doc:{i}") for i in range(100)]
+    index_cfg = {"type": index_type, "nlist": 2, "nprobe": 2}
+    persist = str(tmp_path / "faiss")
+    build_vectorstore("faiss", chunks, emb, faiss_index=index_cfg, faiss_persist_directory=persist)
+
+    # The memory-mapped index is copied into RAM on the first write
+    vs = build_vectorstore("faiss", chunks, emb, faiss_index=index_cfg, faiss_persist_directory=persist)
+    upsert_chunks(vs, [Document(page_content="new chunk", id="doc:new")])
+    vs.add_documents([Document(page_content="added chunk", id="doc:added")])
+    assert vs.similarity_search("new chunk", k=1)[0].id == "doc:new"
+    delete_chunks(vs, ["doc:1"])
+    assert vs.index.ntotal == 101
+
+
+def test_faiss_snapshots_are_kept_per_corpus(tmp_path, counting_embedding):
+    emb = counting_embedding
+    persist = str(tmp_path / "faiss")
+    first = [Document(page_content=f"first corpus {i}", id=f"a:{i}") for i in range(5)]
+    second = [Document(page_content=f"second corpus {i}", id=f"b:{i}") for i in range(5)]
+
+    for chunks in (first, second, first, second):
+        build_vectorstore("faiss", chunks, emb, faiss_persist_directory=persist)
+    assert emb.calls == 2
+    assert len(os.listdir(persist)) == 2
+